@@ -2,12 +2,13 @@ import uvicorn
 from fastapi import FastAPI
 from sqladmin import Admin, ModelView
 
-from app.database import engine
-from app.models import InterviewSession
+from app.database import AsyncRoutingSessionLocal
+from app.models import BankedQuestion, InterviewSession
 
 app = FastAPI(title="My Application Admin")
 
-admin = Admin(app, engine, title="Admin Panel")
+# Browsing reads from the replica, when configured, edits go to the primary.
+admin = Admin(app, session_maker=AsyncRoutingSessionLocal, title="Admin Panel")
 
 
 class InterviewSessionAdmin(ModelView, model=InterviewSession):
@@ -16,10 +17,25 @@ class InterviewSessionAdmin(ModelView, model=InterviewSession):
         InterviewSession.candidate_id,
         InterviewSession.job_title,
         InterviewSession.timestamp,
+        InterviewSession.overall_score,
     ]
 
 
+class BankedQuestionAdmin(ModelView, model=BankedQuestion):
+    name_plural = "Question Bank"
+    column_list = [
+        BankedQuestion.id,
+        BankedQuestion.job_description,
+        BankedQuestion.text,
+        BankedQuestion.approved,
+        BankedQuestion.source,
+    ]
+    column_searchable_list = [BankedQuestion.job_description]
+    column_sortable_list = [BankedQuestion.approved, BankedQuestion.created_at]
+
+
 admin.add_view(InterviewSessionAdmin)
+admin.add_view(BankedQuestionAdmin)
 
 if __name__ == "__main__":
     uvicorn.run("app.admin_panel_sqladmin:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,151 @@
+"""
+Token counting and the size budgets of the prompts sent by app.agents.flow.
+
+Tokens are counted with the model's tiktoken encoding when the optional tiktoken
+package is installed, and estimated at about four characters per token otherwise.
+
+Text that would not fit its budget is clipped under a policy:
+
+- "head" keeps the beginning of the text,
+- "head_tail" keeps its beginning and end around an elision marker, as answers
+  often end with their conclusion,
+- "none" leaves it as it is.
+
+Job descriptions longer than JOB_DESCRIPTION_CONDENSE_TOKENS are first condensed
+by the LLM (see flow.condense_job_description), and clipped only when that fails.
+"""
+
+import functools
+import logging
+import os
+
+from app.agents import client
+from app.utils import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+# Completion budgets, OPENAI_MODEL_MAX_TOKENS remains the default of other calls.
+QUESTIONS_MAX_OUTPUT_TOKENS = int(os.environ.get("QUESTIONS_MAX_OUTPUT_TOKENS", 256))
+EVALUATION_MAX_OUTPUT_TOKENS = int(os.environ.get("EVALUATION_MAX_OUTPUT_TOKENS", 100))
+
+JOB_DESCRIPTION_MAX_TOKENS = int(os.environ.get("JOB_DESCRIPTION_MAX_TOKENS", 1024))
+JOB_DESCRIPTION_CONDENSE_TOKENS = int(
+    os.environ.get("JOB_DESCRIPTION_CONDENSE_TOKENS", 400)
+)
+JOB_DESCRIPTION_CONDENSED_TOKENS = int(
+    os.environ.get("JOB_DESCRIPTION_CONDENSED_TOKENS", 200)
+)
+
+ANSWER_MAX_TOKENS = int(os.environ.get("ANSWER_MAX_TOKENS", 1024))
+ANSWER_TRUNCATION_POLICY = os.environ.get("ANSWER_TRUNCATION_POLICY", "head_tail")
+
+POLICIES = ("head", "head_tail", "none")
+ELISION = "\n[...]\n"
+
+# Characters per token of the estimate used without tiktoken.
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model_name: str):
+    """
+    The tiktoken encoding of model_name, None without tiktoken.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def get_encoding():
+    return _encoding(client.get_settings().model_name)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Number of tokens of text for the configured model.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _head(text: str, max_tokens: int) -> str:
+    encoding = get_encoding()
+    if encoding is None:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def _tail(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[-max_tokens * CHARS_PER_TOKEN :]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[-max_tokens:])
+
+
+def clip(text: str, max_tokens: int, policy: str = "head", kind: str = "text") -> str:
+    """
+    Return text cut down to about max_tokens tokens under policy.
+
+    kind labels the llm_prompt_clipped_total metric.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown truncation policy: {policy}")
+    if policy == "none" or count_tokens(text) <= max_tokens:
+        return text
+    metrics.LLM_PROMPT_CLIPPED.inc(kind=kind, action="truncated")
+    if policy == "head":
+        return _head(text, max_tokens).rstrip()
+    # Split the budget between both ends, minus the marker.
+    kept = max(max_tokens - count_tokens(ELISION), 2)
+    head = _head(text, kept - kept // 2).rstrip()
+    tail = _tail(text, kept // 2).lstrip()
+    return f"{head}{ELISION}{tail}"
+
+
+def clip_answer(response_text: str) -> str:
+    return clip(response_text, ANSWER_MAX_TOKENS, ANSWER_TRUNCATION_POLICY, "answer")
+
+
+def clip_job_description(
+    job_description: str, max_tokens: int = JOB_DESCRIPTION_MAX_TOKENS
+) -> str:
+    return clip(job_description, max_tokens, "head", "job_description")
+
+
+def needs_condensing(job_description: str) -> bool:
+    return count_tokens(job_description) > JOB_DESCRIPTION_CONDENSE_TOKENS
+
+
+def create_condense_prompt(job_description: str) -> str:
+    """
+    Create the prompt summarizing a long job description for question generation.
+    """
+    return (
+        "Summarize the following job description in at most "
+        f"{JOB_DESCRIPTION_CONDENSED_TOKENS // 2} words, keeping the role, seniority, "
+        "required skills and responsibilities and leaving out company boilerplate, "
+        "benefits and application instructions.\n\n"
+        f"Job description:\n{job_description}"
+    )
+
+
+def check_completion(completion, max_tokens: int) -> bool:
+    """
+    Whether a completion was cut off by its budget, which is logged and counted.
+    """
+    truncated = completion.finish_reason == "length"
+    if truncated:
+        metrics.LLM_TRUNCATED_COMPLETIONS.inc(route=metrics.current_route())
+        LOGGER.warning(
+            "LLM completion was truncated at its budget of %d tokens", max_tokens
+        )
+    return truncated
@@ -0,0 +1,111 @@
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OpenAISettings:
+    api_key: Optional[str]
+    model_name: str
+    max_tokens: int
+    temperature: float
+    timeout_seconds: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry_seconds: float
+    http2: bool
+
+    @classmethod
+    def from_env(cls) -> "OpenAISettings":
+        """
+        Read the OpenAI settings from the environment.
+        """
+        return cls(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            model_name=os.environ.get("OPENAI_MODEL_NAME", "gpt-3.5-turbo"),
+            max_tokens=int(os.environ.get("OPENAI_MODEL_MAX_TOKENS", 100)),
+            temperature=float(os.environ.get("OPENAI_MODEL_TEMPERATURE", 0.7)),
+            timeout_seconds=float(os.environ.get("OPENAI_TIMEOUT_SECONDS", 60)),
+            max_connections=int(os.environ.get("OPENAI_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(
+                os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)
+            ),
+            keepalive_expiry_seconds=float(
+                os.environ.get("OPENAI_KEEPALIVE_EXPIRY_SECONDS", 30)
+            ),
+            http2=os.environ.get("OPENAI_HTTP2", "true").lower() == "true",
+        )
+
+
+_settings: Optional[OpenAISettings] = None
+_client: Optional[AsyncOpenAI] = None
+
+
+def get_settings() -> OpenAISettings:
+    """
+    Return the settings the shared client was created with, reading them once.
+    """
+    global _settings
+    if _settings is None:
+        _settings = OpenAISettings.from_env()
+    return _settings
+
+
+def init_client(settings: Optional[OpenAISettings] = None) -> AsyncOpenAI:
+    """
+    Create the shared AsyncOpenAI client and its HTTP connection pool.
+
+    Called from the application lifespan so the pool, keep-alive connections and
+    TLS sessions are reused by every request. HTTP/2 is only enabled when the h2
+    package is installed.
+    """
+    global _settings, _client
+    _settings = settings or OpenAISettings.from_env()
+
+    http2 = _settings.http2 and importlib.util.find_spec("h2") is not None
+    if _settings.http2 and not http2:
+        LOGGER.warning(
+            "OPENAI_HTTP2 is enabled but h2 is not installed, using HTTP/1.1"
+        )
+
+    http_client = httpx.AsyncClient(
+        http2=http2,
+        timeout=_settings.timeout_seconds,
+        limits=httpx.Limits(
+            max_connections=_settings.max_connections,
+            max_keepalive_connections=_settings.max_keepalive_connections,
+            keepalive_expiry=_settings.keepalive_expiry_seconds,
+        ),
+    )
+    # Retries are done by app.agents.rate_limit, which also backs off the other
+    # calls sharing the limits.
+    _client = AsyncOpenAI(
+        api_key=_settings.api_key, http_client=http_client, max_retries=0
+    )
+    return _client
+
+
+def get_client() -> AsyncOpenAI:
+    """
+    Return the shared client, creating it on first use outside of the app lifespan.
+    """
+    if _client is None:
+        return init_client(_settings)
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Close the shared client and release its connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -1,81 +1,562 @@
+import asyncio
 import logging
 import os
-from typing import List, Tuple
-
-from openai import AsyncOpenAI
+import time
+from typing import AsyncIterator, List, Optional, Tuple
 
+from app.agents import budget, client, providers, question_bank, rate_limit
 from app.agents.helpers import (
+    EVALUATION_PROMPT_VERSION,
+    QuestionStreamParser,
     compute_overall_score,
+    create_batch_evaluation_prompt,
     create_evaluation_prompt,
     create_questions_prompt,
     determine_feedback,
+    parse_batch_evaluation_result,
     parse_evaluation_result,
     parse_questions_response,
 )
 
+from app.utils import metrics, tracing
+from app.utils.cache import TieredCache, make_cache_key, normalize_text
+
 LOGGER = logging.getLogger(__name__)
 
+QUESTION_CACHE_MAXSIZE = int(os.environ.get("QUESTION_CACHE_MAXSIZE", 256))
+QUESTION_CACHE_TTL_SECONDS = float(os.environ.get("QUESTION_CACHE_TTL_SECONDS", 86400))
+QUESTION_CACHE_PERSISTENT = (
+    os.environ.get("QUESTION_CACHE_PERSISTENT", "false").lower() == "true"
+)
+
+EVALUATION_CACHE_MAXSIZE = int(os.environ.get("EVALUATION_CACHE_MAXSIZE", 4096))
+EVALUATION_CACHE_TTL_SECONDS = float(
+    os.environ.get("EVALUATION_CACHE_TTL_SECONDS", 604800)
+)
+EVALUATION_CACHE_PERSISTENT = (
+    os.environ.get("EVALUATION_CACHE_PERSISTENT", "false").lower() == "true"
+)
+
+EVALUATION_MAX_CONCURRENCY = int(os.environ.get("EVALUATION_MAX_CONCURRENCY", 8))
+EVALUATION_TIMEOUT_SECONDS = float(os.environ.get("EVALUATION_TIMEOUT_SECONDS", 30))
+# "per_answer" sends one evaluation prompt per answer, "batched" one prompt per session.
+EVALUATION_MODE = os.environ.get("EVALUATION_MODE", "per_answer")
+BATCH_EVALUATION_MAX_TOKENS_PER_ITEM = int(
+    os.environ.get("BATCH_EVALUATION_MAX_TOKENS_PER_ITEM", 100)
+)
+
+# Shared by every request so the total number of in-flight evaluations is bounded.
+_evaluation_semaphore = asyncio.Semaphore(EVALUATION_MAX_CONCURRENCY)
+
+# Question sets for the same job description are generated once and reused.
+question_cache = TieredCache(
+    "questions",
+    maxsize=QUESTION_CACHE_MAXSIZE,
+    ttl_seconds=QUESTION_CACHE_TTL_SECONDS,
+    persistent=QUESTION_CACHE_PERSISTENT,
+)
+
+# Identical question/answer pairs, e.g. retried submits, are only evaluated once.
+# An evaluation nobody waits for any more, e.g. of a replaced answer, is cancelled.
+evaluation_cache = TieredCache(
+    "evaluations",
+    maxsize=EVALUATION_CACHE_MAXSIZE,
+    ttl_seconds=EVALUATION_CACHE_TTL_SECONDS,
+    persistent=EVALUATION_CACHE_PERSISTENT,
+    cancel_abandoned=True,
+)
 
-async def call_OpenAI_API(prompt: str) -> str:
+
+# Long job descriptions are condensed once, see condense_job_description.
+condensed_job_description_cache = TieredCache(
+    "condensed_job_descriptions",
+    maxsize=QUESTION_CACHE_MAXSIZE,
+    ttl_seconds=QUESTION_CACHE_TTL_SECONDS,
+    persistent=QUESTION_CACHE_PERSISTENT,
+)
+
+
+# Shared by every request and worker so calls stay within the provider's limits.
+llm_limiter = rate_limit.LLMRateLimiter()
+
+
+class EvaluationFailed(Exception):
     """
-    Call the OpenAI API with the given prompt and return the raw text response.
+    Raised by validate_scores when none of the answers of a submit has a score.
     """
 
-    OPENAI_MODEL_NAME = os.environ.get("OPENAI_MODEL_NAME", "gpt-3.5-turbo")
-    OPENAI_MODEL_MAX_TOKENS = int(os.environ.get("OPENAI_MODEL_MAX_TOKENS", 100))
-    OPENAI_MODEL_TEMPERATURE = float(os.environ.get("OPENAI_MODEL_TEMPERATURE", 0.7))
 
-    client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+@tracing.traced("flow.call_llm")
+async def call_llm(
+    prompt: str, max_tokens: Optional[int] = None, timeout: Optional[float] = None
+) -> str:
+    """
+    Send the prompt to the configured LLM provider and return the raw text response.
+
+    max_tokens overrides OPENAI_MODEL_MAX_TOKENS for this call. Calls go through the
+    shared llm_limiter, which paces and retries them. timeout bounds each attempt
+    at the provider, not the time spent waiting for the limiter or between retries,
+    and an attempt that times out is retried as a transient failure. Latency and
+    token usage are recorded per route in app.utils.metrics, as are completions
+    truncated by max_tokens.
+    """
+    settings = client.get_settings()
+    provider = providers.get_provider()
+    route = metrics.current_route()
+    max_tokens = max_tokens or settings.max_tokens
 
-    response = await client.chat.completions.create(
-        model=OPENAI_MODEL_NAME,
-        messages=[{"role": "system", "content": prompt}],
-        max_tokens=OPENAI_MODEL_MAX_TOKENS,
-        temperature=OPENAI_MODEL_TEMPERATURE,
+    async def attempt() -> providers.Completion:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            completion = await asyncio.wait_for(
+                provider.complete(
+                    prompt, max_tokens=max_tokens, temperature=settings.temperature
+                ),
+                timeout,
+            )
+            outcome = "ok"
+            return completion
+        except providers.RateLimitedError:
+            outcome = "rate_limited"
+            raise
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise providers.TransientLLMError(f"LLM call timed out after {timeout}s")
+        finally:
+            metrics.LLM_LATENCY.observe(
+                time.perf_counter() - started,
+                provider=provider.name,
+                route=route,
+                outcome=outcome,
+            )
+
+    completion = await llm_limiter.call(
+        attempt, budget.count_tokens(prompt) + max_tokens, provider.name
+    )
+    budget.check_completion(completion, max_tokens)
+    metrics.LLM_TOKENS.observe(
+        completion.prompt_tokens, provider=provider.name, route=route, kind="prompt"
+    )
+    metrics.LLM_TOKENS.observe(
+        completion.completion_tokens,
+        provider=provider.name,
+        route=route,
+        kind="completion",
     )
-    # Assuming the API response has this structure
-    result_text = response.choices[0].message.content
-    LOGGER.debug("Raw API response: %s", result_text)
-    return result_text
+    tracing.set_attribute("llm.provider", provider.name)
+    tracing.set_attribute("llm.prompt_tokens", completion.prompt_tokens)
+    tracing.set_attribute("llm.completion_tokens", completion.completion_tokens)
+    LOGGER.debug("Raw API response: %s", completion.text)
+    return completion.text
+
+
+async def stream_llm(
+    prompt: str, max_tokens: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Stream the completion of the prompt from the configured LLM provider in chunks.
+
+    Goes through llm_limiter like call_llm. A transient failure is only retried
+    before the first chunk was received. Token usage is counted from the text.
+    """
+    settings = client.get_settings()
+    provider = providers.get_provider()
+    route = metrics.current_route()
+    max_tokens = max_tokens or settings.max_tokens
+    prompt_tokens = budget.count_tokens(prompt)
+    estimated_tokens = prompt_tokens + max_tokens
+    chunks: List[str] = []
+
+    for retry in range(llm_limiter.settings.max_retries + 1):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with llm_limiter.slot(estimated_tokens):
+                async for chunk in provider.stream(
+                    prompt, max_tokens=max_tokens, temperature=settings.temperature
+                ):
+                    if not chunks:
+                        metrics.LLM_FIRST_CHUNK_LATENCY.observe(
+                            time.perf_counter() - started,
+                            provider=provider.name,
+                            route=route,
+                        )
+                    chunks.append(chunk)
+                    yield chunk
+            outcome = "ok"
+            break
+        except providers.TransientLLMError as e:
+            if isinstance(e, providers.RateLimitedError):
+                outcome = "rate_limited"
+            if chunks or retry == llm_limiter.settings.max_retries:
+                raise
+            error = e
+        except (GeneratorExit, asyncio.CancelledError):
+            # The consumer stopped reading, e.g. the client disconnected.
+            outcome = "cancelled"
+            raise
+        finally:
+            metrics.LLM_LATENCY.observe(
+                time.perf_counter() - started,
+                provider=provider.name,
+                route=route,
+                outcome=outcome,
+            )
+        await llm_limiter.backoff(retry, error, provider.name)
+
+    completion_tokens = budget.count_tokens("".join(chunks))
+    llm_limiter.record_usage(estimated_tokens, prompt_tokens + completion_tokens)
+    metrics.LLM_TOKENS.observe(
+        prompt_tokens, provider=provider.name, route=route, kind="prompt"
+    )
+    metrics.LLM_TOKENS.observe(
+        completion_tokens, provider=provider.name, route=route, kind="completion"
+    )
+
+
+def question_cache_key(job_description: str) -> str:
+    """
+    Content-addressed cache key for the questions generated for a job description.
+
+    Covers the normalized job description, the prompt built from it, the provider
+    and the model settings, so changing any of them invalidates the cached question
+    sets.
+    """
+    settings = client.get_settings()
+    return make_cache_key(
+        create_questions_prompt(normalize_text(job_description)),
+        providers.provider_name(),
+        settings.model_name,
+        settings.temperature,
+    )
+
+
+@tracing.traced("flow.condense_job_description")
+async def condense_job_description(job_description: str) -> str:
+    """
+    Return the job description to build the questions prompt from.
+
+    Job descriptions over budget.JOB_DESCRIPTION_CONDENSE_TOKENS are summarized by
+    the LLM, once per job description thanks to condensed_job_description_cache.
+    When that fails the job description is truncated instead.
+    """
+    if not budget.needs_condensing(job_description):
+        return job_description
+    settings = client.get_settings()
+    key = make_cache_key(
+        budget.create_condense_prompt(normalize_text(job_description)),
+        providers.provider_name(),
+        settings.model_name,
+    )
+
+    async def condense() -> str:
+        prompt = budget.create_condense_prompt(
+            budget.clip_job_description(job_description)
+        )
+        summary = await call_llm(
+            prompt, max_tokens=budget.JOB_DESCRIPTION_CONDENSED_TOKENS
+        )
+        return summary.strip()
+
+    try:
+        condensed = await condensed_job_description_cache.get_or_compute(key, condense)
+    except Exception as e:
+        LOGGER.error("Condensing the job description failed: %r", e)
+        condensed = None
+    if not condensed:
+        return budget.clip_job_description(
+            job_description, budget.JOB_DESCRIPTION_CONDENSE_TOKENS
+        )
+    metrics.LLM_PROMPT_CLIPPED.inc(kind="job_description", action="condensed")
+    return condensed
+
 
+async def create_budgeted_questions_prompt(job_description: str) -> str:
+    with tracing.span("flow.build_prompt"):
+        return create_questions_prompt(await condense_job_description(job_description))
 
+
+@tracing.traced("flow.generate_questions")
 async def generate_questions(job_description: str) -> List[str]:
     """
     Generate interview questions for a candidate applying for the given job.
 
     Steps:
-    1. Create a prompt based on the job description.
+    1. Create a prompt based on the job description, condensed when long.
     2. Call the AI API using the prompt.
     3. Parse the raw API response into a list of questions.
+
+    Questions for a job description similar to one in the question bank are
+    served from the bank without calling the API. Otherwise results are cached by
+    question_cache_key and concurrent calls for the same job description share a
+    single API call.
+    """
+    banked = question_bank.bank.lookup(job_description)
+    if banked is not None:
+        tracing.set_attribute("question_bank.hit", True)
+        return banked
+
+    async def generate() -> List[str]:
+        prompt = await create_budgeted_questions_prompt(job_description)
+        LOGGER.debug("Generated prompt: %s", prompt)
+        raw_response = await call_llm(
+            prompt, max_tokens=budget.QUESTIONS_MAX_OUTPUT_TOKENS
+        )
+        return parse_questions_response(raw_response)
+
+    questions = await question_cache.get_or_compute(
+        question_cache_key(job_description), generate
+    )
+    return list(questions)
+
+
+async def stream_questions(job_description: str) -> AsyncIterator[str]:
+    """
+    Yield the interview questions for a job description one by one, each as soon as
+    its line of the streamed completion is complete.
+
+    Questions from the question bank and question sets in question_cache are
+    replayed, and a newly generated set is added to the cache once the completion
+    ends.
     """
-    prompt = create_questions_prompt(job_description)
-    LOGGER.debug("Generated prompt: %s", prompt)
-    raw_response = await call_OpenAI_API(prompt)
-    return parse_questions_response(raw_response)
+    banked = question_bank.bank.lookup(job_description)
+    if banked is not None:
+        for question in banked:
+            yield question
+        return
+
+    key = question_cache_key(job_description)
+    cached = await question_cache.get(key)
+    if cached is not None:
+        for question in cached:
+            yield question
+        return
+
+    parser = QuestionStreamParser()
+    prompt = await create_budgeted_questions_prompt(job_description)
+    async for chunk in stream_llm(
+        prompt, max_tokens=budget.QUESTIONS_MAX_OUTPUT_TOKENS
+    ):
+        for question in parser.feed(chunk):
+            yield question
+    for question in parser.close():
+        yield question
+    if parser.questions:
+        await question_cache.set(key, parser.questions)
 
 
-async def evaluate_response(question: str, response_text: str) -> Tuple[int, str]:
+@tracing.traced("flow.evaluate_response")
+async def evaluate_response(
+    question: str, response_text: str
+) -> Tuple[Optional[int], str]:
     """
     Evaluate the candidate's response by:
-      1. Creating a prompt.
+      1. Creating a prompt, the response clipped to budget.ANSWER_MAX_TOKENS.
       2. Calling the AI evaluation API.
       3. Parsing the API response.
 
-    Returns a tuple of (score, comment).
+    Returns a tuple of (score, comment), score being None when it cannot be parsed.
     """
-    prompt = create_evaluation_prompt(question, response_text)
+    with tracing.span("flow.build_prompt"):
+        prompt = create_evaluation_prompt(question, budget.clip_answer(response_text))
     LOGGER.debug("Evaluation prompt: %s", prompt)
 
-    result_text = await call_OpenAI_API(prompt)
+    result_text = await call_llm(
+        prompt,
+        max_tokens=budget.EVALUATION_MAX_OUTPUT_TOKENS,
+        timeout=EVALUATION_TIMEOUT_SECONDS,
+    )
     return parse_evaluation_result(result_text)
 
 
+def evaluation_slots_available() -> bool:
+    """
+    Whether an evaluation could start now without waiting for the concurrency limit.
+    """
+    return not _evaluation_semaphore.locked()
+
+
+def evaluation_cache_key(question: str, response_text: str) -> str:
+    """
+    Content-addressed cache key for the evaluation of an answer to a question.
+
+    Covers the normalized question and answer, EVALUATION_PROMPT_VERSION, how long
+    answers are clipped, the provider and the model settings.
+    """
+    settings = client.get_settings()
+    return make_cache_key(
+        EVALUATION_PROMPT_VERSION,
+        normalize_text(question),
+        normalize_text(response_text),
+        budget.ANSWER_MAX_TOKENS,
+        budget.ANSWER_TRUNCATION_POLICY,
+        providers.provider_name(),
+        settings.model_name,
+        settings.temperature,
+    )
+
+
+def _is_cacheable(result) -> bool:
+    # A response that could not be parsed is worth asking for again next time.
+    return result[0] is not None
+
+
+async def evaluate_answer(
+    question: str, response_text: str
+) -> Tuple[Optional[int], str]:
+    """
+    Evaluate one answer like iter_evaluations does: through evaluation_cache and
+    within EVALUATION_MAX_CONCURRENCY.
+
+    Raises when the evaluation fails, e.g. when every attempt timed out.
+    """
+
+    async def evaluate() -> Tuple[Optional[int], str]:
+        async with _evaluation_semaphore:
+            return await evaluate_response(question, response_text)
+
+    # Cache hits do not take an evaluation slot.
+    score, comment = await evaluation_cache.get_or_compute(
+        evaluation_cache_key(question, response_text), evaluate, _is_cacheable
+    )
+    return score, comment
+
+
+@tracing.traced("flow.evaluate_batched")
+async def _evaluate_batched(
+    questions: List[str], responses: List[str]
+) -> List[Optional[Tuple[int, str]]]:
+    with tracing.span("flow.build_prompt"):
+        prompt = create_batch_evaluation_prompt(
+            [
+                (question, budget.clip_answer(response_text))
+                for question, response_text in zip(questions, responses)
+            ]
+        )
+    LOGGER.debug("Batch evaluation prompt: %s", prompt)
+    try:
+        async with _evaluation_semaphore:
+            result_text = await call_llm(
+                prompt,
+                max_tokens=BATCH_EVALUATION_MAX_TOKENS_PER_ITEM * len(questions),
+                timeout=EVALUATION_TIMEOUT_SECONDS,
+            )
+    except Exception as e:
+        LOGGER.error("Batch evaluation failed: %r", e)
+        return [None] * len(questions)
+    return parse_batch_evaluation_result(result_text, len(questions))
+
+
+def _build_evaluation(question: str, response_text: str, result) -> dict:
+    if isinstance(result, BaseException):
+        LOGGER.error("Error evaluating response to %r: %r", question, result)
+        score, comment = None, "Evaluation could not be completed."
+    else:
+        score, comment = result
+    return {
+        "question": question,
+        "response": response_text,
+        "score": score,
+        "comment": comment,
+        # Failed evaluations have no score and are left out of the overall score.
+        "error": score is None,
+    }
+
+
+async def iter_evaluations(
+    questions: List[str], responses: List[str]
+) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    Evaluate every question/response pair of a session, yielding
+    (question index, evaluation dictionary) pairs as soon as each one is done.
+
+    Pairs found in evaluation_cache are not evaluated again. In the default
+    "per_answer" mode the pairs are evaluated concurrently. At most
+    EVALUATION_MAX_CONCURRENCY evaluations run at once across all requests and each
+    attempt at the provider is limited to EVALUATION_TIMEOUT_SECONDS. In "batched"
+    mode the uncached pairs are evaluated with a single prompt and only the items
+    that could not be parsed are evaluated again one by one. A pair whose
+    evaluation fails, times out or cannot be parsed gets no score and its "error"
+    flag set, so the others are still returned.
+    """
+    pending = list(range(len(questions)))
+    if EVALUATION_MODE == "batched" and questions:
+        keys = [evaluation_cache_key(q, r) for q, r in zip(questions, responses)]
+        uncached = []
+        for index in pending:
+            cached = await evaluation_cache.get(keys[index])
+            if cached is not None:
+                yield index, _build_evaluation(
+                    questions[index], responses[index], tuple(cached)
+                )
+            else:
+                uncached.append(index)
+        pending = []
+        if uncached:
+            results = await _evaluate_batched(
+                [questions[index] for index in uncached],
+                [responses[index] for index in uncached],
+            )
+            for index, result in zip(uncached, results):
+                if result is None:
+                    pending.append(index)
+                    continue
+                await evaluation_cache.set(keys[index], result)
+                yield index, _build_evaluation(
+                    questions[index], responses[index], result
+                )
+        if pending:
+            LOGGER.warning(
+                "Falling back to per-answer evaluation for %d of %d items",
+                len(pending),
+                len(questions),
+            )
+
+    tasks = {
+        asyncio.ensure_future(
+            evaluate_answer(questions[index], responses[index])
+        ): index
+        for index in pending
+    }
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = tasks.pop(task)
+                result = task.exception() or task.result()
+                yield index, _build_evaluation(
+                    questions[index], responses[index], result
+                )
+    finally:
+        # The consumer stopped early, e.g. a streaming client disconnected.
+        for task in tasks:
+            task.cancel()
+
+
+@tracing.traced("flow.evaluate_responses")
+async def evaluate_responses(questions: List[str], responses: List[str]) -> List[dict]:
+    """
+    Evaluate every question/response pair of a session, see iter_evaluations.
+
+    Returns a list of evaluation dictionaries in question order.
+    """
+    evaluations: List[Optional[dict]] = [None] * len(questions)
+    async for index, evaluation in iter_evaluations(questions, responses):
+        evaluations[index] = evaluation
+    return evaluations
+
+
+@tracing.traced("flow.validate_scores")
 async def validate_scores(evaluations: List[dict]) -> Tuple[str, float]:
     """
     Validate a list of evaluations by computing an overall score and determining feedback.
 
-    Returns a tuple of (feedback, overall_score).
+    Returns a tuple of (feedback, overall_score). The evaluations without a score
+    are left out, EvaluationFailed is raised when none has one.
     """
     overall_score = compute_overall_score(evaluations)
+    if overall_score is None:
+        raise EvaluationFailed("None of the responses could be evaluated.")
     feedback = determine_feedback(overall_score)
     return feedback, overall_score
@@ -1,8 +1,16 @@
 import logging
-from typing import List, Tuple
+import re
+from typing import List, Optional, Tuple
 
 LOGGER = logging.getLogger(__name__)
 
+# Comment of an evaluation whose response could not be parsed, which has no score.
+UNPARSED_COMMENT = "Evaluation could not be parsed."
+
+# Part of the evaluation cache key, bump it when the evaluation prompts change so
+# evaluations obtained with the old prompts are not reused.
+EVALUATION_PROMPT_VERSION = 2
+
 
 def create_questions_prompt(job_description: str) -> str:
     """
@@ -18,11 +26,46 @@ def parse_questions_response(questions_str: str) -> List[str]:
     """
     Parse the raw response string into a list of questions.
     """
-    LOGGER.info("Raw questions response: %s", questions_str)
+    LOGGER.debug("Raw questions response: %s", questions_str)
     questions_list = [q.strip() for q in questions_str.split("\n") if q.strip()]
     return questions_list[:3]
 
 
+class QuestionStreamParser:
+    """
+    Incremental parse_questions_response for a completion received in chunks.
+    """
+
+    def __init__(self, limit: int = 3):
+        self.limit = limit
+        self.questions: List[str] = []
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Add a chunk of the completion and return the questions it completed.
+        """
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        return self._add(lines)
+
+    def close(self) -> List[str]:
+        """
+        Return the question on the last line, if the completion ended without one.
+        """
+        lines, self._buffer = [self._buffer], ""
+        return self._add(lines)
+
+    def _add(self, lines: List[str]) -> List[str]:
+        added = []
+        for line in lines:
+            question = line.strip()
+            if question and len(self.questions) < self.limit:
+                self.questions.append(question)
+                added.append(question)
+        return added
+
+
 def create_evaluation_prompt(question: str, response_text: str) -> str:
     """
     Create the prompt to send to the AI for evaluating a candidate's response.
@@ -36,35 +79,96 @@ def create_evaluation_prompt(question: str, response_text: str) -> str:
     return prompt
 
 
-def parse_evaluation_result(result_text: str) -> Tuple[int, str]:
+def create_batch_evaluation_prompt(pairs: List[Tuple[str, str]]) -> str:
+    """
+    Create a single prompt asking the AI to evaluate several question/response pairs.
+    """
+    items = "\n\n".join(
+        f"Item {number}:\nQuestion: {question}\nResponse: {response_text}"
+        for number, (question, response_text) in enumerate(pairs, start=1)
+    )
+    prompt = (
+        "Evaluate the candidate's response to each of the following questions:\n\n"
+        f"{items}\n\n"
+        "For every item return a score between 1 (poor) and 5 (excellent) and a brief "
+        "comment, one item per line, in the format:\n"
+        "Item <number>: Score: <score>, Comment: <comment>"
+    )
+    return prompt
+
+
+def _parse_score_and_comment(result_text: str) -> Tuple[int, str]:
+    parts = result_text.split(",")
+    # Extract the score portion (assumes format "Score: <score>")
+    score_str = parts[0].split(":", 1)[1].strip()
+    score = int(score_str)
+    # Extract the comment portion (assumes format "Comment: <comment>")
+    if len(parts) > 1:
+        comment = parts[1].split(":", 1)[1].strip()
+    else:
+        comment = "No comment provided."
+    return score, comment
+
+
+def parse_evaluation_result(result_text: str) -> Tuple[Optional[int], str]:
     """
     Parse the result text from the AI response and extract the score and comment.
-    Returns a tuple (score, comment).
+    Returns a tuple (score, comment), score being None when it cannot be parsed.
     """
     try:
-        parts = result_text.split(",")
-        # Extract the score portion (assumes format "Score: <score>")
-        score_str = parts[0].split(":", 1)[1].strip()
-        score = int(score_str)
-        # Extract the comment portion (assumes format "Comment: <comment>")
-        if len(parts) > 1:
-            comment = parts[1].split(":", 1)[1].strip()
-        else:
-            comment = "No comment provided."
+        score, comment = _parse_score_and_comment(result_text)
     except Exception as e:
         LOGGER.error("Error parsing evaluation result: %s", e)
-        score = 3  # default score if parsing fails
-        comment = "Evaluation could not be parsed."
+        score = None
+        comment = UNPARSED_COMMENT
     return score, comment
 
 
-def compute_overall_score(evaluations: List[dict]) -> float:
+_BATCH_ITEM_RE = re.compile(
+    r"^\s*(?:Item\s*)?(\d+)\s*[:.)-]\s*(Score\s*:.*)$", re.IGNORECASE
+)
+
+
+def parse_batch_evaluation_result(
+    result_text: str, expected_items: int
+) -> List[Optional[Tuple[int, str]]]:
+    """
+    Parse a batched evaluation response produced for create_batch_evaluation_prompt.
+
+    Returns one entry per expected item, in order. Items that are missing, repeated
+    or cannot be parsed are returned as None so the caller can evaluate them again.
+    """
+    results: List[Optional[Tuple[int, str]]] = [None] * expected_items
+    seen = set()
+    for line in result_text.splitlines():
+        match = _BATCH_ITEM_RE.match(line)
+        if not match:
+            continue
+        index = int(match.group(1)) - 1
+        if not 0 <= index < expected_items:
+            continue
+        if index in seen:
+            # Ambiguous answer for this item, let the caller re-evaluate it.
+            results[index] = None
+            continue
+        seen.add(index)
+        try:
+            results[index] = _parse_score_and_comment(match.group(2))
+        except Exception as e:
+            LOGGER.error("Error parsing batched evaluation item %d: %s", index + 1, e)
+    return results
+
+
+def compute_overall_score(evaluations: List[dict]) -> Optional[float]:
     """
     Compute the overall average score from a list of evaluation dictionaries.
-    Each dictionary is expected to have a key "score".
+    Each dictionary is expected to have a key "score", None for the evaluations
+    that failed, which are left out. Returns None when none has a score.
     """
-    total_score = sum(eval_item["score"] for eval_item in evaluations)
-    return total_score / len(evaluations)
+    scores = [item["score"] for item in evaluations if item["score"] is not None]
+    if not scores:
+        return None
+    return sum(scores) / len(scores)
 
 
 def determine_feedback(overall_score: float) -> str:
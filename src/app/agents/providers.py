@@ -0,0 +1,351 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import openai
+
+from app.agents import client
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """
+    Raised by a provider when a completion request fails.
+    """
+
+
+class TransientLLMError(LLMError):
+    """
+    A failure worth retrying: timeouts, connection errors and 5xx responses.
+    """
+
+
+class RateLimitedError(TransientLLMError):
+    """
+    The provider rejected the request with 429, retry_after is its hint in seconds.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Completion:
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    # "length" when the completion was cut off by max_tokens.
+    finish_reason: Optional[str] = None
+
+
+class LLMProvider(ABC):
+    """
+    Backend used by app.agents.flow to turn a prompt into a completion.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def complete(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> Completion:
+        """
+        Return the completion for the given prompt.
+        """
+
+    async def stream(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> AsyncIterator[str]:
+        """
+        Yield the completion for the given prompt in chunks as they are generated.
+
+        Providers without streaming support yield the whole completion at once.
+        """
+        completion = await self.complete(prompt, max_tokens, temperature)
+        yield completion.text
+
+    async def close(self) -> None:
+        """
+        Release any resources held by the provider.
+        """
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, settings: Optional[client.OpenAISettings] = None):
+        client.init_client(settings)
+
+    async def complete(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> Completion:
+        with _openai_errors():
+            response = await client.get_client().chat.completions.create(
+                model=client.get_settings().model_name,
+                messages=[{"role": "system", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        # Assuming the API response has this structure
+        usage = response.usage
+        return Completion(
+            text=response.choices[0].message.content,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            finish_reason=response.choices[0].finish_reason,
+        )
+
+    async def stream(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> AsyncIterator[str]:
+        with _openai_errors():
+            response = await client.get_client().chat.completions.create(
+                model=client.get_settings().model_name,
+                messages=[{"role": "system", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def close(self) -> None:
+        await client.close_client()
+
+
+@contextmanager
+def _openai_errors():
+    """
+    Translate OpenAI client errors into LLMError and its retryable subclasses.
+    """
+    try:
+        yield
+    except openai.RateLimitError as e:
+        if e.code == "insufficient_quota":
+            raise LLMError(str(e)) from e
+        raise RateLimitedError(str(e), _retry_after(e.response)) from e
+    except (openai.APIConnectionError, openai.InternalServerError) as e:
+        raise TransientLLMError(str(e)) from e
+
+
+def _retry_after(response) -> Optional[float]:
+    """
+    Seconds to wait according to the retry-after-ms or Retry-After response header.
+    """
+    headers = response.headers if response is not None else {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+@dataclass(frozen=True)
+class StubSettings:
+    latency_distribution: str
+    latency_ms: float
+    latency_spread_ms: float
+    ms_per_token: float
+    error_rate: float
+    completion_tokens: int
+    seed: int
+    requests_per_minute: int = 0
+
+    @classmethod
+    def from_env(cls) -> "StubSettings":
+        """
+        Read the stub provider settings from the environment.
+        """
+        return cls(
+            latency_distribution=os.environ.get(
+                "STUB_LLM_LATENCY_DISTRIBUTION", "constant"
+            ),
+            latency_ms=float(os.environ.get("STUB_LLM_LATENCY_MS", 0)),
+            latency_spread_ms=float(os.environ.get("STUB_LLM_LATENCY_SPREAD_MS", 0)),
+            ms_per_token=float(os.environ.get("STUB_LLM_MS_PER_TOKEN", 0)),
+            error_rate=float(os.environ.get("STUB_LLM_ERROR_RATE", 0)),
+            completion_tokens=int(os.environ.get("STUB_LLM_COMPLETION_TOKENS", 50)),
+            seed=int(os.environ.get("STUB_LLM_SEED", 0)),
+            requests_per_minute=int(os.environ.get("STUB_LLM_REQUESTS_PER_MINUTE", 0)),
+        )
+
+
+_BATCH_ITEM_RE = re.compile(r"^Item (\d+):$", re.MULTILINE)
+
+
+class StubProvider(LLMProvider):
+    """
+    Local provider returning canned, parseable completions without network access.
+
+    Latency is drawn from a configurable distribution ("constant", "uniform",
+    "normal", "lognormal" or "exponential") around latency_ms, plus ms_per_token for
+    every completion token. A seeded random generator makes runs reproducible. A
+    fraction error_rate of the calls fails with LLMError, and calls beyond
+    requests_per_minute in a sliding window fail with RateLimitedError like a
+    provider quota would.
+    """
+
+    name = "stub"
+
+    def __init__(self, settings: Optional[StubSettings] = None):
+        self.settings = settings or StubSettings.from_env()
+        self._random = random.Random(self.settings.seed)
+        self._accepted: deque = deque()
+
+    def sample_latency(self, completion_tokens: int) -> float:
+        """
+        Draw the simulated latency in seconds for one call.
+        """
+        settings = self.settings
+        mean, spread = settings.latency_ms, settings.latency_spread_ms
+        distribution = settings.latency_distribution
+        if distribution == "constant":
+            latency = mean
+        elif distribution == "uniform":
+            latency = self._random.uniform(mean - spread, mean + spread)
+        elif distribution == "normal":
+            latency = self._random.gauss(mean, spread)
+        elif distribution == "lognormal":
+            # latency_ms is the median, latency_spread_ms / latency_ms the shape.
+            sigma = spread / mean if mean else 0
+            latency = self._random.lognormvariate(math.log(mean or 1), sigma)
+        elif distribution == "exponential":
+            latency = self._random.expovariate(1 / mean) if mean else 0
+        else:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        latency += settings.ms_per_token * completion_tokens
+        return max(latency, 0) / 1000
+
+    async def complete(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> Completion:
+        self._check_quota()
+        completion_tokens = min(self.settings.completion_tokens, max_tokens)
+        failed = self._random.random() < self.settings.error_rate
+        await asyncio.sleep(self.sample_latency(completion_tokens))
+        if failed:
+            raise LLMError("Simulated stub provider error")
+        return Completion(
+            text=self._respond(prompt),
+            prompt_tokens=len(prompt.split()),
+            completion_tokens=completion_tokens,
+            finish_reason=(
+                "length" if self.settings.completion_tokens > max_tokens else "stop"
+            ),
+        )
+
+    async def stream(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> AsyncIterator[str]:
+        """
+        Yield the canned completion word by word: the first chunk after the sampled
+        latency without per-token time, then one chunk every ms_per_token.
+        """
+        self._check_quota()
+        failed = self._random.random() < self.settings.error_rate
+        await asyncio.sleep(self.sample_latency(0))
+        if failed:
+            raise LLMError("Simulated stub provider error")
+        for chunk in re.findall(r"\S+\s*", self._respond(prompt)):
+            yield chunk
+            await asyncio.sleep(self.settings.ms_per_token / 1000)
+
+    def _check_quota(self) -> None:
+        limit = self.settings.requests_per_minute
+        if not limit:
+            return
+        now = time.monotonic()
+        while self._accepted and self._accepted[0] <= now - 60:
+            self._accepted.popleft()
+        if len(self._accepted) >= limit:
+            raise RateLimitedError(
+                "Simulated stub provider rate limit",
+                retry_after=self._accepted[0] + 60 - now,
+            )
+        self._accepted.append(now)
+
+    def _respond(self, prompt: str) -> str:
+        # The score only depends on the prompt so repeated runs are comparable.
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        if prompt.startswith("Summarize"):
+            # The first words of the job description stand in for its summary.
+            job_description = prompt.split("Job description:\n", 1)[-1]
+            return " ".join(job_description.split()[:50])
+        if prompt.startswith("Generate"):
+            return "\n".join(
+                f"{number}. Stub question {number} ({digest % 1000})?"
+                for number in range(1, 4)
+            )
+        items = _BATCH_ITEM_RE.findall(prompt)
+        if items:
+            return "\n".join(
+                f"Item {item}: Score: {(digest + int(item)) % 5 + 1}, "
+                f"Comment: Stub evaluation."
+                for item in items
+            )
+        return f"Score: {digest % 5 + 1}, Comment: Stub evaluation."
+
+
+PROVIDERS = {
+    OpenAIProvider.name: OpenAIProvider,
+    StubProvider.name: StubProvider,
+}
+
+_provider: Optional[LLMProvider] = None
+
+
+def init_provider(name: Optional[str] = None) -> LLMProvider:
+    """
+    Create the provider selected by name or the LLM_PROVIDER environment variable.
+    """
+    global _provider
+    name = name or os.environ.get("LLM_PROVIDER", OpenAIProvider.name)
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {name}")
+    _provider = PROVIDERS[name]()
+    LOGGER.info("Using LLM provider %s", name)
+    return _provider
+
+
+def get_provider() -> LLMProvider:
+    """
+    Return the active provider, creating it on first use outside of the app lifespan.
+    """
+    if _provider is None:
+        return init_provider()
+    return _provider
+
+
+def provider_name() -> str:
+    """
+    Name of the active provider, or of the one get_provider would create.
+    """
+    if _provider is None:
+        return os.environ.get("LLM_PROVIDER", OpenAIProvider.name)
+    return _provider.name
+
+
+async def close_provider() -> None:
+    """
+    Close the active provider.
+    """
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
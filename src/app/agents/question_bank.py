@@ -0,0 +1,332 @@
+"""
+Local bank of approved interview questions, searched before calling the LLM.
+
+Approved questions are grouped by the job description they were written for, and
+every distinct job description is a row of an L2-normalized TF-IDF matrix. A lookup
+vectorizes the new job description with the same vocabulary and computes its cosine
+similarity with every row in one product over the matching columns, then serves the
+questions of the best matching job descriptions. When fewer than
+QUESTION_BANK_TOP_K questions match at QUESTION_BANK_MIN_SIMILARITY or more, the
+caller falls back to the LLM.
+
+Questions generated for past sessions are added to the bank, unapproved unless
+--approve is given, with:
+
+    python -m app.agents.question_bank [--approve]
+
+They are approved in the admin panel, and the index is rebuilt at startup and by
+POST /ops/question-bank/reload.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.future import select
+
+from app.models import BankedQuestion, InterviewQuestion, InterviewSession
+from app.utils import metrics, tracing
+from app.utils.cache import normalize_text
+
+LOGGER = logging.getLogger(__name__)
+
+QUESTION_BANK_ENABLED = (
+    os.environ.get("QUESTION_BANK_ENABLED", "true").lower() == "true"
+)
+QUESTION_BANK_MIN_SIMILARITY = float(
+    os.environ.get("QUESTION_BANK_MIN_SIMILARITY", 0.8)
+)
+QUESTION_BANK_TOP_K = int(os.environ.get("QUESTION_BANK_TOP_K", 3))
+# Terms kept in the vocabulary, the most frequent ones across job descriptions.
+QUESTION_BANK_MAX_FEATURES = int(os.environ.get("QUESTION_BANK_MAX_FEATURES", 4096))
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+_NUMBERING_RE = re.compile(r"^\s*\d+[.)]\s*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def strip_numbering(question: str) -> str:
+    """
+    Remove the "1. " style numbering the LLM puts in front of questions.
+    """
+    return _NUMBERING_RE.sub("", question).strip()
+
+
+class TfidfIndex:
+    """
+    TF-IDF vectors of a fixed set of documents, searched by cosine similarity.
+
+    Term frequencies are sublinear (1 + log tf) and IDF is smoothed. The matrix is
+    dense and column-major, so scoring a query only reads the columns of its terms.
+    """
+
+    def __init__(self, documents: List[str], max_features: int = 4096):
+        tokenized = [tokenize(document) for document in documents]
+        terms, rows, columns = {}, [], []
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                rows.append(row)
+                columns.append(terms.setdefault(token, len(terms)))
+        counts = np.zeros((len(documents), len(terms)), dtype=np.float32)
+        np.add.at(
+            counts, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1
+        )
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        # Keep the max_features most frequent terms, in their original order.
+        kept = np.sort(np.argsort(-document_frequency, kind="stable")[:max_features])
+        counts = counts[:, kept]
+        names = list(terms)
+        self.vocabulary: Dict[str, int] = {
+            names[column]: index for index, column in enumerate(kept)
+        }
+
+        size = len(documents)
+        self.idf = (np.log((1 + size) / (1 + document_frequency[kept])) + 1).astype(
+            np.float32
+        )
+        # Weight of a term no document contains, it only lowers query similarity.
+        self.unknown_idf = float(np.log(1 + size) + 1)
+        weights = np.zeros_like(counts)
+        np.log(counts, out=weights, where=counts > 0)
+        weights[counts > 0] += 1
+        weights *= self.idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        self.matrix = np.asfortranarray(
+            np.divide(weights, norms, out=weights, where=norms > 0)
+        )
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def search(self, text: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Return up to k (document index, cosine similarity) pairs, most similar first.
+        """
+        tokens = tokenize(text)
+        if not tokens or not len(self):
+            return []
+        counts: Dict[int, int] = {}
+        unknown: Dict[str, int] = {}
+        for token in tokens:
+            column = self.vocabulary.get(token)
+            if column is None:
+                unknown[token] = unknown.get(token, 0) + 1
+            else:
+                counts[column] = counts.get(column, 0) + 1
+        if not counts:
+            return []
+
+        columns = np.fromiter(counts, dtype=np.intp, count=len(counts))
+        weights = (
+            1 + np.log(np.fromiter(counts.values(), dtype=np.float32))
+        ) * self.idf[columns]
+        # Unknown terms still count in the query norm, so a job description sharing
+        # only a few terms with a banked one is not mistaken for a close match.
+        unknown_weights = (
+            1 + np.log(np.fromiter(unknown.values(), dtype=np.float32))
+        ) * self.unknown_idf
+        norm = np.sqrt(weights @ weights + unknown_weights @ unknown_weights)
+        scores = self.matrix[:, columns] @ (weights / norm)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(index), float(scores[index])) for index in top]
+
+
+class QuestionBank:
+    """
+    Approved questions by job description with a TF-IDF index over the latter.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = QUESTION_BANK_MIN_SIMILARITY,
+        top_k: int = QUESTION_BANK_TOP_K,
+        max_features: int = QUESTION_BANK_MAX_FEATURES,
+        enabled: bool = QUESTION_BANK_ENABLED,
+    ):
+        self.min_similarity = min_similarity
+        self.top_k = top_k
+        self.max_features = max_features
+        self.enabled = enabled
+        # Replaced as a whole on reload so lookups never see half an index.
+        self._index: Optional[Tuple[TfidfIndex, List[List[str]]]] = None
+        self.loaded_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+
+    def build(self, question_sets: Dict[str, List[str]]) -> None:
+        """
+        Index the given questions by job description.
+        """
+        job_descriptions = list(question_sets)
+        index = TfidfIndex(job_descriptions, self.max_features)
+        self._index = (index, [question_sets[jd] for jd in job_descriptions])
+        self.loaded_at = time.time()
+
+    async def load(self, session_factory) -> int:
+        """
+        Rebuild the index from the approved questions and return how many there are.
+        """
+        async with session_factory() as db:
+            result = await db.execute(
+                select(BankedQuestion.job_description, BankedQuestion.text)
+                .where(BankedQuestion.approved.is_(True))
+                .order_by(BankedQuestion.job_description, BankedQuestion.position)
+            )
+            rows = result.all()
+        question_sets: Dict[str, List[str]] = {}
+        for job_description, text in rows:
+            questions = question_sets.setdefault(normalize_text(job_description), [])
+            if text not in questions:
+                questions.append(text)
+        # Building the matrix is CPU bound, keep it off the event loop.
+        await asyncio.to_thread(self.build, question_sets)
+        LOGGER.info(
+            "Question bank loaded: %d questions for %d job descriptions",
+            len(rows),
+            len(question_sets),
+        )
+        return len(rows)
+
+    def lookup(self, job_description: str) -> Optional[List[str]]:
+        """
+        Return top_k banked questions for a similar job description, or None.
+
+        Questions are taken from the most similar job descriptions first, and only
+        from those at min_similarity or more. They are numbered like the questions
+        the LLM generates.
+        """
+        if not self.enabled or self._index is None or not len(self._index[0]):
+            return None
+        index, question_sets = self._index
+        questions: List[str] = []
+        best = 0.0
+        for row, similarity in index.search(job_description, self.top_k):
+            best = max(best, similarity)
+            if similarity < self.min_similarity:
+                break
+            for question in question_sets[row]:
+                if question not in questions:
+                    questions.append(question)
+            if len(questions) >= self.top_k:
+                break
+        tracing.set_attribute("question_bank.similarity", round(best, 4))
+        if len(questions) < self.top_k:
+            self.misses += 1
+            metrics.QUESTION_BANK_LOOKUPS.inc(outcome="miss")
+            return None
+        self.hits += 1
+        metrics.QUESTION_BANK_LOOKUPS.inc(outcome="hit")
+        return [
+            f"{number}. {question}"
+            for number, question in enumerate(questions[: self.top_k], 1)
+        ]
+
+    def stats(self) -> dict:
+        index = self._index[0] if self._index is not None else None
+        return {
+            "enabled": self.enabled,
+            "job_descriptions": len(index) if index is not None else 0,
+            "vocabulary": len(index.vocabulary) if index is not None else 0,
+            "min_similarity": self.min_similarity,
+            "top_k": self.top_k,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loaded_at": self.loaded_at,
+        }
+
+
+# Shared by every request, loaded in the app lifespan.
+bank = QuestionBank()
+
+
+async def import_generated_questions(session_factory, approve: bool = False) -> int:
+    """
+    Add the questions generated for past sessions to the bank, skipping those it
+    already holds for the same job description. Returns the number added.
+    """
+    async with session_factory() as db:
+        existing = {
+            (normalize_text(job_description), normalize_text(text))
+            for job_description, text in (
+                await db.execute(
+                    select(BankedQuestion.job_description, BankedQuestion.text)
+                )
+            ).all()
+        }
+        positions: Dict[str, int] = {}
+        for job_description, position in (
+            await db.execute(
+                select(BankedQuestion.job_description, BankedQuestion.position)
+            )
+        ).all():
+            key = normalize_text(job_description)
+            positions[key] = max(positions.get(key, -1), position)
+
+        result = await db.execute(
+            select(InterviewSession.job_title, InterviewQuestion.text)
+            .join(
+                InterviewQuestion, InterviewQuestion.session_id == InterviewSession.id
+            )
+            .where(InterviewSession.job_title.is_not(None))
+            .order_by(InterviewSession.timestamp, InterviewQuestion.position)
+        )
+        rows = []
+        for job_description, text in result.all():
+            question = strip_numbering(text)
+            key = (normalize_text(job_description), normalize_text(question))
+            if not question or key in existing:
+                continue
+            existing.add(key)
+            positions[key[0]] = positions.get(key[0], -1) + 1
+            rows.append(
+                {
+                    "job_description": job_description,
+                    "position": positions[key[0]],
+                    "text": question,
+                    "approved": approve,
+                    "source": "generated",
+                }
+            )
+        if rows:
+            await db.execute(insert(BankedQuestion), rows)
+            await db.commit()
+    return len(rows)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Add the questions generated for past sessions to the question bank."
+    )
+    parser.add_argument(
+        "--approve",
+        action="store_true",
+        help="approve the imported questions instead of leaving them for review",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from app.database import AsyncSessionLocal, engine
+    from app.migrations.schema import upgrade
+
+    async def run() -> int:
+        await upgrade(engine)
+        return await import_generated_questions(AsyncSessionLocal, args.approve)
+
+    added = asyncio.run(run())
+    LOGGER.info("Done, %d questions added to the question bank", added)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Client-side limits for LLM calls shared by every request and worker.
+
+A call first waits for the requests-per-minute and tokens-per-minute buckets, then
+for a slot of the adaptive concurrency limit. The concurrency limit follows AIMD:
+it grows by one slot per window of successful calls, shrinks by
+LLM_CONCURRENCY_BACKOFF_FACTOR on a 429 and by a tenth when latency exceeds
+LLM_LATENCY_TARGET_SECONDS. A 429 also pauses every new call for its Retry-After.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from app.agents.providers import Completion, RateLimitedError, TransientLLMError
+from app.utils import metrics, tracing
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitSettings:
+    requests_per_minute: float
+    tokens_per_minute: float
+    initial_concurrency: int
+    min_concurrency: int
+    max_concurrency: int
+    backoff_factor: float
+    latency_target_seconds: float
+    max_retries: int
+    retry_base_seconds: float
+    retry_max_seconds: float
+
+    @classmethod
+    def from_env(cls) -> "RateLimitSettings":
+        """
+        Read the LLM rate limit settings from the environment, 0 disables a limit.
+        """
+        return cls(
+            requests_per_minute=float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 0)),
+            tokens_per_minute=float(os.environ.get("LLM_TOKENS_PER_MINUTE", 0)),
+            initial_concurrency=int(os.environ.get("LLM_CONCURRENCY_INITIAL", 16)),
+            min_concurrency=int(os.environ.get("LLM_CONCURRENCY_MIN", 1)),
+            max_concurrency=int(os.environ.get("LLM_CONCURRENCY_MAX", 64)),
+            backoff_factor=float(os.environ.get("LLM_CONCURRENCY_BACKOFF_FACTOR", 0.5)),
+            latency_target_seconds=float(
+                os.environ.get("LLM_LATENCY_TARGET_SECONDS", 0)
+            ),
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", 3)),
+            retry_base_seconds=float(os.environ.get("LLM_RETRY_BASE_SECONDS", 0.5)),
+            retry_max_seconds=float(os.environ.get("LLM_RETRY_MAX_SECONDS", 30)),
+        )
+
+
+class TokenBucket:
+    """
+    Bucket refilled at per_minute / 60 units per second, holding a minute's worth.
+
+    Callers reserve units up front and the bucket may go negative; each caller then
+    sleeps until its own reservation is covered, so waiters are served in order
+    without a lock.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take amount units and return the seconds to wait before using them.
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        return max(-self.tokens / self.rate, 0.0)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Charge (positive) or refund (negative) units after the fact.
+        """
+        if self.rate <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Concurrency limit adjusted with additive increase, multiplicative decrease.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        backoff_factor: float = 0.5,
+        latency_target_seconds: float = 0,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.backoff_factor = backoff_factor
+        self.latency_target_seconds = latency_target_seconds
+        self.in_flight = 0
+        self._waiters: deque = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation.
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(
+        self, latency: Optional[float] = None, rate_limited: bool = False
+    ) -> None:
+        """
+        Free a slot, adjusting the limit from the outcome of the call that held it.
+        """
+        self.in_flight -= 1
+        if rate_limited:
+            self.limit *= self.backoff_factor
+        elif latency is not None:
+            if self.latency_target_seconds and latency > self.latency_target_seconds:
+                self.limit *= 0.9
+            else:
+                self.limit += 1 / self.limit
+        self.limit = max(self.minimum, min(self.limit, self.maximum))
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class LLMRateLimiter:
+    """
+    Requests/tokens per minute buckets, adaptive concurrency and retries for LLM calls.
+    """
+
+    def __init__(self, settings: Optional[RateLimitSettings] = None):
+        self.settings = settings or RateLimitSettings.from_env()
+        self.requests = TokenBucket(self.settings.requests_per_minute)
+        self.tokens = TokenBucket(self.settings.tokens_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimit(
+            self.settings.initial_concurrency,
+            self.settings.min_concurrency,
+            self.settings.max_concurrency,
+            self.settings.backoff_factor,
+            self.settings.latency_target_seconds,
+        )
+        self.paused_until = 0.0
+        self.waiting = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        metrics.LLM_CONCURRENCY_LIMIT.set(int(self.concurrency.limit))
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every call that has not started yet for the given number of seconds.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def _acquire(self, estimated_tokens: int) -> float:
+        started = time.monotonic()
+        self.waiting += 1
+        metrics.LLM_QUEUE_DEPTH.set(self.waiting)
+        try:
+            pause = self.paused_until - started
+            if pause > 0:
+                await asyncio.sleep(pause)
+            delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            try:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self.concurrency.acquire()
+            except asyncio.CancelledError:
+                self.requests.adjust(-1)
+                self.tokens.adjust(-estimated_tokens)
+                raise
+        finally:
+            self.waiting -= 1
+            metrics.LLM_QUEUE_DEPTH.set(self.waiting)
+        waited = time.monotonic() - started
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        metrics.LLM_QUEUE_WAIT.observe(waited, route=metrics.current_route())
+        return waited
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        settings = self.settings
+        # Full jitter, so retries of calls that failed together spread out.
+        backoff = random.uniform(
+            0, min(settings.retry_max_seconds, settings.retry_base_seconds * 2**attempt)
+        )
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return retry_after + backoff
+        return backoff
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """
+        Hold one call's share of the limits for the duration of the block.
+
+        Yields the seconds spent waiting. The outcome of the block, its latency or a
+        TransientLLMError, adjusts the concurrency limit, and a RateLimitedError
+        with a retry_after hint pauses every call that has not started yet.
+        """
+        waited = await self._acquire(estimated_tokens)
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            yield waited
+        except TransientLLMError as e:
+            rate_limited = isinstance(e, RateLimitedError)
+            self.concurrency.release(rate_limited=rate_limited)
+            if rate_limited:
+                self.rate_limited += 1
+                if e.retry_after:
+                    self.pause(e.retry_after)
+            raise
+        except BaseException:
+            self.concurrency.release()
+            raise
+        else:
+            self.concurrency.release(latency=time.monotonic() - started)
+        finally:
+            metrics.LLM_CONCURRENCY_LIMIT.set(int(self.concurrency.limit))
+
+    async def backoff(
+        self, retry: int, error: TransientLLMError, provider_name: str = ""
+    ) -> None:
+        """
+        Sleep before retry number retry + 1 of a call that failed with error.
+        """
+        delay = self._retry_delay(retry, error)
+        reason = "rate_limited" if isinstance(error, RateLimitedError) else "transient"
+        LOGGER.warning(
+            "LLM call failed (%s), retrying in %.2fs: %s", reason, delay, error
+        )
+        self.retries += 1
+        metrics.LLM_RETRIES.inc(provider=provider_name, reason=reason)
+        tracing.set_attribute("llm.retries", retry + 1)
+        await asyncio.sleep(delay)
+
+    def record_usage(self, estimated_tokens: int, used_tokens: int) -> None:
+        """
+        Correct the tokens per minute bucket once the actual usage is known.
+        """
+        if used_tokens:
+            self.tokens.adjust(used_tokens - estimated_tokens)
+
+    async def call(
+        self,
+        attempt: Callable[[], Awaitable[Completion]],
+        estimated_tokens: int,
+        provider_name: str = "",
+    ) -> Completion:
+        """
+        Run attempt() within the limits, retrying transient failures with backoff.
+
+        estimated_tokens is charged against the tokens per minute bucket before the
+        call and corrected with the reported usage afterwards.
+        """
+        queue_wait = 0.0
+        for retry in range(self.settings.max_retries + 1):
+            try:
+                async with self.slot(estimated_tokens) as waited:
+                    queue_wait += waited
+                    completion = await attempt()
+            except TransientLLMError as e:
+                if retry == self.settings.max_retries:
+                    raise
+                await self.backoff(retry, e, provider_name)
+                continue
+            self.record_usage(
+                estimated_tokens,
+                completion.prompt_tokens + completion.completion_tokens,
+            )
+            tracing.set_attribute("llm.retries", retry)
+            tracing.set_attribute("llm.queue_wait_ms", round(queue_wait * 1000, 3))
+            return completion
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "queue_depth": self.waiting,
+            "paused_for_seconds": max(self.paused_until - time.monotonic(), 0.0),
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "avg_wait_ms": (
+                self.total_wait_seconds / self.calls * 1000 if self.calls else 0.0
+            ),
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
@@ -0,0 +1,372 @@
+"""
+End-to-end benchmark for /interview/start and /interview/submit.
+
+Drives the FastAPI app in-process through httpx at a configurable concurrency,
+against a local database and the stub LLM provider (configured through the
+STUB_LLM_* environment variables), and writes a JSON report:
+
+    python -m app.benchmarks.interview_api --sessions 500 --concurrency 50 \
+        --output bench.json --baseline previous.json
+
+Latency is broken down per request into time spent executing SQL, wall time with
+at least one LLM call in flight, and the remaining framework time (which includes
+waiting for the shared evaluation concurrency limit).
+
+The benchmark drops and recreates every table of its database. It runs on a
+temporary SQLite file unless --database-url is given, which is refused without
+--reset-database: point it at a database dedicated to benchmarks, never at one
+holding data to keep.
+
+With --baseline the run exits with status 1 when p95 latency or throughput of an
+endpoint regressed by more than --max-regression compared to the baseline report.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import datetime
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.agents import flow, providers
+from app.database import get_db, get_session_factory
+from app.main import app
+from app.models import Base
+
+ENDPOINTS = ("start", "submit")
+
+# Per-request timing buckets, shared by reference with the tasks serving the request.
+_timings: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "benchmark_timings", default=None
+)
+
+
+class TimedProvider(providers.LLMProvider):
+    """
+    Provider wrapper recording the interval of every completion call.
+    """
+
+    def __init__(self, inner: providers.LLMProvider):
+        self.inner = inner
+        self.name = f"timed-{inner.name}"
+
+    async def complete(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> providers.Completion:
+        started = time.perf_counter()
+        try:
+            return await self.inner.complete(prompt, max_tokens, temperature)
+        finally:
+            timings = _timings.get()
+            if timings is not None:
+                timings["llm"].append((started, time.perf_counter()))
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+
+def _instrument_engine(engine) -> None:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("benchmark_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info["benchmark_started"].pop()
+        timings = _timings.get()
+        if timings is not None:
+            timings["db"] += time.perf_counter() - started
+
+
+def _union_length(intervals: List[tuple]) -> float:
+    """
+    Total wall time covered by possibly overlapping (start, end) intervals.
+    """
+    total, covered_until = 0.0, float("-inf")
+    for start, end in sorted(intervals):
+        if end <= covered_until:
+            continue
+        total += end - max(start, covered_until)
+        covered_until = end
+    return total
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Linearly interpolated percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize(samples: List[dict], elapsed: float) -> dict:
+    """
+    Aggregate per-request samples of one endpoint into the report format.
+    """
+    latencies = sorted(sample["latency"] for sample in samples)
+    count = len(samples) or 1
+    db = sum(sample["db"] for sample in samples) / count
+    llm = sum(sample["llm"] for sample in samples) / count
+    latency = sum(latencies) / count
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample["status"] >= 400),
+        "rps": len(samples) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": latency * 1000,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        },
+        "breakdown_ms": {
+            "db": db * 1000,
+            "llm": llm * 1000,
+            "framework": max(latency - db - llm, 0.0) * 1000,
+        },
+    }
+
+
+@asynccontextmanager
+async def benchmark_app(database_url: str, stub_settings: providers.StubSettings):
+    """
+    Point the app at a fresh local database and the timed stub provider.
+
+    Every table of the database is dropped first, see run_benchmark.
+    """
+    engine = create_async_engine(database_url)
+    _instrument_engine(engine)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    previous_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    previous_provider = providers._provider
+    providers._provider = TimedProvider(providers.StubProvider(stub_settings))
+    flow.question_cache.clear()
+    flow.evaluation_cache.clear()
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+    finally:
+        providers._provider = previous_provider
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous_overrides)
+        await engine.dispose()
+
+
+async def _timed_post(client: AsyncClient, url: str, payload: dict) -> tuple:
+    timings = {"db": 0.0, "llm": []}
+    token = _timings.set(timings)
+    started = time.perf_counter()
+    try:
+        response = await client.post(url, json=payload)
+    finally:
+        _timings.reset(token)
+    latency = time.perf_counter() - started
+    sample = {
+        "latency": latency,
+        "status": response.status_code,
+        "db": timings["db"],
+        "llm": _union_length(timings["llm"]),
+    }
+    return response, sample
+
+
+async def _run_session(client: AsyncClient, number: int, roles: int, samples: dict):
+    start_payload = {
+        "candidate_id": f"candidate-{number}",
+        "job_description": f"Benchmark role {number % roles}",
+    }
+    response, sample = await _timed_post(client, "/interview/start", start_payload)
+    samples["start"].append(sample)
+    if response.status_code >= 400:
+        return
+    started = response.json()
+    submit_payload = {
+        "session_id": started["session_id"],
+        # Distinct answers per session so evaluations are not served from cache.
+        "responses": [
+            f"Answer {index} of candidate {number}"
+            for index in range(len(started["questions"]))
+        ],
+    }
+    _, sample = await _timed_post(client, "/interview/submit", submit_payload)
+    samples["submit"].append(sample)
+
+
+async def _drive(client: AsyncClient, sessions: int, concurrency: int, roles: int):
+    samples: Dict[str, List[dict]] = {endpoint: [] for endpoint in ENDPOINTS}
+    numbers = iter(range(sessions))
+
+    async def virtual_user():
+        for number in numbers:
+            await _run_session(client, number, roles, samples)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+async def run_benchmark(
+    sessions: int = 200,
+    concurrency: int = 20,
+    roles: int = 5,
+    warmup: int = 10,
+    database_url: Optional[str] = None,
+    stub_settings: Optional[providers.StubSettings] = None,
+    measure_memory: bool = True,
+    reset_database: bool = False,
+) -> dict:
+    """
+    Run the benchmark and return the report as a dictionary.
+
+    The tables of database_url are dropped and recreated, which must be confirmed
+    with reset_database, the default temporary database needs no confirmation.
+    """
+    if database_url is not None and not reset_database:
+        raise ValueError(
+            "The benchmark drops every table of its database, "
+            "pass reset_database to run it on database_url"
+        )
+    stub_settings = stub_settings or providers.StubSettings.from_env()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        url = database_url or f"sqlite+aiosqlite:///{tmpdir}/benchmark.db"
+        async with benchmark_app(url, stub_settings) as client:
+            await _drive(client, warmup, min(concurrency, warmup or 1), roles)
+            samples, elapsed = await _drive(client, sessions, concurrency, roles)
+
+            memory = None
+            if measure_memory:
+                # Separate pass, tracemalloc slows everything down noticeably.
+                tracemalloc.start()
+                baseline, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await _drive(client, concurrency, concurrency, roles)
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                memory = {
+                    "peak_bytes_per_session": (peak - baseline) / concurrency,
+                    "retained_bytes_per_session": (current - baseline) / concurrency,
+                }
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "sessions": sessions,
+            "concurrency": concurrency,
+            "roles": roles,
+            "database": (
+                "sqlite" if database_url is None else database_url.split(":")[0]
+            ),
+            "stub": stub_settings.__dict__,
+            "elapsed_seconds": elapsed,
+        },
+        "endpoints": {
+            endpoint: summarize(samples[endpoint], elapsed) for endpoint in ENDPOINTS
+        },
+        "memory": memory,
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """
+    Return a description of every endpoint metric that regressed past the threshold.
+    """
+    regressions = []
+    for endpoint in ENDPOINTS:
+        current = report["endpoints"][endpoint]
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        p95, previous_p95 = current["latency_ms"]["p95"], previous["latency_ms"]["p95"]
+        if previous_p95 and p95 > previous_p95 * (1 + max_regression):
+            regressions.append(f"{endpoint} p95 {previous_p95:.1f}ms -> {p95:.1f}ms")
+        rps, previous_rps = current["rps"], previous["rps"]
+        if previous_rps and rps < previous_rps * (1 - max_regression):
+            regressions.append(f"{endpoint} rps {previous_rps:.1f} -> {rps:.1f}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--roles", type=int, default=5, help="distinct job descriptions"
+    )
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument(
+        "--reset-database",
+        action="store_true",
+        help="confirm dropping every table of --database-url",
+    )
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--no-memory", action="store_true")
+    args = parser.parse_args(argv)
+    if args.database_url and not args.reset_database:
+        parser.error(
+            "the benchmark drops every table of --database-url, "
+            "pass --reset-database to confirm"
+        )
+
+    report = asyncio.run(
+        run_benchmark(
+            sessions=args.sessions,
+            concurrency=args.concurrency,
+            roles=args.roles,
+            warmup=args.warmup,
+            database_url=args.database_url,
+            measure_memory=not args.no_memory,
+            reset_database=args.reset_database,
+        )
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
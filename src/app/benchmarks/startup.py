@@ -0,0 +1,158 @@
+"""
+Cold-start time and memory of one app worker process:
+
+    python -m app.benchmarks.startup --runs 5 --output startup.json
+
+Every run starts a fresh interpreter, like each uvicorn worker does, which imports
+app.main and runs the app lifespan startup against a local SQLite database (with
+the schema applied beforehand, as in production) and the stub LLM provider. The
+report has, per run and as median and maximum over the runs:
+
+- import_seconds: importing app.main and its dependencies,
+- startup_seconds: the lifespan startup, up to serving the first request,
+- ready_seconds: from spawning the process to ready, interpreter start included,
+- rss_mb: resident memory once ready, i.e. the memory cost of one more worker.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+METRICS = ("import_seconds", "startup_seconds", "ready_seconds", "rss_mb")
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process in MiB, the peak where unavailable.
+    """
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def probe(database_url: str) -> dict:
+    """
+    Import the app and run its lifespan startup, measuring both. Runs in the child.
+    """
+    started = time.perf_counter()
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import app.main as main
+
+    imported = time.perf_counter()
+
+    async def start() -> dict:
+        engine = create_async_engine(database_url)
+        main.engine = main.read_engine = engine
+        main.AsyncSessionLocal = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        lifespan_started = time.perf_counter()
+        async with main.lifespan(main.app):
+            return {
+                "import_seconds": imported - started,
+                "startup_seconds": time.perf_counter() - lifespan_started,
+                "ready_at": time.time(),
+                "rss_mb": rss_mb(),
+            }
+
+    return asyncio.run(start())
+
+
+def run_once(database_url: str) -> dict:
+    env = dict(os.environ, DB_AUTO_CREATE_SCHEMA="false", LLM_PROVIDER="stub")
+    spawned = time.time()
+    output = subprocess.run(
+        [sys.executable, "-m", "app.benchmarks.startup", "--probe", database_url],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    sample = json.loads(output.strip().splitlines()[-1])
+    sample["ready_seconds"] = sample.pop("ready_at") - spawned
+    return sample
+
+
+def summarize(samples: List[dict]) -> dict:
+    return {
+        metric: {
+            "median": statistics.median(sample[metric] for sample in samples),
+            "max": max(sample[metric] for sample in samples),
+        }
+        for metric in METRICS
+    }
+
+
+def run_benchmark(runs: int) -> dict:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.migrations.schema import upgrade
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        url = f"sqlite+aiosqlite:///{tmpdir}/startup.db"
+
+        async def setup() -> None:
+            engine = create_async_engine(url)
+            await upgrade(engine)
+            await engine.dispose()
+
+        asyncio.run(setup())
+        samples = [run_once(url) for _ in range(runs)]
+
+    summary = summarize(samples)
+    workers = os.cpu_count() or 1
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "runs": runs,
+            "cpu_count": workers,
+        },
+        "summary": summary,
+        # One worker per core, the start_backend_prod.sh default.
+        "estimated_rss_mb_all_workers": summary["rss_mb"]["median"] * workers,
+        "runs": samples,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--probe", metavar="DATABASE_URL", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.probe)))
+        return 0
+
+    output = json.dumps(run_benchmark(args.runs), indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,609 @@
+import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import case, delete, func, insert, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import defer
+
+from app import ranking
+from app.models import (
+    AnswerDraft,
+    InterviewEvaluation,
+    InterviewQuestion,
+    InterviewResponse,
+    InterviewSession,
+    job_title_key,
+)
+from app.utils.cache import make_cache_key
+
+# All helpers below leave committing to the caller.
+
+
+def create_session(
+    db: AsyncSession,
+    session_id: str,
+    candidate_id: str,
+    job_description: str,
+    questions: List[str],
+) -> InterviewSession:
+    """
+    Add a new interview session together with its question rows.
+    """
+    session_record = InterviewSession(
+        id=session_id,
+        candidate_id=candidate_id,
+        job_title=job_description,
+    )
+    db.add(session_record)
+    db.add_all(
+        InterviewQuestion(session_id=session_id, position=position, text=question)
+        for position, question in enumerate(questions)
+    )
+    return session_record
+
+
+async def create_sessions(
+    db: AsyncSession, sessions: Sequence[Tuple[str, str, str, List[str]]]
+) -> None:
+    """
+    Insert many (session id, candidate id, job description, questions) sessions
+    with one multi-row insert per table.
+    """
+    if not sessions:
+        return
+    await db.execute(
+        insert(InterviewSession),
+        [
+            {"id": session_id, "candidate_id": candidate_id, "job_title": job}
+            for session_id, candidate_id, job, _ in sessions
+        ],
+    )
+    rows = [
+        {"session_id": session_id, "position": position, "text": question}
+        for session_id, _, _, questions in sessions
+        for position, question in enumerate(questions)
+    ]
+    if rows:
+        await db.execute(insert(InterviewQuestion), rows)
+
+
+async def get_session(db: AsyncSession, session_id: str) -> Optional[InterviewSession]:
+    """
+    Load a session without its legacy session_data blob.
+    """
+    result = await db.execute(
+        select(InterviewSession)
+        .options(defer(InterviewSession.session_data))
+        .where(InterviewSession.id == session_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_submit_state(db: AsyncSession, session_id: str):
+    """
+    Read the columns a submit checks and returns, None for an unknown session.
+
+    The row has the attribute names of InterviewSession.
+    """
+    result = await db.execute(
+        select(
+            InterviewSession.id,
+            InterviewSession.candidate_id,
+            InterviewSession.version,
+            InterviewSession.submission_key,
+            InterviewSession.submitted_at,
+            InterviewSession.feedback,
+            InterviewSession.overall_score,
+        ).where(InterviewSession.id == session_id)
+    )
+    return result.one_or_none()
+
+
+async def get_questions(db: AsyncSession, session_id: str) -> List[str]:
+    """
+    Return the questions of a session in order.
+    """
+    result = await db.execute(
+        select(InterviewQuestion.text)
+        .where(InterviewQuestion.session_id == session_id)
+        .order_by(InterviewQuestion.position)
+    )
+    questions = list(result.scalars())
+    if not questions:
+        # Sessions created before the normalized schema and not migrated yet.
+        session_data = await db.scalar(
+            select(InterviewSession.session_data).where(
+                InterviewSession.id == session_id
+            )
+        )
+        questions = (session_data or {}).get("questions", [])
+    return questions
+
+
+async def get_sessions_with_questions(
+    db: AsyncSession, session_ids: Iterable[str]
+) -> Dict[str, Tuple[InterviewSession, List[str]]]:
+    """
+    Load many sessions and their questions with one query per table.
+
+    Sessions that do not exist are missing from the result.
+    """
+    session_ids = set(session_ids)
+    result = await db.execute(
+        select(InterviewSession)
+        .options(defer(InterviewSession.session_data))
+        .where(InterviewSession.id.in_(session_ids))
+    )
+    loaded = {record.id: (record, []) for record in result.scalars()}
+    result = await db.execute(
+        select(InterviewQuestion.session_id, InterviewQuestion.text)
+        .where(InterviewQuestion.session_id.in_(loaded))
+        .order_by(InterviewQuestion.session_id, InterviewQuestion.position)
+    )
+    for session_id, text in result:
+        loaded[session_id][1].append(text)
+    # Sessions created before the normalized schema and not migrated yet.
+    legacy = [
+        session_id for session_id, (_, questions) in loaded.items() if not questions
+    ]
+    if legacy:
+        result = await db.execute(
+            select(InterviewSession.id, InterviewSession.session_data).where(
+                InterviewSession.id.in_(legacy)
+            )
+        )
+        for session_id, session_data in result:
+            loaded[session_id][1].extend((session_data or {}).get("questions", []))
+    return loaded
+
+
+async def get_evaluations(db: AsyncSession, session_id: str) -> List[dict]:
+    """
+    Return the stored evaluations of a session in question order.
+    """
+    result = await db.execute(
+        select(
+            InterviewQuestion.text,
+            InterviewResponse.text,
+            InterviewEvaluation.score,
+            InterviewEvaluation.comment,
+        )
+        .join(
+            InterviewQuestion,
+            (InterviewQuestion.session_id == InterviewEvaluation.session_id)
+            & (InterviewQuestion.position == InterviewEvaluation.position),
+        )
+        .join(
+            InterviewResponse,
+            (InterviewResponse.session_id == InterviewEvaluation.session_id)
+            & (InterviewResponse.position == InterviewEvaluation.position),
+        )
+        .where(InterviewEvaluation.session_id == session_id)
+        .order_by(InterviewEvaluation.position)
+    )
+    return [
+        {"question": question, "response": response, "score": score, "comment": comment}
+        for question, response, score, comment in result
+    ]
+
+
+def submission_key(
+    session_id: str, responses: List[str], idempotency_key: Optional[str] = None
+) -> str:
+    """
+    Key identifying a submit: the client's idempotency key if it sent one,
+    otherwise the submitted responses, so an identical retry is a duplicate.
+    """
+    if idempotency_key:
+        return make_cache_key("idempotency-key", session_id, idempotency_key)
+    return make_cache_key("responses", session_id, responses)
+
+
+async def claim_submission(
+    db: AsyncSession, session_id: str, key: str, expected_version: int
+) -> bool:
+    """
+    Start a new submit of a session unless another one started since expected_version
+    was read. Clears the previous result, removing it from the score sketches (see
+    app.ranking), and locks the session row until commit.
+
+    Returns False when the session was changed concurrently. A claimed submit stores
+    its result with save_result(..., version=expected_version + 1).
+    """
+    return session_id in await claim_submissions(
+        db, [(session_id, key, expected_version)]
+    )
+
+
+async def claim_submissions(
+    db: AsyncSession, claims: Sequence[Tuple[str, str, int]]
+) -> Set[str]:
+    """
+    Like claim_submission for many (session id, key, expected version) claims, with
+    one query per step. Returns the ids of the sessions claimed.
+    """
+    if not claims:
+        return set()
+    expected = tuple_(InterviewSession.id, InterviewSession.version).in_(
+        [(session_id, version) for session_id, _, version in claims]
+    )
+    locked = list(
+        await db.scalars(select(InterviewSession.id).where(expected).with_for_update())
+    )
+    if not locked:
+        return set()
+    await ranking.remove_submissions(db, locked)
+    keys = {session_id: key for session_id, key, _ in claims}
+    result = await db.execute(
+        update(InterviewSession)
+        .where(expected)
+        .values(
+            version=InterviewSession.version + 1,
+            submission_key=case(keys, value=InterviewSession.id),
+            feedback=None,
+            overall_score=None,
+            submitted_at=None,
+        )
+        .returning(InterviewSession.id)
+        .execution_options(synchronize_session=False)
+    )
+    return set(result.scalars())
+
+
+async def save_responses(
+    db: AsyncSession, session_id: str, responses: List[str]
+) -> None:
+    """
+    Replace the responses of a session and drop the evaluations of earlier submits
+    and the answers sent ahead of this one.
+    """
+    await db.execute(delete(AnswerDraft).where(AnswerDraft.session_id == session_id))
+    await db.execute(
+        delete(InterviewEvaluation).where(InterviewEvaluation.session_id == session_id)
+    )
+    await db.execute(
+        delete(InterviewResponse).where(InterviewResponse.session_id == session_id)
+    )
+    if responses:
+        await db.execute(
+            insert(InterviewResponse),
+            [
+                {"session_id": session_id, "position": position, "text": response}
+                for position, response in enumerate(responses)
+            ],
+        )
+
+
+async def save_evaluations(
+    db: AsyncSession, session_id: str, evaluations: Iterable[Tuple[int, dict]]
+) -> None:
+    """
+    Bulk insert (question position, evaluation dictionary) pairs.
+    """
+    rows = [
+        {
+            "session_id": session_id,
+            "position": position,
+            "score": evaluation["score"],
+            "comment": evaluation["comment"],
+        }
+        for position, evaluation in evaluations
+    ]
+    if rows:
+        await db.execute(insert(InterviewEvaluation), rows)
+
+
+async def save_answer(
+    db: AsyncSession, session_id: str, position: int, response: str
+) -> None:
+    """
+    Store an answer sent ahead of the submit, replacing the previous answer to the
+    same question and its evaluation.
+    """
+    await db.execute(
+        delete(AnswerDraft).where(
+            AnswerDraft.session_id == session_id, AnswerDraft.position == position
+        )
+    )
+    await db.execute(
+        insert(AnswerDraft).values(
+            session_id=session_id, position=position, response=response
+        )
+    )
+
+
+async def save_answer_evaluation(
+    db: AsyncSession,
+    session_id: str,
+    position: int,
+    response: str,
+    score: int,
+    comment: str,
+) -> bool:
+    """
+    Store the evaluation of an answer unless the answer was replaced or submitted
+    since, in which case False is returned.
+    """
+    result = await db.execute(
+        update(AnswerDraft)
+        .where(
+            AnswerDraft.session_id == session_id,
+            AnswerDraft.position == position,
+            AnswerDraft.response == response,
+        )
+        .values(score=score, comment=comment, evaluated_at=datetime.datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+
+async def get_answer_evaluations(
+    db: AsyncSession, session_id: str
+) -> Dict[int, Tuple[str, int, str]]:
+    """
+    (response, score, comment) of the evaluated answers sent ahead of the submit,
+    by question position.
+    """
+    result = await db.execute(
+        select(
+            AnswerDraft.position,
+            AnswerDraft.response,
+            AnswerDraft.score,
+            AnswerDraft.comment,
+        ).where(AnswerDraft.session_id == session_id, AnswerDraft.score.is_not(None))
+    )
+    return {
+        position: (response, score, comment)
+        for position, response, score, comment in result
+    }
+
+
+async def save_result(
+    db: AsyncSession,
+    session_id: str,
+    feedback: str,
+    overall_score: float,
+    version: Optional[int] = None,
+) -> bool:
+    """
+    Record the overall feedback and score of a submitted session, and count its
+    scores in the cohort sketches (see app.ranking). Every submit path stores its
+    result here, once its evaluations are stored.
+
+    With version nothing is written, and False returned, when another submit claimed
+    the session since it was claimed at that version.
+    """
+    query = update(InterviewSession).where(InterviewSession.id == session_id)
+    if version is not None:
+        query = query.where(InterviewSession.version == version)
+    result = await db.execute(
+        query.values(
+            feedback=feedback,
+            overall_score=overall_score,
+            submitted_at=datetime.datetime.utcnow(),
+        )
+    )
+    if result.rowcount != 1:
+        return False
+    await ranking.record_submissions(db, [session_id])
+    return True
+
+
+async def save_results(
+    db: AsyncSession, results: Sequence[Tuple[str, str, float, int]]
+) -> Set[str]:
+    """
+    Like save_result for many (session id, feedback, overall score, version) results,
+    with one update. Returns the ids of the sessions whose result was stored.
+    """
+    if not results:
+        return set()
+    feedback = {session_id: text for session_id, text, _, _ in results}
+    overall_scores = {session_id: score for session_id, _, score, _ in results}
+    result = await db.execute(
+        update(InterviewSession)
+        .where(
+            tuple_(InterviewSession.id, InterviewSession.version).in_(
+                [(session_id, version) for session_id, _, _, version in results]
+            )
+        )
+        .values(
+            feedback=case(feedback, value=InterviewSession.id),
+            overall_score=case(overall_scores, value=InterviewSession.id),
+            submitted_at=datetime.datetime.utcnow(),
+        )
+        .returning(InterviewSession.id)
+        .execution_options(synchronize_session=False)
+    )
+    saved = set(result.scalars())
+    await ranking.record_submissions(db, list(saved))
+    return saved
+
+
+async def save_submission(
+    db: AsyncSession,
+    session_id: str,
+    responses: List[str],
+    evaluations: List[dict],
+    feedback: str,
+    overall_score: float,
+    key: Optional[str] = None,
+    expected_version: Optional[int] = None,
+) -> bool:
+    """
+    Store the responses, evaluations and feedback of a submit, and count its scores
+    in the cohort sketches (see app.ranking).
+
+    With expected_version nothing is written, and False returned, when the session
+    was submitted concurrently since that version was read (see claim_submission).
+    """
+    if expected_version is None:
+        await ranking.remove_submissions(db, [session_id])
+    elif not await claim_submission(db, session_id, key, expected_version):
+        return False
+    await save_responses(db, session_id, responses)
+    await save_evaluations(db, session_id, enumerate(evaluations))
+    await save_result(db, session_id, feedback, overall_score)
+    return True
+
+
+async def save_submissions(db: AsyncSession, submissions: List[dict]) -> Set[str]:
+    """
+    Store many submits with multi-row inserts, see save_submission.
+
+    Every submission is a dictionary with the save_submission arguments. Returns
+    the ids of the sessions that were saved, the others were changed concurrently.
+    """
+    saved = await claim_submissions(
+        db,
+        [
+            (item["session_id"], item["key"], item["expected_version"])
+            for item in submissions
+        ],
+    )
+    submissions = [item for item in submissions if item["session_id"] in saved]
+    if not submissions:
+        return saved
+
+    await db.execute(delete(AnswerDraft).where(AnswerDraft.session_id.in_(saved)))
+    await db.execute(
+        delete(InterviewEvaluation).where(InterviewEvaluation.session_id.in_(saved))
+    )
+    await db.execute(
+        delete(InterviewResponse).where(InterviewResponse.session_id.in_(saved))
+    )
+    responses = [
+        {"session_id": item["session_id"], "position": position, "text": response}
+        for item in submissions
+        for position, response in enumerate(item["responses"])
+    ]
+    if responses:
+        await db.execute(insert(InterviewResponse), responses)
+    evaluations = [
+        {
+            "session_id": item["session_id"],
+            "position": position,
+            "score": evaluation["score"],
+            "comment": evaluation["comment"],
+        }
+        for item in submissions
+        for position, evaluation in enumerate(item["evaluations"])
+    ]
+    if evaluations:
+        await db.execute(insert(InterviewEvaluation), evaluations)
+    await save_results(
+        db,
+        [
+            (
+                item["session_id"],
+                item["feedback"],
+                item["overall_score"],
+                item["expected_version"] + 1,
+            )
+            for item in submissions
+        ],
+    )
+    return saved
+
+
+# Score ranges of the per-job distributions, overall scores are between 1 and 5.
+SCORE_BUCKETS = ((1, 2), (2, 3), (3, 4), (4, 5))
+
+
+def _session_filters(
+    session_id: Optional[str] = None,
+    candidate_id: Optional[str] = None,
+    job_title: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+) -> list:
+    filters = []
+    if session_id is not None:
+        filters.append(InterviewSession.id == session_id)
+    if candidate_id is not None:
+        filters.append(InterviewSession.candidate_id == candidate_id)
+    if job_title is not None:
+        filters.append(InterviewSession.job_key == job_title_key(job_title))
+    if since is not None:
+        filters.append(InterviewSession.timestamp >= since)
+    if until is not None:
+        filters.append(InterviewSession.timestamp < until)
+    return filters
+
+
+async def list_sessions(
+    db: AsyncSession,
+    fields: Sequence[str],
+    limit: int,
+    after: Optional[Tuple[datetime.datetime, str]] = None,
+    **filters,
+) -> List[dict]:
+    """
+    Return up to limit sessions, newest first, as dictionaries of the given fields.
+
+    Only the requested columns are selected. Pages are keyset paginated: after is
+    the (timestamp, id) of the last session of the previous page, so every page is
+    an index range scan however deep it is.
+    """
+    columns = [InterviewSession.__table__.c[name] for name in fields]
+    query = select(*columns).where(*_session_filters(**filters))
+    if after is not None:
+        query = query.where(
+            tuple_(InterviewSession.timestamp, InterviewSession.id) < tuple_(*after)
+        )
+    result = await db.execute(
+        query.order_by(
+            InterviewSession.timestamp.desc(), InterviewSession.id.desc()
+        ).limit(limit)
+    )
+    return [dict(row._mapping) for row in result]
+
+
+async def score_stats(
+    db: AsyncSession, limit: int, min_sessions: int = 1, **filters
+) -> List[dict]:
+    """
+    Session counts and overall score statistics per job title, largest jobs first.
+
+    Everything, the score distribution included, is aggregated by the database in
+    a single grouped scan.
+    """
+    score = InterviewSession.overall_score
+    buckets = []
+    for low, high in SCORE_BUCKETS:
+        # The last range includes its upper bound.
+        below = score <= high if high == SCORE_BUCKETS[-1][1] else score < high
+        buckets.append(func.count(case(((score >= low) & below, 1))))
+    sessions = func.count(InterviewSession.id)
+    result = await db.execute(
+        select(
+            InterviewSession.job_title,
+            sessions,
+            func.count(score),
+            func.avg(score),
+            func.min(score),
+            func.max(score),
+            *buckets,
+        )
+        .where(*_session_filters(**filters))
+        # Grouped on the indexed digest, job_title is the same within a group.
+        .group_by(InterviewSession.job_key, InterviewSession.job_title)
+        .having(sessions >= min_sessions)
+        .order_by(sessions.desc(), InterviewSession.job_title)
+        .limit(limit)
+    )
+    return [
+        {
+            "job_title": job_title,
+            "sessions": count,
+            "scored": scored,
+            "avg_score": float(avg) if avg is not None else None,
+            "min_score": min_score,
+            "max_score": max_score,
+            "distribution": {
+                f"{low}-{high}": bucket_count
+                for (low, high), bucket_count in zip(SCORE_BUCKETS, bucket_counts)
+            },
+        }
+        for job_title, count, scored, avg, min_score, max_score, *bucket_counts in result
+    ]
@@ -1,7 +1,15 @@
 import os
+import time
+from dataclasses import dataclass
 
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.utils import metrics
 
 POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
@@ -9,15 +17,297 @@ POSTGRES_DB = os.getenv("POSTGRES_DB", "interview_system")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "interview_admin")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "strongpassword123")
 
+# Optional streaming replica serving reads that tolerate replication lag.
+POSTGRES_READ_HOST = os.getenv("POSTGRES_READ_HOST")
+POSTGRES_READ_PORT = os.getenv("POSTGRES_READ_PORT", POSTGRES_PORT)
+
 DATABASE_URL_SQLALCHEMY = (
     f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
     f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
+DATABASE_READ_URL_SQLALCHEMY = (
+    f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
+    f"@{POSTGRES_READ_HOST}:{POSTGRES_READ_PORT}/{POSTGRES_DB}"
+    if POSTGRES_READ_HOST
+    else None
+)
+
+
+@dataclass(frozen=True)
+class EngineSettings:
+    echo: bool
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_pre_ping: bool
+    pool_recycle: int
+    statement_cache_size: int
+    statement_timeout_ms: int
+
+
+# Defaults per DB_PROFILE, every value can be overridden with its DB_* variable.
+PROFILES = {
+    "dev": EngineSettings(
+        echo=True,
+        pool_size=5,
+        max_overflow=5,
+        pool_timeout=30,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        statement_cache_size=100,
+        statement_timeout_ms=0,
+    ),
+    "prod": EngineSettings(
+        echo=False,
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=10,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        statement_cache_size=500,
+        statement_timeout_ms=30000,
+    ),
+}
+
+
+def get_engine_settings() -> EngineSettings:
+    """
+    Read the engine settings for DB_PROFILE ("dev" or "prod") from the environment.
+    """
+    profile = os.getenv("DB_PROFILE", "dev")
+    if profile not in PROFILES:
+        raise ValueError(
+            f"Unknown DB_PROFILE {profile!r}, expected one of {', '.join(PROFILES)}"
+        )
+    defaults = PROFILES[profile]
+    return EngineSettings(
+        echo=os.getenv("DB_ECHO", str(defaults.echo)).lower() == "true",
+        pool_size=int(os.getenv("DB_POOL_SIZE", defaults.pool_size)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", defaults.max_overflow)),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", defaults.pool_timeout)),
+        pool_pre_ping=os.getenv("DB_POOL_PRE_PING", str(defaults.pool_pre_ping)).lower()
+        == "true",
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE_SECONDS", defaults.pool_recycle)),
+        statement_cache_size=int(
+            os.getenv("DB_STATEMENT_CACHE_SIZE", defaults.statement_cache_size)
+        ),
+        statement_timeout_ms=int(
+            os.getenv("DB_STATEMENT_TIMEOUT_MS", defaults.statement_timeout_ms)
+        ),
+    )
+
+
+class PoolMetrics:
+    """
+    Counters describing how long requests wait to check out a pooled connection,
+    also exported as the db_pool_* metrics of app.utils.metrics labelled by name.
+
+    capacity is the configured pool_size + max_overflow.
+    """
+
+    def __init__(self, name: str = "primary", capacity: int = 0):
+        self.name = name
+        self.capacity = capacity
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        metrics.DB_POOL_CHECKOUT_WAIT.observe(wait_seconds, pool=self.name)
+
+    def record_timeout(self) -> None:
+        self.timeouts += 1
+        metrics.DB_POOL_TIMEOUTS.inc(pool=self.name)
+
+    def saturation(self, checked_out: int) -> float:
+        return checked_out / self.capacity if self.capacity else 0.0
+
+    def update(self, pool) -> None:
+        """
+        Set the gauges of the pool from its public counters.
+        """
+        checked_out = pool.checkedout()
+        metrics.DB_POOL_CHECKED_OUT.set(checked_out, pool=self.name)
+        metrics.DB_POOL_OVERFLOW.set(pool.overflow(), pool=self.name)
+        metrics.DB_POOL_SATURATION.set(self.saturation(checked_out), pool=self.name)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool recording checkout wait times in PoolMetrics.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        self.metrics.update(self)
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self.metrics.update(self)
+
 
-engine = create_async_engine(DATABASE_URL_SQLALCHEMY, echo=True)
+def create_engine_from_settings(
+    url: str, settings: EngineSettings, name: str = "primary"
+):
+    """
+    Create the async engine for url with the given pool and asyncpg settings.
+
+    name labels the pool metrics of the engine.
+    """
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        connect_args = {
+            # asyncpg's own prepared statement cache and SQLAlchemy's adapter cache.
+            "statement_cache_size": settings.statement_cache_size,
+            "prepared_statement_cache_size": settings.statement_cache_size,
+            "server_settings": {
+                "statement_timeout": str(settings.statement_timeout_ms),
+                "application_name": "ai-interview-system",
+            },
+        }
+    engine = create_async_engine(
+        url,
+        echo=settings.echo,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_pre_ping=settings.pool_pre_ping,
+        pool_recycle=settings.pool_recycle,
+        connect_args=connect_args,
+    )
+    engine.sync_engine.pool.metrics = PoolMetrics(
+        name, settings.pool_size + settings.max_overflow
+    )
+    return engine
+
+
+def pool_stats(engine) -> dict:
+    """
+    Pool utilisation and checkout wait statistics of an engine.
+    """
+    pool = engine.sync_engine.pool
+    stats = {"status": pool.status()}
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        pool_metrics = pool.metrics
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "saturation": pool_metrics.saturation(pool.checkedout()),
+                "checkouts": pool_metrics.checkouts,
+                "timeouts": pool_metrics.timeouts,
+                "avg_wait_ms": (
+                    pool_metrics.total_wait_seconds / pool_metrics.checkouts * 1000
+                    if pool_metrics.checkouts
+                    else 0.0
+                ),
+                "max_wait_ms": pool_metrics.max_wait_seconds * 1000,
+            }
+        )
+    return stats
+
+
+def _is_write(clause) -> bool:
+    return isinstance(clause, UpdateBase) or (
+        isinstance(clause, Select) and clause._for_update_arg is not None
+    )
+
+
+class RoutingSession(Session):
+    """
+    Session sending reads to read_engine and writes to write_engine.
+
+    Flushes, INSERT, UPDATE, DELETE and SELECT ... FOR UPDATE go to the primary.
+    After its first write the session sticks to the primary, so it reads its own
+    writes rather than a lagging replica.
+    """
+
+    def __init__(self, *args, write_engine, read_engine, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_engine = write_engine
+        self.read_engine = read_engine
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self.info.get("wrote") and (self._flushing or _is_write(clause)):
+            self.info["wrote"] = True
+        if self.info.get("wrote"):
+            return self.write_engine.sync_engine
+        return self.read_engine.sync_engine
+
+
+def routing_session_factory(write_engine, read_engine) -> sessionmaker:
+    return sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        write_engine=write_engine,
+        read_engine=read_engine,
+        expire_on_commit=False,
+    )
+
+
+engine_settings = get_engine_settings()
+engine = create_engine_from_settings(DATABASE_URL_SQLALCHEMY, engine_settings)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# The replica, or the primary itself when POSTGRES_READ_HOST is not set.
+read_engine = (
+    create_engine_from_settings(
+        DATABASE_READ_URL_SQLALCHEMY, engine_settings, name="replica"
+    )
+    if DATABASE_READ_URL_SQLALCHEMY
+    else engine
+)
+AsyncReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
+# For mixed traffic such as the admin panel, see RoutingSession.
+AsyncRoutingSessionLocal = routing_session_factory(engine, read_engine)
+
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db():
+    """
+    Dependency for read-only endpoints, e.g. reporting, served by the replica.
+    """
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+def get_session_factory():
+    """
+    Dependency for endpoints that manage their own sessions, e.g. while streaming.
+    """
+    return AsyncSessionLocal
+
+
+def get_read_session_factory():
+    """
+    Like get_session_factory for read-only streaming endpoints, e.g. exports.
+    """
+    return AsyncReadSessionLocal
@@ -0,0 +1,362 @@
+"""
+Streaming export of submitted interview results for the analytics warehouse.
+
+Two kinds of rows can be exported: "sessions", one row per submitted session, and
+"evaluations", one row per evaluated question with its session's fields. Rows are
+read through a server-side cursor in batches of EXPORT_BATCH_SIZE and encoded as
+NDJSON, CSV or Parquet (the latter needs the optional pyarrow package) as they
+arrive, so memory stays constant whatever the size of the export. The legacy
+session_data blob is never read.
+
+Incremental exports select the sessions submitted in [watermark, cutoff), cutoff
+being EXPORT_WATERMARK_LAG_SECONDS ago so submits still being committed are left
+for the next run. The cutoff is the watermark of the next export. A resubmitted
+session is exported again, the warehouse should keep its latest row by
+session_id. The CLI keeps the watermark in a file between runs:
+
+    python -m app.exports evaluations --format parquet --output evaluations.parquet \\
+        --watermark-file evaluations.watermark
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import io
+import logging
+import os
+import sys
+from typing import AsyncIterator, Dict, List, Optional
+
+import orjson
+from sqlalchemy import and_
+from sqlalchemy.future import select
+
+from app.models import (
+    InterviewEvaluation,
+    InterviewQuestion,
+    InterviewResponse,
+    InterviewSession,
+    job_title_key,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+EXPORT_WATERMARK_LAG_SECONDS = float(os.environ.get("EXPORT_WATERMARK_LAG_SECONDS", 60))
+
+SESSION_COLUMNS = (
+    InterviewSession.id.label("session_id"),
+    InterviewSession.candidate_id,
+    InterviewSession.job_title,
+    InterviewSession.timestamp,
+    InterviewSession.submitted_at,
+    InterviewSession.overall_score,
+    InterviewSession.feedback,
+)
+EVALUATION_COLUMNS = SESSION_COLUMNS + (
+    InterviewEvaluation.position,
+    InterviewQuestion.text.label("question"),
+    InterviewResponse.text.label("response"),
+    InterviewEvaluation.score,
+    InterviewEvaluation.comment,
+)
+KINDS = {"sessions": SESSION_COLUMNS, "evaluations": EVALUATION_COLUMNS}
+
+# Media type and file extension per format.
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportError(Exception):
+    """
+    Raised for an export that cannot be produced, e.g. Parquet without pyarrow.
+    """
+
+
+def columns(kind: str) -> List[str]:
+    return [column.key for column in KINDS[kind]]
+
+
+def export_cutoff() -> datetime.datetime:
+    """
+    Upper bound of the submit times to export now, also the next watermark.
+    """
+    return datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=EXPORT_WATERMARK_LAG_SECONDS
+    )
+
+
+def export_query(
+    kind: str,
+    cutoff: datetime.datetime,
+    watermark: Optional[datetime.datetime] = None,
+    job_title: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+):
+    """
+    Rows of the sessions submitted in [watermark, cutoff), optionally restricted to
+    a job title and to sessions started in [since, until), in submit order.
+    """
+    query = select(*KINDS[kind]).where(
+        InterviewSession.submitted_at.is_not(None),
+        InterviewSession.submitted_at < cutoff,
+    )
+    if watermark is not None:
+        query = query.where(InterviewSession.submitted_at >= watermark)
+    if job_title is not None:
+        query = query.where(InterviewSession.job_key == job_title_key(job_title))
+    if since is not None:
+        query = query.where(InterviewSession.timestamp >= since)
+    if until is not None:
+        query = query.where(InterviewSession.timestamp < until)
+    order = [InterviewSession.submitted_at, InterviewSession.id]
+
+    if kind == "evaluations":
+        query = (
+            query.join(
+                InterviewEvaluation,
+                InterviewEvaluation.session_id == InterviewSession.id,
+            )
+            .outerjoin(
+                InterviewQuestion,
+                and_(
+                    InterviewQuestion.session_id == InterviewEvaluation.session_id,
+                    InterviewQuestion.position == InterviewEvaluation.position,
+                ),
+            )
+            .outerjoin(
+                InterviewResponse,
+                and_(
+                    InterviewResponse.session_id == InterviewEvaluation.session_id,
+                    InterviewResponse.position == InterviewEvaluation.position,
+                ),
+            )
+        )
+        order.append(InterviewEvaluation.position)
+    return query.order_by(*order)
+
+
+async def iter_batches(
+    session_factory, query, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[List[Dict]]:
+    """
+    Yield the rows of query as lists of at most batch_size dictionaries.
+
+    The rows are fetched from a server-side cursor, batch_size at a time.
+    """
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+
+def _csv_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+async def encode_ndjson(
+    batches: AsyncIterator[List[Dict]], names: List[str]
+) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(orjson.dumps(row) + b"\n" for row in batch)
+
+
+async def encode_csv(
+    batches: AsyncIterator[List[Dict]], names: List[str]
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    async for batch in batches:
+        writer.writerows([_csv_value(row[name]) for name in names] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file collecting what the Parquet writer wrote since the last drain.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def parquet_schema(kind: str):
+    import pyarrow as pa
+
+    types = {
+        "timestamp": pa.timestamp("us"),
+        "submitted_at": pa.timestamp("us"),
+        "overall_score": pa.float64(),
+        "position": pa.int32(),
+        "score": pa.int32(),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in columns(kind)])
+
+
+def check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ExportError(
+            f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}"
+        )
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportError("Parquet exports need the pyarrow package installed.")
+
+
+async def encode_parquet(
+    batches: AsyncIterator[List[Dict]], kind: str
+) -> AsyncIterator[bytes]:
+    """
+    Write one Parquet row group per batch, yielding the bytes of each one.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema(kind)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        async for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export(
+    session_factory,
+    kind: str,
+    fmt: str,
+    cutoff: datetime.datetime,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    **filters,
+) -> AsyncIterator[bytes]:
+    """
+    Stream the encoded export of kind in the given format, see export_query.
+    """
+    check_format(fmt)
+    batches = iter_batches(
+        session_factory, export_query(kind, cutoff, **filters), batch_size
+    )
+    if fmt == "parquet":
+        return encode_parquet(batches, kind)
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    return encode(batches, columns(kind))
+
+
+def read_watermark(path: str) -> Optional[datetime.datetime]:
+    try:
+        with open(path) as fh:
+            value = fh.read().strip()
+    except FileNotFoundError:
+        return None
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+def write_watermark(path: str, watermark: datetime.datetime) -> None:
+    # Replace the file atomically, a crash must not lose the previous watermark.
+    with open(f"{path}.tmp", "w") as fh:
+        fh.write(watermark.isoformat())
+    os.replace(f"{path}.tmp", path)
+
+
+async def export_to_file(
+    session_factory,
+    kind: str,
+    fmt: str,
+    output,
+    watermark_file: Optional[str] = None,
+    **filters,
+) -> datetime.datetime:
+    """
+    Write an export to the binary file output and return its cutoff.
+
+    With watermark_file the export starts from the watermark it holds, which is
+    advanced to the cutoff once the export is complete.
+    """
+    if watermark_file is not None:
+        filters["watermark"] = read_watermark(watermark_file)
+    cutoff = export_cutoff()
+    async for chunk in export(session_factory, kind, fmt, cutoff, **filters):
+        output.write(chunk)
+    output.flush()
+    if watermark_file is not None:
+        write_watermark(watermark_file, cutoff)
+    return cutoff
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Export submitted interview results as NDJSON, CSV or Parquet."
+    )
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--output", help="defaults to standard output")
+    parser.add_argument("--job-title")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.datetime.fromisoformat)
+    parser.add_argument(
+        "--watermark-file",
+        help="export what was submitted since the watermark in this file, then advance it",
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    from app.database import AsyncReadSessionLocal
+
+    async def run(output) -> datetime.datetime:
+        return await export_to_file(
+            AsyncReadSessionLocal,
+            args.kind,
+            args.format,
+            output,
+            args.watermark_file,
+            batch_size=args.batch_size,
+            job_title=args.job_title,
+            since=args.since,
+            until=args.until,
+        )
+
+    try:
+        if args.output:
+            with open(args.output, "wb") as output:
+                cutoff = asyncio.run(run(output))
+        else:
+            cutoff = asyncio.run(run(sys.stdout.buffer))
+    except ExportError as e:
+        parser.error(str(e))
+    LOGGER.info("Exported %s submitted before %s", args.kind, cutoff.isoformat())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,58 @@
-import logging
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-
-from app.database import engine
-from app.models import Base
-from app.routers import interview
+from fastapi.responses import ORJSONResponse
+
+from app.agents import providers, question_bank
+from app.database import AsyncSessionLocal, engine, read_engine
+from app.migrations.schema import upgrade
+from app.routers import exports, interview, interview_batch, ops, sessions
+from app.utils import metrics, tracing
+from app.utils.log_config import setup_logging, stop_logging
 from app.utils.middleware import add_middleware
+from app.workers import answers as answer_workers
+from app.workers import evaluation as evaluation_workers
+
+# Convenient for development; production runs "python -m app.migrations" once per
+# deploy instead of every worker applying the schema at boot.
+DB_AUTO_CREATE_SCHEMA = (
+    os.environ.get("DB_AUTO_CREATE_SCHEMA", "true").lower() == "true"
+)
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
+tracing.configure()
+for instrumented in {engine, read_engine}:
+    metrics.instrument_engine(instrumented)
+    tracing.instrument_engine(instrumented)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if DB_AUTO_CREATE_SCHEMA:
+        await upgrade(engine)
+    await question_bank.bank.load(AsyncSessionLocal)
+    providers.init_provider()
+    await evaluation_workers.start_pool(AsyncSessionLocal)
     yield
-    # Add shutdown logic if necessary.
+    # In-flight requests have drained by now, let running jobs finish too.
+    await evaluation_workers.stop_pool()
+    await answer_workers.stop()
+    await providers.close_provider()
+    for instrumented in {engine, read_engine}:
+        await instrumented.dispose()
+    stop_logging()
 
 
-app = FastAPI(title="AI-Driven Interview System", lifespan=lifespan)
+app = FastAPI(
+    title="AI-Driven Interview System",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.include_router(interview.router)
+app.include_router(interview_batch.router)
+app.include_router(sessions.router)
+app.include_router(exports.router)
+app.include_router(ops.router)
 add_middleware(app)
@@ -0,0 +1,3 @@
+from app.migrations.schema import main
+
+main()
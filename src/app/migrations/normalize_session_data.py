@@ -0,0 +1,143 @@
+"""
+Migrate interview sessions from the legacy session_data blob to the normalized
+interview_questions, interview_responses and interview_evaluations tables:
+
+    python -m app.migrations.normalize_session_data [--batch-size 500] [--clear-blobs]
+
+Adds the new columns and indexes to an existing interview_sessions table, creates
+the new tables, then copies the questions, responses, evaluations and result of
+every session without question rows in batches of bulk inserts. It is safe to run
+again, already migrated sessions are skipped.
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import exists, insert, update
+from sqlalchemy.future import select
+
+from app.migrations.schema import upgrade
+from app.models import (
+    InterviewEvaluation,
+    InterviewQuestion,
+    InterviewResponse,
+    InterviewSession,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+async def backfill(session_factory, batch_size: int = 500, clear_blobs: bool = False):
+    """
+    Copy legacy session_data blobs into the normalized tables.
+
+    Returns the number of migrated sessions.
+    """
+    migrated = 0
+    last_id = ""
+    while True:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(
+                    InterviewSession.id,
+                    InterviewSession.timestamp,
+                    InterviewSession.session_data,
+                )
+                .where(
+                    InterviewSession.id > last_id,
+                    InterviewSession.session_data.is_not(None),
+                    ~exists().where(
+                        InterviewQuestion.session_id == InterviewSession.id
+                    ),
+                )
+                .order_by(InterviewSession.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            questions, responses, evaluations, results = [], [], [], []
+            for row in rows:
+                data = row.session_data or {}
+                questions.extend(
+                    {"session_id": row.id, "position": position, "text": question}
+                    for position, question in enumerate(data.get("questions", []))
+                )
+                responses.extend(
+                    {"session_id": row.id, "position": position, "text": response}
+                    for position, response in enumerate(data.get("responses", []))
+                )
+                evaluations.extend(
+                    {
+                        "session_id": row.id,
+                        "position": position,
+                        "score": evaluation["score"],
+                        "comment": evaluation.get("comment"),
+                    }
+                    for position, evaluation in enumerate(data.get("evaluations", []))
+                )
+                if data.get("overall_score") is not None:
+                    results.append(
+                        {
+                            "id": row.id,
+                            "feedback": data.get("feedback"),
+                            "overall_score": data["overall_score"],
+                            "submitted_at": row.timestamp,
+                        }
+                    )
+
+            for model, values in (
+                (InterviewQuestion, questions),
+                (InterviewResponse, responses),
+                (InterviewEvaluation, evaluations),
+            ):
+                if values:
+                    await db.execute(insert(model), values)
+            if results:
+                await db.execute(update(InterviewSession), results)
+            if clear_blobs:
+                await db.execute(
+                    update(InterviewSession)
+                    .where(InterviewSession.id.in_([row.id for row in rows]))
+                    .values(session_data=None)
+                )
+            await db.commit()
+
+        migrated += len(rows)
+        last_id = rows[-1].id
+        LOGGER.info("Migrated %d sessions", migrated)
+    return migrated
+
+
+async def migrate(
+    engine=None, session_factory=None, batch_size: int = 500, clear_blobs: bool = False
+) -> int:
+    if engine is None:
+        from app.database import AsyncSessionLocal, engine
+
+        session_factory = AsyncSessionLocal
+    await upgrade(engine)
+    return await backfill(session_factory, batch_size, clear_blobs)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--clear-blobs",
+        action="store_true",
+        help="set session_data to NULL once a session has been migrated",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    migrated = asyncio.run(
+        migrate(batch_size=args.batch_size, clear_blobs=args.clear_blobs)
+    )
+    LOGGER.info("Done, %d sessions migrated", migrated)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+One-shot schema setup, run once per deploy before starting the app servers:
+
+    python -m app.migrations
+
+Creates missing tables, columns and indexes, fills the job_key digests of
+existing sessions and drops indexes that were replaced. On
+PostgreSQL the step holds a transaction-level advisory lock, so concurrent runs,
+e.g. several replicas started with DB_AUTO_CREATE_SCHEMA=true, apply it one at a
+time instead of racing on the DDL.
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import bindparam, inspect, select, text, update
+
+from app.models import (
+    Base,
+    EvaluationJob,
+    InterviewEvaluation,
+    InterviewSession,
+    job_title_key,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Arbitrary key of the advisory lock held while the schema is upgraded.
+SCHEMA_LOCK_ID = 72031
+
+# Columns added to tables that may predate them.
+NEW_COLUMNS = {
+    InterviewSession.__table__: (
+        "feedback",
+        "overall_score",
+        "submitted_at",
+        "submission_key",
+        "version",
+        "job_key",
+    ),
+    EvaluationJob.__table__: ("idempotency_key",),
+}
+
+# Indexes of older tables that were replaced. Indexes on job_title may not even be
+# buildable on PostgreSQL, whose btree entries are limited to about 2.7 kB.
+OBSOLETE_INDEXES = {
+    InterviewSession.__table__: (
+        "ix_interview_sessions_job_title",
+        "ix_interview_sessions_job_title_timestamp_id",
+        "ix_interview_sessions_job_title_score",
+    ),
+}
+
+# Rows whose job_key is filled per statement by upgrade_schema.
+JOB_KEY_BATCH_SIZE = 1000
+
+# NOT NULL columns of older tables that are now nullable.
+NULLABLE_COLUMNS = {
+    InterviewEvaluation.__table__: ("score",),
+}
+
+
+def backfill_job_keys(sync_conn, batch_size: int = JOB_KEY_BATCH_SIZE) -> int:
+    """
+    Fill the job_key of the sessions that predate it, returns their number.
+    """
+    table = InterviewSession.__table__
+    pending = (
+        select(table.c.id, table.c.job_title)
+        .where(table.c.job_key.is_(None), table.c.job_title.is_not(None))
+        .limit(batch_size)
+    )
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("session_id"))
+        .values(job_key=bindparam("key"))
+    )
+    filled = 0
+    while True:
+        rows = sync_conn.execute(pending).all()
+        if not rows:
+            return filled
+        sync_conn.execute(
+            statement,
+            [
+                {"session_id": session_id, "key": job_title_key(job_title)}
+                for session_id, job_title in rows
+            ],
+        )
+        filled += len(rows)
+        LOGGER.info("Filled the job_key of %d sessions", filled)
+
+
+def upgrade_schema(sync_conn) -> None:
+    """
+    Create missing tables, columns and indexes without touching existing data, fill
+    the job_key of existing sessions, drop OBSOLETE_INDEXES and the NOT NULL
+    constraint of NULLABLE_COLUMNS.
+    """
+    Base.metadata.create_all(sync_conn)
+
+    inspector = inspect(sync_conn)
+    for table, new_columns in NEW_COLUMNS.items():
+        existing_columns = {
+            column["name"] for column in inspector.get_columns(table.name)
+        }
+        for name in new_columns:
+            if name not in existing_columns:
+                column = table.c[name]
+                ddl = f"{name} {column.type.compile(dialect=sync_conn.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                LOGGER.info("Adding column %s.%s", table.name, name)
+                sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+        existing_indexes = {
+            index["name"] for index in inspector.get_indexes(table.name)
+        }
+        for name in OBSOLETE_INDEXES.get(table, ()):
+            if name in existing_indexes:
+                LOGGER.info("Dropping index %s", name)
+                sync_conn.execute(text(f"DROP INDEX {name}"))
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                LOGGER.info("Creating index %s", index.name)
+                index.create(sync_conn)
+
+    backfill_job_keys(sync_conn)
+
+    for table, nullable_columns in NULLABLE_COLUMNS.items():
+        for column in inspector.get_columns(table.name):
+            name = column["name"]
+            if name not in nullable_columns or column["nullable"]:
+                continue
+            if sync_conn.dialect.name == "sqlite":
+                # SQLite cannot alter a column, the table has to be recreated.
+                LOGGER.warning("Column %s.%s is still NOT NULL", table.name, name)
+                continue
+            LOGGER.info("Making column %s.%s nullable", table.name, name)
+            sync_conn.execute(
+                text(f"ALTER TABLE {table.name} ALTER COLUMN {name} DROP NOT NULL")
+            )
+
+
+async def upgrade(engine) -> None:
+    """
+    Apply upgrade_schema in one transaction, serialized across processes.
+    """
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_ID}
+            )
+        await conn.run_sync(upgrade_schema)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from app.database import engine
+
+    async def run() -> None:
+        await upgrade(engine)
+        await engine.dispose()
+
+    asyncio.run(run())
+    LOGGER.info("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
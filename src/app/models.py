@@ -1,17 +1,222 @@
 import datetime
+import hashlib
+from typing import Optional
 
-from sqlalchemy import JSON, Column, DateTime, String
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    false,
+)
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
 
+def job_title_key(job_title: Optional[str]) -> Optional[str]:
+    """
+    Fixed-size digest of a job title, which holds a whole job description and may
+    be too long for a btree index entry.
+    """
+    if job_title is None:
+        return None
+    return hashlib.sha256(job_title.encode("utf-8")).hexdigest()
+
+
+def _default_job_key(context) -> Optional[str]:
+    return job_title_key(context.get_current_parameters().get("job_title"))
+
+
 class InterviewSession(Base):
     __tablename__ = "interview_sessions"
 
     id = Column(String, primary_key=True, index=True)
     candidate_id = Column(String, index=True)
     job_title = Column(String)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
-    session_data = Column(MutableDict.as_mutable(JSON))
+    # Indexed and filtered on in place of job_title, see job_title_key.
+    job_key = Column(String(64), index=True, default=_default_job_key)
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    # Legacy blob holding questions, responses and evaluations. New sessions store
+    # them in the tables below, see app.migrations.normalize_session_data.
+    session_data = Column(MutableDict.as_mutable(JSON), nullable=True)
+    feedback = Column(String, nullable=True)
+    overall_score = Column(Float, nullable=True, index=True)
+    submitted_at = Column(DateTime, nullable=True)
+    # Identifies the submit the stored result belongs to, see crud.submission_key.
+    submission_key = Column(String, nullable=True)
+    # Bumped by every submit, writes are conditional on the version read earlier.
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Keyset pagination of the session listing, newest first, see app.routers.sessions.
+        Index("ix_interview_sessions_timestamp_id", "timestamp", "id"),
+        Index(
+            "ix_interview_sessions_candidate_timestamp_id",
+            "candidate_id",
+            "timestamp",
+            "id",
+        ),
+        Index(
+            "ix_interview_sessions_job_key_timestamp_id",
+            "job_key",
+            "timestamp",
+            "id",
+        ),
+        # Covers the per-job score aggregates.
+        Index("ix_interview_sessions_job_key_score", "job_key", "overall_score"),
+        # Incremental exports of submitted results, see app.exports.
+        Index("ix_interview_sessions_submitted_at_id", "submitted_at", "id"),
+    )
+
+
+class InterviewQuestion(Base):
+    __tablename__ = "interview_questions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(
+        String, ForeignKey("interview_sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    position = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_interview_questions_session_position",
+            "session_id",
+            "position",
+            unique=True,
+        ),
+    )
+
+
+class InterviewResponse(Base):
+    __tablename__ = "interview_responses"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(
+        String, ForeignKey("interview_sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    position = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "ix_interview_responses_session_position",
+            "session_id",
+            "position",
+            unique=True,
+        ),
+    )
+
+
+class InterviewEvaluation(Base):
+    __tablename__ = "interview_evaluations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(
+        String, ForeignKey("interview_sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    position = Column(Integer, nullable=False)
+    # None when the answer could not be evaluated.
+    score = Column(Integer, nullable=True, index=True)
+    comment = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "ix_interview_evaluations_session_position",
+            "session_id",
+            "position",
+            unique=True,
+        ),
+    )
+
+
+class CacheEntry(Base):
+    __tablename__ = "cache_entries"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(JSON)
+    expires_at = Column(DateTime, nullable=True, index=True)
+
+
+class EvaluationJob(Base):
+    __tablename__ = "evaluation_jobs"
+
+    id = Column(String, primary_key=True)
+    session_id = Column(String, ForeignKey("interview_sessions.id"), index=True)
+    # queued -> running -> done | failed
+    status = Column(String, default="queued", index=True)
+    responses = Column(JSON)
+    idempotency_key = Column(String, nullable=True, index=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, default=0)
+    available_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(
+        DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
+    )
+
+
+class BankedQuestion(Base):
+    __tablename__ = "question_bank"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_description = Column(Text, nullable=False)
+    position = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    # Only approved questions are served, see app.agents.question_bank.
+    approved = Column(
+        Boolean, nullable=False, default=False, server_default=false(), index=True
+    )
+    # "generated" when imported from past sessions, "manual" when written by hand.
+    source = Column(String, nullable=False, default="generated")
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class ScoreSketchBin(Base):
+    __tablename__ = "score_sketch_bins"
+
+    # "job" sketches count overall scores per job title, "question" sketches the
+    # answer scores per question text, see app.ranking.
+    scope = Column(String, primary_key=True)
+    # Digest of the job title or normalized question text.
+    key = Column(String, primary_key=True)
+    bin = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class AnswerDraft(Base):
+    __tablename__ = "answer_drafts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(
+        String, ForeignKey("interview_sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    position = Column(Integer, nullable=False)
+    response = Column(Text, nullable=False)
+    # Set by the background evaluation started by POST /interview/answer.
+    score = Column(Integer, nullable=True)
+    comment = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    evaluated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_answer_drafts_session_position",
+            "session_id",
+            "position",
+            unique=True,
+        ),
+    )
@@ -0,0 +1,337 @@
+"""
+Percentile of a candidate within the cohort of the same job, and of every answer
+among the answers to the same question.
+
+Scores are between SCORE_MIN and SCORE_MAX, so a score distribution is kept as a
+fixed histogram of SKETCH_BINS bins of SCORE_RESOLUTION: merging two sketches adds
+their counts, and once the cumulative counts are computed a percentile is a single
+array read. Sketches are stored as one score_sketch_bins row per non-empty bin:
+
+- "job" sketches hold the overall scores of the sessions of one job title,
+- "question" sketches the scores of the answers to one question text.
+
+Every submit, streamed or not, adds its scores to the sketches in the transaction
+that stores its result, and a resubmit removes those of the stored result it
+clears. Sketches read for lookups are cached for RANKING_CACHE_TTL_SECONDS. The
+sketches of existing sessions are computed, or recomputed from scratch, with:
+
+    python -m app.ranking
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.agents.question_bank import strip_numbering
+from app.models import (
+    InterviewEvaluation,
+    InterviewQuestion,
+    InterviewSession,
+    ScoreSketchBin,
+)
+from app.utils.cache import TTLCache, make_cache_key, normalize_text
+
+LOGGER = logging.getLogger(__name__)
+
+RANKING_CACHE_TTL_SECONDS = float(os.environ.get("RANKING_CACHE_TTL_SECONDS", 30))
+RANKING_BACKFILL_BATCH_SIZE = int(os.environ.get("RANKING_BACKFILL_BATCH_SIZE", 10000))
+
+SCORE_MIN, SCORE_MAX = 1.0, 5.0
+# Finer than any average of up to a hundred integer scores needs.
+SCORE_RESOLUTION = 0.01
+SKETCH_BINS = int(round((SCORE_MAX - SCORE_MIN) / SCORE_RESOLUTION)) + 1
+
+JOB, QUESTION = "job", "question"
+# Cohort quantiles returned with a ranking.
+RANKING_QUANTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9}
+
+_sketch_cache = TTLCache(maxsize=4096, ttl_seconds=RANKING_CACHE_TTL_SECONDS)
+
+
+def score_bins(scores) -> np.ndarray:
+    """
+    Bin index of every score, out of range scores clipped to the first or last bin.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    bins = np.rint((scores - SCORE_MIN) / SCORE_RESOLUTION)
+    return np.clip(bins, 0, SKETCH_BINS - 1).astype(np.int64)
+
+
+def sketch_key(scope: str, text: str) -> str:
+    """
+    Key of the sketch of a job title, or of a question text whatever its numbering.
+    """
+    if scope == QUESTION:
+        text = normalize_text(strip_numbering(text))
+    return make_cache_key(scope, text)
+
+
+class ScoreSketch:
+    """
+    Mergeable histogram of scores with constant time percentile lookups.
+    """
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        if counts is None:
+            counts = np.zeros(SKETCH_BINS, dtype=np.int64)
+        self.counts = counts
+        self._cumulative: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_scores(cls, scores) -> "ScoreSketch":
+        return cls(np.bincount(score_bins(scores), minlength=SKETCH_BINS))
+
+    @classmethod
+    def from_bins(cls, bins: Iterable[Tuple[int, int]]) -> "ScoreSketch":
+        sketch = cls()
+        for index, count in bins:
+            sketch.counts[index] = count
+        return sketch
+
+    @property
+    def total(self) -> int:
+        return int(self.cumulative[-1])
+
+    @property
+    def cumulative(self) -> np.ndarray:
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(np.maximum(self.counts, 0))
+        return self._cumulative
+
+    def add(self, score: float, count: int = 1) -> None:
+        self.counts[score_bins(score)] += count
+        self._cumulative = None
+
+    def merge(self, other: "ScoreSketch") -> "ScoreSketch":
+        return ScoreSketch(self.counts + other.counts)
+
+    def percentile(self, score: float) -> Optional[float]:
+        """
+        Percentage of the scores below score, counting half of those equal to it.
+        """
+        total = self.total
+        if not total:
+            return None
+        index = int(score_bins(score))
+        below = self.cumulative[index - 1] if index else 0
+        equal = self.cumulative[index] - below
+        return 100.0 * (below + equal / 2) / total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Smallest score with at least a fraction q of the scores at or below it.
+        """
+        total = self.total
+        if not total:
+            return None
+        index = int(np.searchsorted(self.cumulative, max(q * total, 1)))
+        return round(SCORE_MIN + index * SCORE_RESOLUTION, 2)
+
+
+async def get_sketch(db: AsyncSession, scope: str, text: str) -> ScoreSketch:
+    """
+    The sketch of a job title or question text, from the cache when fresh enough.
+    """
+    key = sketch_key(scope, text)
+    sketch = _sketch_cache.get((scope, key))
+    if sketch is None:
+        result = await db.execute(
+            select(ScoreSketchBin.bin, ScoreSketchBin.count).where(
+                ScoreSketchBin.scope == scope, ScoreSketchBin.key == key
+            )
+        )
+        sketch = ScoreSketch.from_bins(result.all())
+        _sketch_cache.set((scope, key), sketch)
+    return sketch
+
+
+def _upsert(dialect_name: str):
+    """
+    INSERT adding to the count of existing bins, on PostgreSQL and SQLite.
+    """
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    statement = dialect.insert(ScoreSketchBin)
+    return statement.on_conflict_do_update(
+        index_elements=["scope", "key", "bin"],
+        set_={"count": ScoreSketchBin.count + statement.excluded.count},
+    )
+
+
+async def _add_counts(db: AsyncSession, deltas: Counter) -> None:
+    rows = [
+        {"scope": scope, "key": key, "bin": index, "count": count}
+        for (scope, key, index), count in sorted(deltas.items())
+        if count
+    ]
+    if rows:
+        connection = await db.connection()
+        await db.execute(_upsert(connection.dialect.name), rows)
+
+
+async def _count_submitted(
+    db: AsyncSession, session_ids: Sequence[str], delta: int
+) -> None:
+    """
+    Add delta to the bins of the stored results of the submitted sessions among
+    session_ids.
+    """
+    if not session_ids:
+        return
+    sessions = (
+        await db.execute(
+            select(
+                InterviewSession.id,
+                InterviewSession.job_title,
+                InterviewSession.overall_score,
+            ).where(
+                InterviewSession.id.in_(session_ids),
+                InterviewSession.submitted_at.is_not(None),
+                InterviewSession.overall_score.is_not(None),
+            )
+        )
+    ).all()
+    if not sessions:
+        return
+    answers = await db.execute(
+        select(InterviewQuestion.text, InterviewEvaluation.score)
+        .join(
+            InterviewQuestion,
+            (InterviewQuestion.session_id == InterviewEvaluation.session_id)
+            & (InterviewQuestion.position == InterviewEvaluation.position),
+        )
+        .where(
+            InterviewEvaluation.session_id.in_([row.id for row in sessions]),
+            # Answers that could not be evaluated have no score to rank.
+            InterviewEvaluation.score.is_not(None),
+        )
+    )
+
+    deltas = Counter()
+    for _, job_title, overall_score in sessions:
+        key = sketch_key(JOB, job_title or "")
+        deltas[JOB, key, int(score_bins(overall_score))] += delta
+    for text, score in answers:
+        key = sketch_key(QUESTION, text or "")
+        deltas[QUESTION, key, int(score_bins(score))] += delta
+    await _add_counts(db, deltas)
+
+
+async def record_submissions(db: AsyncSession, session_ids: Sequence[str]) -> None:
+    """
+    Add the stored results of the submitted sessions to the sketches.
+
+    Runs once their results are stored, see crud.save_result.
+    """
+    await _count_submitted(db, session_ids, 1)
+
+
+async def remove_submissions(db: AsyncSession, session_ids: Sequence[str]) -> None:
+    """
+    Remove the stored results of the submitted sessions from the sketches.
+
+    Runs before their results are cleared for a new submit, see
+    crud.claim_submission. Sessions whose submit was never stored, e.g. a streamed
+    submit whose client disconnected, were not counted and are left alone.
+    """
+    await _count_submitted(db, session_ids, -1)
+
+
+def _count_bins(totals: Counter, scope: str, keys: List[str], scores: List) -> None:
+    """
+    Add the counts of the (key, score) pairs to totals, binned and counted with NumPy.
+    """
+    if not keys:
+        return
+    names, key_index = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    cells, counts = np.unique(
+        key_index * SKETCH_BINS + score_bins(scores), return_counts=True
+    )
+    for cell, cell_count in zip(cells.tolist(), counts.tolist()):
+        totals[scope, names[cell // SKETCH_BINS], cell % SKETCH_BINS] += cell_count
+
+
+async def rebuild(
+    session_factory, batch_size: int = RANKING_BACKFILL_BATCH_SIZE
+) -> int:
+    """
+    Recompute every sketch from the submitted sessions and return the number of
+    bins stored.
+
+    Scores are read and counted batch_size rows at a time, so memory is bounded by
+    the number of bins. Submits stored while it runs may be missed, run it when
+    traffic is low.
+    """
+    sessions = (
+        select(InterviewSession.job_title, InterviewSession.overall_score)
+        .where(
+            InterviewSession.submitted_at.is_not(None),
+            InterviewSession.overall_score.is_not(None),
+        )
+        .execution_options(yield_per=batch_size)
+    )
+    answers = (
+        select(InterviewQuestion.text, InterviewEvaluation.score)
+        .join(
+            InterviewQuestion,
+            (InterviewQuestion.session_id == InterviewEvaluation.session_id)
+            & (InterviewQuestion.position == InterviewEvaluation.position),
+        )
+        .join(InterviewSession, InterviewSession.id == InterviewEvaluation.session_id)
+        .where(
+            InterviewSession.submitted_at.is_not(None),
+            InterviewEvaluation.score.is_not(None),
+        )
+        .execution_options(yield_per=batch_size)
+    )
+    totals = Counter()
+    async with session_factory() as db:
+        for scope, query in ((JOB, sessions), (QUESTION, answers)):
+            result = await db.stream(query)
+            async for partition in result.partitions():
+                _count_bins(
+                    totals,
+                    scope,
+                    [sketch_key(scope, text or "") for text, _ in partition],
+                    [score for _, score in partition],
+                )
+
+        rows = [
+            {"scope": scope, "key": key, "bin": index, "count": count}
+            for (scope, key, index), count in sorted(totals.items())
+        ]
+        await db.execute(delete(ScoreSketchBin))
+        for start in range(0, len(rows), batch_size):
+            await db.execute(insert(ScoreSketchBin), rows[start : start + batch_size])
+        await db.commit()
+    _sketch_cache.clear()
+    return len(rows)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Recompute the score sketches of the submitted sessions."
+    )
+    parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from app.database import AsyncSessionLocal, engine
+    from app.migrations.schema import upgrade
+
+    async def run() -> int:
+        await upgrade(engine)
+        return await rebuild(AsyncSessionLocal)
+
+    LOGGER.info("Stored %d score sketch bins", asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
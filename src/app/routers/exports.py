@@ -0,0 +1,60 @@
+import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app import exports
+from app.database import get_read_session_factory
+
+# Exports stream from the read replica, when there is one.
+router = APIRouter(prefix="/export", tags=["Exports"])
+
+
+@router.get("/{kind}")
+async def export_results(
+    kind: str,
+    format: str = Query("ndjson", description="ndjson, csv or parquet"),
+    job_title: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    watermark: Optional[datetime.datetime] = Query(
+        None,
+        description="Only sessions submitted from then on, e.g. the "
+        "X-Export-Watermark of the previous export.",
+    ),
+    session_factory=Depends(get_read_session_factory),
+):
+    """
+    Stream the submitted sessions ("sessions") or their per-question evaluations
+    ("evaluations"), filtered by exact job title and a [since, until) start date.
+
+    The X-Export-Watermark response header is the watermark of the next
+    incremental export.
+    """
+    if kind not in exports.KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export {kind!r}.")
+    try:
+        exports.check_format(format)
+    except exports.ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    cutoff = exports.export_cutoff()
+    media_type, extension = exports.FORMATS[format]
+    return StreamingResponse(
+        exports.export(
+            session_factory,
+            kind,
+            format,
+            cutoff,
+            watermark=watermark,
+            job_title=job_title,
+            since=since,
+            until=until,
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{kind}.{extension}"',
+            "X-Export-Watermark": cutoff.isoformat(),
+        },
+    )
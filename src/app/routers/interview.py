@@ -1,51 +1,89 @@
 import logging
+import os
 import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.agents import flow 
-from app.database import get_db
-from app.models import InterviewSession
+from app import crud
+from app.agents import flow
+from app.database import get_db, get_session_factory
+from app.models import EvaluationJob, InterviewSession
 from app.schemas import (
+    EvaluationJobResponse,
+    GeneratedQuestion,
+    InterviewSessionCreated,
+    QuestionEvaluation,
     StartInterviewRequest,
     StartInterviewResponse,
+    StartInterviewSummary,
+    StreamError,
+    SubmitAnswer,
+    SubmitAnswerResponse,
     SubmitResponses,
     SubmitResponsesResponse,
+    SubmitResponsesSummary,
 )
+from app.utils import tracing
+from app.utils.cache import SingleFlight, TTLCache
+from app.workers import answers as answer_workers
+from app.workers import evaluation as evaluation_workers
 
 LOGGER = logging.getLogger(__name__)
 router = APIRouter(prefix="/interview", tags=["Interview"])
 
+SESSION_CACHE_MAXSIZE = int(os.environ.get("SESSION_CACHE_MAXSIZE", 10000))
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("SESSION_CACHE_TTL_SECONDS", 3600))
+
+# Concurrent identical submits for a session share one evaluation.
+_submissions = SingleFlight()
+
+
+@dataclass(frozen=True)
+class StartedSession:
+    """
+    A session as stored by /interview/start.
+    """
+
+    id: str
+    candidate_id: str
+    questions: Tuple[str, ...]
+
+
+# Sessions started by this process, so their submits are checked without reading
+# their questions. Submits still read the submit state of the session, see
+# crud.get_submit_state, as other processes may have submitted it since.
+started_sessions = TTLCache(SESSION_CACHE_MAXSIZE, SESSION_CACHE_TTL_SECONDS)
+
+
+def remember_started(session_id: str, candidate_id: str, questions: List[str]) -> None:
+    started_sessions.set(
+        session_id, StartedSession(session_id, candidate_id, tuple(questions))
+    )
+
 
 @router.post("/start", response_model=StartInterviewResponse)
+@tracing.traced("interview.start_interview")
 async def start_interview(
     data: StartInterviewRequest, db: AsyncSession = Depends(get_db)
 ):
     questions = await flow.generate_questions(data.job_description)
     LOGGER.debug("Generated questions: %s", questions)
 
-    # Build the initial session data dictionary.
-    session_data = {
-        "candidate_id": data.candidate_id,
-        "job_description": data.job_description,
-        "questions": questions,
-        "responses": [],
-        "evaluations": [],
-    }
-
     session_id = str(uuid.uuid4())
 
-    # Create and persist the InterviewSession record.
-    interview_session = InterviewSession(
-        id=session_id,
-        candidate_id=data.candidate_id,
-        job_title=data.job_description,
-        session_data=session_data,
+    # Create and persist the InterviewSession record and its questions.
+    crud.create_session(
+        db, session_id, data.candidate_id, data.job_description, questions
     )
-    db.add(interview_session)
-    await db.commit()
+    with tracing.span("db.commit"):
+        await db.commit()
+    remember_started(session_id, data.candidate_id, questions)
+    tracing.set_attribute("session.id", session_id)
 
     # Return a response containing the session details.
     return StartInterviewResponse(
@@ -56,55 +94,473 @@ async def start_interview(
     )
 
 
-@router.post("/submit", response_model=SubmitResponsesResponse)
-async def submit_responses(data: SubmitResponses, db: AsyncSession = Depends(get_db)):
-    # Retrieve the InterviewSession record from the database.
-    result = await db.execute(
-        select(InterviewSession).where(InterviewSession.id == data.session_id)
-    )
-    session_record = result.scalar_one_or_none()
-    if session_record is None:
-        raise HTTPException(status_code=404, detail="Interview session not found.")
+@router.post("/start/stream")
+async def start_interview_stream(
+    data: StartInterviewRequest, session_factory=Depends(get_session_factory)
+):
+    """
+    Start an interview and stream it as newline-delimited JSON.
+
+    A "session" line with the session id is sent right away, then one "question"
+    line per question as soon as the LLM has generated it. The session is stored
+    when generation ends, followed by a "summary" line; it cannot be submitted
+    before that. An "error" line replaces the summary when generation fails or the
+    session cannot be stored.
+    """
+    session_id = str(uuid.uuid4())
+
+    async def stream_questions():
+        created = InterviewSessionCreated(
+            session_id=session_id,
+            candidate_id=data.candidate_id,
+            job_description=data.job_description,
+        )
+        yield created.model_dump_json() + "\n"
+
+        questions = []
+        try:
+            async for question in flow.stream_questions(data.job_description):
+                line = GeneratedQuestion(index=len(questions), question=question)
+                questions.append(question)
+                yield line.model_dump_json() + "\n"
+        except Exception as e:
+            LOGGER.error("Error streaming questions for %s: %r", session_id, e)
+            error = StreamError(detail="Questions could not be generated.")
+            yield error.model_dump_json() + "\n"
+            return
+
+        try:
+            async with session_factory() as db:
+                crud.create_session(
+                    db, session_id, data.candidate_id, data.job_description, questions
+                )
+                await db.commit()
+        except Exception as e:
+            LOGGER.error("Error storing streamed session %s: %r", session_id, e)
+            error = StreamError(detail="The interview session could not be stored.")
+            yield error.model_dump_json() + "\n"
+            return
+        remember_started(session_id, data.candidate_id, questions)
+
+        summary = StartInterviewSummary(
+            session_id=session_id,
+            candidate_id=data.candidate_id,
+            job_description=data.job_description,
+            questions=questions,
+        )
+        yield summary.model_dump_json() + "\n"
 
-    LOGGER.info("Session record found: %s", session_record)
-    context = session_record.session_data
-    LOGGER.info("Session context: %s", context)
+    return StreamingResponse(stream_questions(), media_type="application/x-ndjson")
 
+
+def check_responses(data: SubmitResponses, questions: List[str]) -> None:
     # Ensure the number of responses matches the number of questions.
-    questions = context.get("questions", [])
     if len(data.responses) != len(questions):
         raise HTTPException(
             status_code=400,
             detail="Number of responses does not match the number of questions.",
         )
 
-    evaluations = []
-    # For each question-response pair, evaluate the response.
-    for question, response_text in zip(questions, data.responses):
-        score, comment = await flow.evaluate_response(question, response_text)
-        evaluations.append(
-            {
+
+async def get_session_for_submit(
+    db: AsyncSession, data: SubmitResponses
+) -> Tuple[InterviewSession, List[str]]:
+    """
+    Load the session being submitted and its questions, and check the responses
+    match the questions.
+    """
+    # Retrieve the InterviewSession record from the database.
+    session_record = await crud.get_session(db, data.session_id)
+    if session_record is None:
+        raise HTTPException(status_code=404, detail="Interview session not found.")
+
+    LOGGER.debug("Session record found: %s", session_record)
+
+    questions = await crud.get_questions(db, data.session_id)
+    check_responses(data, questions)
+    return session_record, questions
+
+
+def get_started_questions(data: SubmitResponses) -> Optional[List[str]]:
+    """
+    The questions of a session in started_sessions, checked against the responses,
+    None for other sessions.
+    """
+    started = started_sessions.get(data.session_id)
+    if started is None:
+        return None
+    tracing.set_attribute("session.cached", True)
+    questions = list(started.questions)
+    check_responses(data, questions)
+    return questions
+
+
+async def load_submit(db: AsyncSession, data: SubmitResponses) -> Tuple:
+    """
+    Like get_session_for_submit, reading only the submit state of the session when
+    its questions are in started_sessions.
+    """
+    questions = get_started_questions(data)
+    if questions is None:
+        return await get_session_for_submit(db, data)
+    session_record = await crud.get_submit_state(db, data.session_id)
+    if session_record is None:
+        raise HTTPException(status_code=404, detail="Interview session not found.")
+    return session_record, questions
+
+
+def stored_result(session_record) -> SubmitResponsesResponse:
+    return SubmitResponsesResponse(
+        session_id=session_record.id,
+        candidate_id=session_record.candidate_id,
+        feedback=session_record.feedback,
+        overall_score=session_record.overall_score,
+    )
+
+
+def is_duplicate(session_record, key: str) -> bool:
+    """
+    Whether the session, or its submit state, already holds the result of the
+    submit identified by key.
+    """
+    return (
+        session_record.submission_key == key and session_record.submitted_at is not None
+    )
+
+
+def evaluation_line(index: int, evaluation: dict) -> QuestionEvaluation:
+    return QuestionEvaluation(
+        index=index,
+        question=evaluation["question"],
+        score=evaluation["score"],
+        comment=evaluation["comment"],
+        error=evaluation["score"] is None,
+    )
+
+
+async def stream_stored(db: AsyncSession, session_record) -> StreamingResponse:
+    """
+    Stream the stored evaluations and result of a session like a new submit.
+    """
+    evaluations = await crud.get_evaluations(db, session_record.id)
+
+    async def stream_lines():
+        for index, evaluation in enumerate(evaluations):
+            line = evaluation_line(index, evaluation)
+            yield line.model_dump_json() + "\n"
+        summary = SubmitResponsesSummary(**stored_result(session_record).model_dump())
+        yield summary.model_dump_json() + "\n"
+
+    return StreamingResponse(stream_lines(), media_type="application/x-ndjson")
+
+
+def evaluation_failed() -> HTTPException:
+    return HTTPException(status_code=502, detail="Responses could not be evaluated.")
+
+
+def submission_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="The session is being submitted concurrently, retry later.",
+    )
+
+
+@router.post("/answer", status_code=202, response_model=SubmitAnswerResponse)
+@tracing.traced("interview.submit_answer")
+async def submit_answer(
+    data: SubmitAnswer, session_factory=Depends(get_session_factory)
+):
+    """
+    Store one answer ahead of the submit and start evaluating it in the background.
+
+    POST /interview/submit reuses the stored evaluations of the answers it
+    contains unchanged, so once every answer has been sent this way the submit
+    only aggregates their scores. Sending another answer to the same question
+    replaces the previous one. The status is "stored" instead of "evaluating" when
+    too many evaluations are pending, the submit then evaluates the answer.
+    """
+    tracing.set_attribute("session.id", data.session_id)
+    started = started_sessions.get(data.session_id)
+    async with session_factory() as db:
+        if started is not None:
+            questions = list(started.questions)
+        else:
+            if await crud.get_session(db, data.session_id) is None:
+                raise HTTPException(
+                    status_code=404, detail="Interview session not found."
+                )
+            questions = await crud.get_questions(db, data.session_id)
+        if not 0 <= data.index < len(questions):
+            raise HTTPException(
+                status_code=400, detail="The session has no question at this index."
+            )
+        await crud.save_answer(db, data.session_id, data.index, data.response)
+        await db.commit()
+
+    evaluating = answer_workers.evaluate_in_background(
+        session_factory,
+        data.session_id,
+        data.index,
+        questions[data.index],
+        data.response,
+    )
+    return SubmitAnswerResponse(
+        session_id=data.session_id,
+        index=data.index,
+        status="evaluating" if evaluating else "stored",
+    )
+
+
+async def evaluate_submission(
+    session_factory, session_id: str, questions: List[str], responses: List[str]
+) -> List[dict]:
+    """
+    flow.evaluate_responses, reusing the stored evaluations of identical answers
+    sent ahead with POST /interview/answer.
+    """
+    with tracing.span("db.fetch_answers"):
+        async with session_factory() as db:
+            evaluated = await crud.get_answer_evaluations(db, session_id)
+
+    evaluations: List[Optional[dict]] = [None] * len(questions)
+    pending = []
+    for index, (question, response) in enumerate(zip(questions, responses)):
+        stored = evaluated.get(index)
+        if stored is not None and stored[0] == response:
+            _, score, comment = stored
+            evaluations[index] = {
                 "question": question,
-                "response": response_text,
+                "response": response,
                 "score": score,
                 "comment": comment,
+                "error": False,
             }
+        else:
+            pending.append(index)
+    tracing.set_attribute("submit.precomputed", len(questions) - len(pending))
+
+    if pending:
+        results = await flow.evaluate_responses(
+            [questions[index] for index in pending],
+            [responses[index] for index in pending],
         )
+        for index, evaluation in zip(pending, results):
+            evaluations[index] = evaluation
+    return evaluations
+
+
+@router.post("/submit", response_model=SubmitResponsesResponse)
+@tracing.traced("interview.submit_responses")
+async def submit_responses(
+    data: SubmitResponses,
+    session_factory=Depends(get_session_factory),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Evaluate the responses of a session and store the result.
+
+    Submits are idempotent: a retry with the same Idempotency-Key header, or without
+    one the same responses, returns the stored result instead of evaluating again.
+    Identical submits in flight are coalesced, and a submit racing a different one
+    for the same session gets 409. Answers that could not be evaluated have no
+    score and are left out of the overall score, the submit gets 502 when none
+    could be.
+    """
+    tracing.set_attribute("session.id", data.session_id)
+    key = crud.submission_key(data.session_id, data.responses, idempotency_key)
+    # The shared evaluation may outlive the request that started it, so it uses
+    # its own database sessions rather than the request's.
+    return await _submissions.do(
+        (data.session_id, key), lambda: _submit(session_factory, data, key)
+    )
+
+
+async def _submit(
+    session_factory, data: SubmitResponses, key: str
+) -> SubmitResponsesResponse:
+    with tracing.span("db.fetch_session"):
+        async with session_factory() as db:
+            session_record, questions = await load_submit(db, data)
+    if is_duplicate(session_record, key):
+        tracing.set_attribute("submit.duplicate", True)
+        return stored_result(session_record)
+
+    # Evaluate the question-response pairs not evaluated ahead concurrently.
+    evaluations = await evaluate_submission(
+        session_factory, data.session_id, questions, data.responses
+    )
 
     # Validate the evaluations to get overall feedback and score.
-    feedback, overall_score = await flow.validate_scores(evaluations)
+    try:
+        feedback, overall_score = await flow.validate_scores(evaluations)
+    except flow.EvaluationFailed:
+        raise evaluation_failed()
 
-    # Update the session record with the responses, evaluations, and feedback.
-    context["responses"] = data.responses
-    context["evaluations"] = evaluations
-    context["feedback"] = feedback
-    context["overall_score"] = overall_score
-    session_record.session_data = context
-    await db.commit()
+    # Store the responses, evaluations, and feedback unless another submit won.
+    with tracing.span("db.save_submission"):
+        async with session_factory() as db:
+            saved = await crud.save_submission(
+                db,
+                data.session_id,
+                data.responses,
+                evaluations,
+                feedback,
+                overall_score,
+                key=key,
+                expected_version=session_record.version,
+            )
+            if saved:
+                await db.commit()
+            else:
+                await db.rollback()
+                session_record = await crud.get_submit_state(db, data.session_id)
+                if not is_duplicate(session_record, key):
+                    raise submission_conflict()
+                tracing.set_attribute("submit.duplicate", True)
+                return stored_result(session_record)
 
     return SubmitResponsesResponse(
         session_id=data.session_id,
-        candidate_id=context.get("candidate_id"),
+        candidate_id=session_record.candidate_id,
         feedback=feedback,
         overall_score=overall_score,
     )
+
+
+@router.post("/submit/stream")
+async def submit_responses_stream(
+    data: SubmitResponses,
+    session_factory=Depends(get_session_factory),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Submit responses and stream the results as newline-delimited JSON.
+
+    One "evaluation" line is sent per question as soon as it has been scored,
+    followed by a "summary" line with the overall feedback, or an "error" line when
+    no answer could be evaluated. Every evaluation is saved as it completes, so a
+    dropped connection keeps the finished work. A duplicate submit, see
+    submit_responses, streams the stored result.
+    """
+    key = crud.submission_key(data.session_id, data.responses, idempotency_key)
+    async with session_factory() as db:
+        session_record, questions = await load_submit(db, data)
+        if is_duplicate(session_record, key):
+            return await stream_stored(db, session_record)
+
+        # Claim the session up front, evaluations are written while streaming.
+        if not await crud.claim_submission(
+            db, data.session_id, key, session_record.version
+        ):
+            # A retry of a submit that completed since the session was read.
+            await db.rollback()
+            session_record = await crud.get_submit_state(db, data.session_id)
+            if not is_duplicate(session_record, key):
+                raise submission_conflict()
+            return await stream_stored(db, session_record)
+        claimed_version = session_record.version + 1
+        await crud.save_responses(db, data.session_id, data.responses)
+        await db.commit()
+
+    async def stream_evaluations():
+        # The streaming body outlives the request handler, so it owns its session.
+        async with session_factory() as db:
+            evaluations = [None] * len(questions)
+            async for index, evaluation in flow.iter_evaluations(
+                questions, data.responses
+            ):
+                evaluations[index] = evaluation
+                await crud.save_evaluations(db, data.session_id, [(index, evaluation)])
+                await db.commit()
+                line = evaluation_line(index, evaluation)
+                yield line.model_dump_json() + "\n"
+
+            try:
+                feedback, overall_score = await flow.validate_scores(evaluations)
+            except flow.EvaluationFailed as e:
+                LOGGER.error("Error evaluating session %s: %r", data.session_id, e)
+                error = StreamError(detail="Responses could not be evaluated.")
+                yield error.model_dump_json() + "\n"
+                return
+            if not await crud.save_result(
+                db, data.session_id, feedback, overall_score, version=claimed_version
+            ):
+                await db.rollback()
+                error = StreamError(detail="The session was submitted concurrently.")
+                yield error.model_dump_json() + "\n"
+                return
+            await db.commit()
+
+            summary = SubmitResponsesSummary(
+                session_id=data.session_id,
+                candidate_id=session_record.candidate_id,
+                feedback=feedback,
+                overall_score=overall_score,
+            )
+            yield summary.model_dump_json() + "\n"
+
+    return StreamingResponse(stream_evaluations(), media_type="application/x-ndjson")
+
+
+@router.post("/submit/async", status_code=202, response_model=EvaluationJobResponse)
+async def submit_responses_async(
+    data: SubmitResponses,
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Queue the responses for evaluation and return immediately with a job id.
+
+    Poll GET /interview/jobs/{job_id} for the result. A duplicate submit, see
+    submit_responses, returns the job queued for the first one unless it failed.
+    """
+    if get_started_questions(data) is None:
+        await get_session_for_submit(db, data)
+    key = crud.submission_key(data.session_id, data.responses, idempotency_key)
+
+    job = await db.scalar(
+        select(EvaluationJob)
+        .where(
+            EvaluationJob.session_id == data.session_id,
+            EvaluationJob.idempotency_key == key,
+            EvaluationJob.status != "failed",
+        )
+        .order_by(EvaluationJob.created_at.desc())
+        .limit(1)
+    )
+    if job is None:
+        job = EvaluationJob(
+            id=str(uuid.uuid4()),
+            session_id=data.session_id,
+            status="queued",
+            responses=data.responses,
+            idempotency_key=key,
+            attempts=0,
+        )
+        db.add(job)
+        await db.commit()
+        evaluation_workers.notify()
+
+    return EvaluationJobResponse(
+        job_id=job.id,
+        session_id=job.session_id,
+        status=job.status,
+        attempts=job.attempts,
+        result=job.result,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=EvaluationJobResponse)
+async def get_evaluation_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    job = await db.get(EvaluationJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found.")
+
+    return EvaluationJobResponse(
+        job_id=job.id,
+        session_id=job.session_id,
+        status=job.status,
+        attempts=job.attempts,
+        result=job.result,
+        error=job.error if job.status == "failed" else None,
+    )
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import os
+import uuid
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app import crud
+from app.agents import flow
+from app.database import get_session_factory
+from app.routers.interview import (
+    is_duplicate,
+    remember_started,
+    stored_result,
+)
+from app.schemas import (
+    BatchStartInterviewRequest,
+    BatchStartItemResult,
+    BatchSubmitItemResult,
+    BatchSubmitResponses,
+    BatchSummary,
+    StartInterviewResponse,
+    SubmitResponsesResponse,
+)
+from app.utils.cache import normalize_text
+
+LOGGER = logging.getLogger(__name__)
+router = APIRouter(prefix="/interview", tags=["Interview"])
+
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 500))
+# Question sets generated, or sessions evaluated, at once per batch request.
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", 8))
+
+
+def check_batch_size(items: list) -> None:
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch can contain at most {BATCH_MAX_ITEMS} items.",
+        )
+
+
+def ndjson(line) -> str:
+    return line.model_dump_json() + "\n"
+
+
+@router.post("/start/batch")
+async def start_interviews_batch(
+    data: BatchStartInterviewRequest, session_factory=Depends(get_session_factory)
+):
+    """
+    Start interviews for many candidates, streaming one NDJSON "item" line per
+    candidate followed by a "summary" line.
+
+    Questions are generated once per distinct job description, for at most
+    BATCH_MAX_CONCURRENCY job descriptions at a time. The sessions whose questions
+    are ready are stored together with multi-row inserts and streamed back right
+    away, items are therefore not in request order.
+    """
+    check_batch_size(data.items)
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(data.items):
+        groups.setdefault(normalize_text(item.job_description), []).append(index)
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def generate(job_description: str) -> List[str]:
+        async with semaphore:
+            return await flow.generate_questions(job_description)
+
+    async def stream_results():
+        succeeded = 0
+        tasks = {
+            asyncio.ensure_future(
+                generate(data.items[indexes[0]].job_description)
+            ): indexes
+            for indexes in groups.values()
+        }
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                sessions, lines = [], []
+                for task in done:
+                    indexes = tasks.pop(task)
+                    if task.exception() is not None:
+                        LOGGER.error("Error generating questions: %r", task.exception())
+                        lines.extend(
+                            BatchStartItemResult(
+                                index=index,
+                                status=502,
+                                error="Questions could not be generated.",
+                            )
+                            for index in indexes
+                        )
+                        continue
+                    for index in indexes:
+                        item = data.items[index]
+                        session_id = str(uuid.uuid4())
+                        sessions.append(
+                            (
+                                session_id,
+                                item.candidate_id,
+                                item.job_description,
+                                task.result(),
+                            )
+                        )
+                        result = StartInterviewResponse(
+                            session_id=session_id,
+                            candidate_id=item.candidate_id,
+                            job_description=item.job_description,
+                            questions=task.result(),
+                        )
+                        lines.append(
+                            BatchStartItemResult(index=index, status=200, result=result)
+                        )
+                try:
+                    async with session_factory() as db:
+                        await crud.create_sessions(db, sessions)
+                        await db.commit()
+                    for session_id, candidate_id, _, questions in sessions:
+                        remember_started(session_id, candidate_id, questions)
+                except Exception as e:
+                    LOGGER.error("Error storing batch sessions: %r", e)
+                    lines = [
+                        BatchStartItemResult(
+                            index=line.index,
+                            status=500,
+                            error="Interview could not be stored.",
+                        )
+                        for line in lines
+                    ]
+                for line in sorted(lines, key=lambda line: line.index):
+                    succeeded += line.status == 200
+                    yield ndjson(line)
+        finally:
+            for task in tasks:
+                task.cancel()
+        total = len(data.items)
+        yield ndjson(
+            BatchSummary(total=total, succeeded=succeeded, failed=total - succeeded)
+        )
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.post("/submit/batch")
+async def submit_responses_batch(
+    data: BatchSubmitResponses, session_factory=Depends(get_session_factory)
+):
+    """
+    Submit the responses of many sessions, streaming one NDJSON "item" line per
+    submission followed by a "summary" line.
+
+    Sessions are loaded together, evaluated BATCH_MAX_CONCURRENCY at a time, and
+    the results that are ready are stored together with multi-row inserts. Like
+    /interview/submit a duplicate submission, identified by the idempotency_key of
+    the item or else by its responses, returns the stored result, and submitting
+    one session twice in a batch with different keys gets 409.
+    """
+    check_batch_size(data.items)
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def evaluate(questions: List[str], responses: List[str]) -> Tuple:
+        async with semaphore:
+            evaluations = await flow.evaluate_responses(questions, responses)
+            feedback, overall_score = await flow.validate_scores(evaluations)
+            return evaluations, feedback, overall_score
+
+    async def stream_results():
+        succeeded = 0
+        async with session_factory() as db:
+            loaded = await crud.get_sessions_with_questions(
+                db, (item.session_id for item in data.items)
+            )
+
+        # Submissions to evaluate, by session, with the indexes they answer.
+        pending: Dict[str, Tuple[str, List[int]]] = {}
+        for index, item in enumerate(data.items):
+            line = None
+            key = crud.submission_key(
+                item.session_id, item.responses, item.idempotency_key
+            )
+            if item.session_id not in loaded:
+                line = BatchSubmitItemResult(
+                    index=index, status=404, error="Interview session not found."
+                )
+            elif len(item.responses) != len(loaded[item.session_id][1]):
+                line = BatchSubmitItemResult(
+                    index=index,
+                    status=400,
+                    error="Number of responses does not match the number of questions.",
+                )
+            elif is_duplicate(loaded[item.session_id][0], key):
+                line = BatchSubmitItemResult(
+                    index=index,
+                    status=200,
+                    result=stored_result(loaded[item.session_id][0]),
+                )
+            elif item.session_id in pending:
+                if pending[item.session_id][0] == key:
+                    pending[item.session_id][1].append(index)
+                else:
+                    line = BatchSubmitItemResult(
+                        index=index,
+                        status=409,
+                        error="The session is submitted more than once.",
+                    )
+            else:
+                pending[item.session_id] = (key, [index])
+            if line is not None:
+                succeeded += line.status == 200
+                yield ndjson(line)
+
+        tasks = {}
+        for session_id, (key, indexes) in pending.items():
+            questions = loaded[session_id][1]
+            responses = data.items[indexes[0]].responses
+            task = asyncio.ensure_future(evaluate(questions, responses))
+            tasks[task] = session_id
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                submissions, lines = [], []
+                for task in done:
+                    session_id = tasks.pop(task)
+                    key, indexes = pending[session_id]
+                    if task.exception() is not None:
+                        LOGGER.error(
+                            "Error evaluating session %s: %r",
+                            session_id,
+                            task.exception(),
+                        )
+                        lines.extend(
+                            BatchSubmitItemResult(
+                                index=index,
+                                status=502,
+                                error="Responses could not be evaluated.",
+                            )
+                            for index in indexes
+                        )
+                        continue
+                    evaluations, feedback, overall_score = task.result()
+                    submissions.append(
+                        {
+                            "session_id": session_id,
+                            "responses": data.items[indexes[0]].responses,
+                            "evaluations": evaluations,
+                            "feedback": feedback,
+                            "overall_score": overall_score,
+                            "key": key,
+                            "expected_version": loaded[session_id][0].version,
+                        }
+                    )
+                saved, stored = set(), True
+                try:
+                    async with session_factory() as db:
+                        saved = await crud.save_submissions(db, submissions)
+                        await db.commit()
+                except Exception as e:
+                    LOGGER.error("Error storing batch submissions: %r", e)
+                    stored = False
+                for submission in submissions:
+                    session_id = submission["session_id"]
+                    if session_id in saved:
+                        result = SubmitResponsesResponse(
+                            session_id=session_id,
+                            candidate_id=loaded[session_id][0].candidate_id,
+                            feedback=submission["feedback"],
+                            overall_score=submission["overall_score"],
+                        )
+                        status, error = 200, None
+                    elif stored:
+                        result = None
+                        status, error = 409, "The session was submitted concurrently."
+                    else:
+                        result = None
+                        status, error = 500, "Responses could not be stored."
+                    lines.extend(
+                        BatchSubmitItemResult(
+                            index=index, status=status, error=error, result=result
+                        )
+                        for index in pending[session_id][1]
+                    )
+                for line in sorted(lines, key=lambda line: line.index):
+                    succeeded += line.status == 200
+                    yield ndjson(line)
+        finally:
+            for task in tasks:
+                task.cancel()
+        total = len(data.items)
+        yield ndjson(
+            BatchSummary(total=total, succeeded=succeeded, failed=total - succeeded)
+        )
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
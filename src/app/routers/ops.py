@@ -0,0 +1,98 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.agents import flow, question_bank
+from app.database import engine, get_session_factory, pool_stats, read_engine
+from app.utils import metrics, tracing
+from app.workers import answers as answer_workers
+from app.workers import evaluation as evaluation_workers
+
+router = APIRouter(prefix="/ops", tags=["Ops"])
+
+
+@router.get("/cache")
+async def cache_stats():
+    return {
+        "questions": flow.question_cache.stats(),
+        "evaluations": flow.evaluation_cache.stats(),
+    }
+
+
+@router.get("/llm")
+async def llm_limiter_stats():
+    """
+    Concurrency limit, queue depth, wait time and retries of the LLM rate limiter.
+    """
+    return flow.llm_limiter.stats()
+
+
+@router.get("/question-bank")
+async def question_bank_stats():
+    return question_bank.bank.stats()
+
+
+@router.post("/question-bank/reload")
+async def reload_question_bank(session_factory=Depends(get_session_factory)):
+    """
+    Rebuild the question bank index, e.g. after approving questions.
+    """
+    await question_bank.bank.load(session_factory)
+    return question_bank.bank.stats()
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    stats = pool_stats(engine)
+    if read_engine is not engine:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
+
+
+@router.get("/queue")
+async def queue_stats():
+    pool = evaluation_workers.get_pool()
+    return {
+        "mode": evaluation_workers.EVALUATION_QUEUE_MODE,
+        "workers": pool.stats() if pool is not None else None,
+        "answer_evaluations": answer_workers.pending(),
+    }
+
+
+@router.get("/token-usage")
+async def token_usage():
+    """
+    LLM calls and prompt and completion tokens per route since the worker started.
+    """
+    routes = {}
+    for (provider, route, kind), (count, total) in metrics.LLM_TOKENS.series().items():
+        usage = routes.setdefault(
+            route, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        if kind == "prompt":
+            usage["calls"] += count
+        usage[f"{kind}_tokens"] += int(total)
+    for usage_route, usage in routes.items():
+        usage["truncated_completions"] = int(
+            metrics.LLM_TRUNCATED_COMPLETIONS.value(route=usage_route)
+        )
+    return {"routes": routes}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Request, DB and LLM histograms in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/traces")
+async def recent_traces(limit: Optional[int] = 100):
+    """
+    Most recent spans as OTLP/JSON when TRACE_EXPORTER=memory.
+    """
+    return tracing.traces(limit)
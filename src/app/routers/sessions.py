@@ -0,0 +1,218 @@
+import base64
+import datetime
+import json
+import os
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, ranking
+from app.database import get_read_db
+from app.models import InterviewSession
+from app.schemas import (
+    ScoreStatsResponse,
+    SessionDetail,
+    SessionPage,
+    SessionRanking,
+)
+from app.utils.cache import TTLCache
+
+# Reporting reads are served by the read replica, when there is one.
+router = APIRouter(prefix="/sessions", tags=["Sessions"])
+
+SESSIONS_PAGE_MAX_LIMIT = int(os.environ.get("SESSIONS_PAGE_MAX_LIMIT", 500))
+# Dashboards poll the same aggregates, they are recomputed at most this often.
+SESSIONS_STATS_CACHE_TTL_SECONDS = float(
+    os.environ.get("SESSIONS_STATS_CACHE_TTL_SECONDS", 60)
+)
+
+SESSION_FIELDS = tuple(column.name for column in InterviewSession.__table__.columns)
+# Everything but the legacy session_data blob and the bookkeeping columns.
+DEFAULT_SESSION_FIELDS = (
+    "id",
+    "candidate_id",
+    "job_title",
+    "timestamp",
+    "feedback",
+    "overall_score",
+    "submitted_at",
+)
+
+_stats_cache = TTLCache(maxsize=256, ttl_seconds=SESSIONS_STATS_CACHE_TTL_SECONDS)
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Columns to return from a comma-separated fields parameter, id always included.
+    """
+    if not fields:
+        return list(DEFAULT_SESSION_FIELDS)
+    names = ["id"]
+    for name in fields.split(","):
+        name = name.strip()
+        if name not in SESSION_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field {name!r}, valid fields: {', '.join(SESSION_FIELDS)}",
+            )
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def encode_cursor(timestamp: datetime.datetime, session_id: str) -> str:
+    payload = json.dumps([timestamp.isoformat(), session_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, str]:
+    try:
+        timestamp, session_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.datetime.fromisoformat(timestamp), session_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+@router.get("", response_model=SessionPage)
+async def list_sessions(
+    candidate_id: Optional[str] = None,
+    job_title: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns, session_data is only sent if listed.",
+    ),
+    limit: int = Query(50, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    List sessions newest first, filtered by candidate, exact job title and a
+    [since, until) date range.
+
+    Pages are keyset paginated: pass the next_cursor of a page as cursor to get
+    the next one, the cost of a page does not grow with its depth.
+    """
+    names = parse_fields(fields)
+    # The cursor is built from the last row's timestamp and id.
+    selected = names if "timestamp" in names else names + ["timestamp"]
+    limit = min(limit, SESSIONS_PAGE_MAX_LIMIT)
+    rows = await crud.list_sessions(
+        db,
+        selected,
+        limit + 1,
+        after=decode_cursor(cursor) if cursor else None,
+        candidate_id=candidate_id,
+        job_title=job_title,
+        since=since,
+        until=until,
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rows[-1]["timestamp"] is not None:
+            next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+    items = [{name: row[name] for name in names} for row in rows]
+    return SessionPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/stats/scores", response_model=ScoreStatsResponse)
+async def score_stats(
+    job_title: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    min_sessions: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Session counts, score statistics and score distribution per job title.
+
+    Computed in SQL with one grouped query and cached for
+    SESSIONS_STATS_CACHE_TTL_SECONDS.
+    """
+    key = (job_title, since, until, min_sessions, limit)
+    jobs = _stats_cache.get(key)
+    if jobs is None:
+        jobs = await crud.score_stats(
+            db,
+            limit,
+            min_sessions,
+            job_title=job_title,
+            since=since,
+            until=until,
+        )
+        _stats_cache.set(key, jobs)
+    return ScoreStatsResponse(since=since, until=until, jobs=jobs)
+
+
+@router.get("/{session_id}", response_model=SessionDetail)
+async def get_session(
+    session_id: str,
+    fields: Optional[str] = None,
+    include_evaluations: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    One session's fields, and optionally its questions, responses and evaluations.
+    """
+    names = parse_fields(fields)
+    rows = await crud.list_sessions(db, names, 1, session_id=session_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Interview session not found.")
+    evaluations = None
+    if include_evaluations:
+        evaluations = await crud.get_evaluations(db, session_id)
+    return SessionDetail(session=rows[0], evaluations=evaluations)
+
+
+def _percentile(sketch: ranking.ScoreSketch, score: Optional[float]) -> Optional[float]:
+    if score is None:
+        return None
+    percentile = sketch.percentile(score)
+    return round(percentile, 1) if percentile is not None else None
+
+
+@router.get("/{session_id}/ranking", response_model=SessionRanking)
+async def get_session_ranking(session_id: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Percentile of a submitted session's overall score among the sessions for the
+    same job title, and of each answer's score among the answers to the same
+    question.
+
+    Percentiles are read from the cohort score sketches, whatever the cohort size.
+    """
+    rows = await crud.list_sessions(
+        db, ["id", "job_title", "overall_score"], 1, session_id=session_id
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Interview session not found.")
+    session = rows[0]
+    if session["overall_score"] is None:
+        raise HTTPException(status_code=409, detail="The session is not submitted.")
+
+    cohort = await ranking.get_sketch(db, ranking.JOB, session["job_title"] or "")
+    answers = []
+    for evaluation in await crud.get_evaluations(db, session_id):
+        sketch = await ranking.get_sketch(db, ranking.QUESTION, evaluation["question"])
+        answers.append(
+            {
+                "question": evaluation["question"],
+                "score": evaluation["score"],
+                "percentile": _percentile(sketch, evaluation["score"]),
+                "cohort_size": sketch.total,
+            }
+        )
+    return SessionRanking(
+        session_id=session_id,
+        overall_score=session["overall_score"],
+        percentile=_percentile(cohort, session["overall_score"]),
+        cohort_size=cohort.total,
+        quantiles={
+            name: cohort.quantile(q) for name, q in ranking.RANKING_QUANTILES.items()
+        },
+        answers=answers,
+    )
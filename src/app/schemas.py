@@ -1,4 +1,5 @@
-from typing import List
+import datetime
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 
@@ -15,13 +16,148 @@ class StartInterviewResponse(BaseModel):
     questions: List[str]
 
 
+class InterviewSessionCreated(BaseModel):
+    type: Literal["session"] = "session"
+    session_id: str
+    candidate_id: str
+    job_description: str
+
+
+class GeneratedQuestion(BaseModel):
+    type: Literal["question"] = "question"
+    index: int
+    question: str
+
+
+class StartInterviewSummary(StartInterviewResponse):
+    type: Literal["summary"] = "summary"
+
+
+class StreamError(BaseModel):
+    type: Literal["error"] = "error"
+    detail: str
+
+
 class SubmitResponses(BaseModel):
     session_id: str
     responses: List[str]
 
 
+class SubmitAnswer(BaseModel):
+    session_id: str
+    index: int
+    response: str
+
+
+class SubmitAnswerResponse(BaseModel):
+    session_id: str
+    index: int
+    status: str
+
+
 class SubmitResponsesResponse(BaseModel):
     session_id: str
     candidate_id: str
     feedback: str
     overall_score: float
+
+
+class QuestionEvaluation(BaseModel):
+    type: Literal["evaluation"] = "evaluation"
+    index: int
+    question: str
+    # None, and error set, when the answer could not be evaluated.
+    score: Optional[int] = None
+    comment: str
+    error: bool = False
+
+
+class SubmitResponsesSummary(SubmitResponsesResponse):
+    type: Literal["summary"] = "summary"
+
+
+class EvaluationJobResponse(BaseModel):
+    job_id: str
+    session_id: str
+    status: str
+    attempts: int = 0
+    result: Optional[SubmitResponsesResponse] = None
+    error: Optional[str] = None
+
+
+class BatchStartInterviewRequest(BaseModel):
+    items: List[StartInterviewRequest]
+
+
+class BatchSubmitItem(SubmitResponses):
+    # Like the Idempotency-Key header of /interview/submit.
+    idempotency_key: Optional[str] = None
+
+
+class BatchSubmitResponses(BaseModel):
+    items: List[BatchSubmitItem]
+
+
+class BatchItemResult(BaseModel):
+    type: Literal["item"] = "item"
+    index: int
+    status: int
+    error: Optional[str] = None
+
+
+class BatchStartItemResult(BatchItemResult):
+    result: Optional[StartInterviewResponse] = None
+
+
+class BatchSubmitItemResult(BatchItemResult):
+    result: Optional[SubmitResponsesResponse] = None
+
+
+class BatchSummary(BaseModel):
+    type: Literal["summary"] = "summary"
+    total: int
+    succeeded: int
+    failed: int
+
+
+class SessionPage(BaseModel):
+    items: List[Dict[str, Any]]
+    # Pass as cursor to get the next page, None on the last page.
+    next_cursor: Optional[str] = None
+
+
+class SessionDetail(BaseModel):
+    session: Dict[str, Any]
+    evaluations: Optional[List[Dict[str, Any]]] = None
+
+
+class JobScoreStats(BaseModel):
+    job_title: Optional[str]
+    sessions: int
+    scored: int
+    avg_score: Optional[float] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    distribution: Dict[str, int]
+
+
+class ScoreStatsResponse(BaseModel):
+    since: Optional[datetime.datetime] = None
+    until: Optional[datetime.datetime] = None
+    jobs: List[JobScoreStats]
+
+
+class AnswerRanking(BaseModel):
+    question: str
+    score: Optional[int] = None
+    percentile: Optional[float] = None
+    cohort_size: int
+
+
+class SessionRanking(BaseModel):
+    session_id: str
+    overall_score: float
+    percentile: Optional[float] = None
+    cohort_size: int
+    quantiles: Dict[str, Optional[float]]
+    answers: List[AnswerRanking]
@@ -0,0 +1,133 @@
+import importlib
+
+import pytest
+
+from app.agents import budget, flow, providers
+from app.utils import metrics
+
+
+@pytest.fixture(autouse=True)
+def reload_flow_module():
+    importlib.reload(flow)
+
+
+@pytest.fixture
+def no_tiktoken(monkeypatch):
+    # Count with the four characters per token estimate.
+    monkeypatch.setattr(budget, "get_encoding", lambda: None)
+
+
+def test_clip_policies(no_tiktoken):
+    text = "a" * 400 + "z" * 400
+
+    assert budget.clip(text, 200) == text
+    assert budget.clip(text, 50, "none") == text
+    assert budget.clip(text, 50, "head") == "a" * 200
+
+    clipped = budget.clip(text, 50, "head_tail")
+    head, tail = clipped.split(budget.ELISION)
+    assert set(head) == {"a"} and set(tail) == {"z"}
+    assert budget.count_tokens(clipped) <= 52
+
+    with pytest.raises(ValueError):
+        budget.clip(text, 50, "summarize")
+
+
+def test_count_tokens_with_tiktoken():
+    tiktoken = pytest.importorskip("tiktoken")
+    encoding = tiktoken.get_encoding("cl100k_base")
+    text = "Senior Python engineer <|endoftext|>"
+    assert budget.count_tokens(text) == len(
+        encoding.encode(text, disallowed_special=())
+    )
+
+
+@pytest.mark.asyncio
+async def test_long_job_description_condensed_once(no_tiktoken, monkeypatch):
+    monkeypatch.setattr(budget, "JOB_DESCRIPTION_CONDENSE_TOKENS", 20)
+    job_description = "Backend engineer. " + "We offer great benefits. " * 50
+    prompts = []
+
+    async def dummy_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
+        prompts.append((prompt, max_tokens))
+        if prompt.startswith("Summarize"):
+            return "Backend engineer."
+        return "1. Q1?\n2. Q2?\n3. Q3?"
+
+    monkeypatch.setattr(flow, "call_llm", dummy_call_api)
+
+    assert await flow.generate_questions(job_description) == [
+        "1. Q1?",
+        "2. Q2?",
+        "3. Q3?",
+    ]
+    # The summary is reused when the questions are generated again.
+    flow.question_cache.clear()
+    assert len(await flow.generate_questions(job_description)) == 3
+
+    summaries = [p for p in prompts if p[0].startswith("Summarize")]
+    assert summaries == [
+        (
+            budget.create_condense_prompt(job_description),
+            budget.JOB_DESCRIPTION_CONDENSED_TOKENS,
+        )
+    ]
+    questions_prompt, max_tokens = prompts[1]
+    assert questions_prompt.endswith(
+        "role: Backend engineer.. List each question on a new line."
+    )
+    assert max_tokens == budget.QUESTIONS_MAX_OUTPUT_TOKENS
+
+
+@pytest.mark.asyncio
+async def test_condensing_failure_truncates(no_tiktoken, monkeypatch):
+    monkeypatch.setattr(budget, "JOB_DESCRIPTION_CONDENSE_TOKENS", 20)
+
+    async def failing_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
+        raise providers.LLMError("down")
+
+    monkeypatch.setattr(flow, "call_llm", failing_call_api)
+    condensed = await flow.condense_job_description("x" * 1000)
+    assert condensed == "x" * 80
+
+
+@pytest.mark.asyncio
+async def test_long_answers_clipped_and_truncation_counted(no_tiktoken, monkeypatch):
+    monkeypatch.setattr(budget, "ANSWER_MAX_TOKENS", 10)
+    provider = providers.StubProvider(
+        providers.StubSettings(
+            latency_distribution="constant",
+            latency_ms=0,
+            latency_spread_ms=0,
+            ms_per_token=0,
+            error_rate=0,
+            completion_tokens=500,
+            seed=0,
+        )
+    )
+    monkeypatch.setattr(providers, "_provider", provider)
+    seen = []
+    complete = provider.complete
+
+    async def recording_complete(prompt, max_tokens, temperature):
+        seen.append(prompt)
+        return await complete(prompt, max_tokens, temperature)
+
+    monkeypatch.setattr(provider, "complete", recording_complete)
+    truncated = metrics.LLM_TRUNCATED_COMPLETIONS.value(route="none")
+
+    score, _ = await flow.evaluate_response("Why?", "because " * 100)
+    assert 1 <= score <= 5
+    assert "because because" in seen[0]
+    assert budget.ELISION in seen[0]
+    assert seen[0].count("because") < 20
+    assert metrics.LLM_TRUNCATED_COMPLETIONS.value(route="none") == truncated + 1
+
+
+def test_evaluation_cache_key_covers_the_answer_budget(monkeypatch):
+    key = flow.evaluation_cache_key("Why?", "Because.")
+    monkeypatch.setattr(budget, "ANSWER_MAX_TOKENS", 10)
+    clipped_key = flow.evaluation_cache_key("Why?", "Because.")
+    assert clipped_key != key
+    monkeypatch.setattr(budget, "ANSWER_TRUNCATION_POLICY", "head")
+    assert flow.evaluation_cache_key("Why?", "Because.") != clipped_key
@@ -0,0 +1,40 @@
+import pytest
+
+from app.agents import client
+
+
+def make_settings(**overrides) -> client.OpenAISettings:
+    values = dict(
+        api_key="test-key",
+        model_name="test-model",
+        max_tokens=50,
+        temperature=0.1,
+        timeout_seconds=5,
+        max_connections=7,
+        max_keepalive_connections=3,
+        keepalive_expiry_seconds=10,
+        http2=False,
+    )
+    values.update(overrides)
+    return client.OpenAISettings(**values)
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("OPENAI_MODEL_NAME", "gpt-test")
+    monkeypatch.setenv("OPENAI_MODEL_MAX_TOKENS", "42")
+    monkeypatch.setenv("OPENAI_MAX_CONNECTIONS", "12")
+    settings = client.OpenAISettings.from_env()
+    assert settings.model_name == "gpt-test"
+    assert settings.max_tokens == 42
+    assert settings.max_connections == 12
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reused_and_closed():
+    shared = client.init_client(make_settings())
+    assert client.get_client() is shared
+    assert client.get_client() is shared
+    assert client.get_settings().model_name == "test-model"
+
+    await client.close_client()
+    assert client._client is None
@@ -1,8 +1,10 @@
+import asyncio
+import dataclasses
 import importlib
 
 import pytest
 
-from app.agents import flow
+from app.agents import flow, providers, question_bank
 
 
 # Ensure the flow module is reloaded before each test.
@@ -19,10 +21,10 @@ async def test_generate_questions(monkeypatch):
         "3. Describe your teamwork experience."
     )
 
-    async def dummy_call_api(prompt: str) -> str:
+    async def dummy_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
         return dummy_questions_response
 
-    monkeypatch.setattr(flow, "call_OpenAI_API", dummy_call_api)
+    monkeypatch.setattr(flow, "call_llm", dummy_call_api)
 
     job_description = "Software Engineer"
     questions = await flow.generate_questions(job_description)
@@ -35,14 +37,32 @@ async def test_generate_questions(monkeypatch):
     assert questions == expected_questions
 
 
+@pytest.mark.asyncio
+async def test_generate_questions_served_from_question_bank(monkeypatch):
+    bank = question_bank.QuestionBank(min_similarity=0.8, top_k=2)
+    bank.build({"site reliability engineer": ["What is an SLO?", "Why toil?"]})
+    monkeypatch.setattr(question_bank, "bank", bank)
+
+    async def fail_call_api(prompt: str) -> str:
+        raise AssertionError("The LLM should not be called")
+
+    monkeypatch.setattr(flow, "call_llm", fail_call_api)
+
+    expected = ["1. What is an SLO?", "2. Why toil?"]
+    assert await flow.generate_questions("Site Reliability Engineer") == expected
+    assert [q async for q in flow.stream_questions("Site reliability engineer")] == (
+        expected
+    )
+
+
 @pytest.mark.asyncio
 async def test_evaluate_response(monkeypatch):
     dummy_evaluation_response = "Score: 4, Comment: Good job."
 
-    async def dummy_call_api(prompt: str) -> str:
+    async def dummy_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
         return dummy_evaluation_response
 
-    monkeypatch.setattr(flow, "call_OpenAI_API", dummy_call_api)
+    monkeypatch.setattr(flow, "call_llm", dummy_call_api)
 
     question = "What is your experience with Python?"
     candidate_response = "I have been programming in Python for 5 years."
@@ -63,3 +83,263 @@ async def test_validate_scores():
 
     assert overall_score == pytest.approx(4.0)
     assert feedback == "Overall performance is satisfactory."
+
+
+@pytest.mark.asyncio
+async def test_validate_scores_without_any_score_fails():
+    evaluations = [{"score": None, "comment": "Evaluation could not be completed."}]
+    with pytest.raises(flow.EvaluationFailed):
+        await flow.validate_scores(evaluations)
+
+
+@pytest.mark.asyncio
+async def test_evaluate_responses_runs_concurrently(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def dummy_evaluate_response(question: str, response_text: str) -> tuple:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return (4, f"Evaluated {response_text}")
+
+    monkeypatch.setattr(flow, "evaluate_response", dummy_evaluate_response)
+
+    questions = ["Q1", "Q2", "Q3"]
+    responses = ["A1", "A2", "A3"]
+    evaluations = await flow.evaluate_responses(questions, responses)
+
+    assert max_in_flight == 3
+    assert [e["comment"] for e in evaluations] == [
+        "Evaluated A1",
+        "Evaluated A2",
+        "Evaluated A3",
+    ]
+
+
+class ScriptedProvider(providers.LLMProvider):
+    """
+    Provider answering evaluation prompts by question, see complete.
+    """
+
+    name = "scripted"
+
+    def __init__(self, hangs=0):
+        self.hangs = hangs
+        self.calls = 0
+
+    async def complete(self, prompt, max_tokens, temperature):
+        self.calls += 1
+        if "Question: Q2" in prompt:
+            raise providers.LLMError("API unavailable")
+        if "Question: Q3" in prompt or self.calls <= self.hangs:
+            await asyncio.sleep(1)
+        return providers.Completion("Score: 5, Comment: Great.", 10, 5)
+
+
+def no_retry_delay(monkeypatch, max_retries: int) -> None:
+    monkeypatch.setattr(
+        flow.llm_limiter,
+        "settings",
+        dataclasses.replace(
+            flow.llm_limiter.settings, retry_base_seconds=0, max_retries=max_retries
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_evaluate_responses_partial_failure(monkeypatch):
+    monkeypatch.setattr(providers, "_provider", ScriptedProvider())
+    monkeypatch.setattr(flow, "EVALUATION_TIMEOUT_SECONDS", 0.05)
+    no_retry_delay(monkeypatch, max_retries=1)
+
+    evaluations = await flow.evaluate_responses(["Q1", "Q2", "Q3"], ["A1", "A2", "A3"])
+
+    assert [e["score"] for e in evaluations] == [5, None, None]
+    assert [e["error"] for e in evaluations] == [False, True, True]
+    assert evaluations[0]["comment"] == "Great."
+    assert evaluations[1]["comment"] == "Evaluation could not be completed."
+    assert evaluations[2]["comment"] == "Evaluation could not be completed."
+
+
+@pytest.mark.asyncio
+async def test_evaluation_timeout_applies_to_each_attempt(monkeypatch):
+    provider = ScriptedProvider(hangs=1)
+    monkeypatch.setattr(providers, "_provider", provider)
+    monkeypatch.setattr(flow, "EVALUATION_TIMEOUT_SECONDS", 0.05)
+    no_retry_delay(monkeypatch, max_retries=1)
+    # Waiting for the limiter does not count against the timeout.
+    flow.llm_limiter.pause(0.1)
+
+    (evaluation,) = await flow.evaluate_responses(["Q1"], ["A1"])
+
+    assert evaluation["score"] == 5
+    # The first attempt timed out and was retried.
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_evaluate_responses_batched(monkeypatch):
+    prompts = []
+
+    async def dummy_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
+        prompts.append(prompt)
+        if prompt.startswith("Evaluate the candidate's response to each"):
+            # The second item is missing from the batched answer.
+            return "Item 1: Score: 5, Comment: Great.\nItem 3: Score: 2, Comment: Weak."
+        return "Score: 4, Comment: Retried."
+
+    monkeypatch.setattr(flow, "call_llm", dummy_call_api)
+    monkeypatch.setattr(flow, "EVALUATION_MODE", "batched")
+
+    evaluations = await flow.evaluate_responses(["Q1", "Q2", "Q3"], ["A1", "A2", "A3"])
+
+    assert [(e["score"], e["comment"]) for e in evaluations] == [
+        (5, "Great."),
+        (4, "Retried."),
+        (2, "Weak."),
+    ]
+    # One batched call plus one per-answer fallback for the missing item.
+    assert len(prompts) == 2
+    assert "Question: Q2\nResponse: A2" in prompts[1]
+
+
+@pytest.mark.asyncio
+async def test_generate_questions_is_cached(monkeypatch):
+    calls = 0
+
+    async def dummy_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "Question A?\nQuestion B?\nQuestion C?"
+
+    monkeypatch.setattr(flow, "call_llm", dummy_call_api)
+
+    # Concurrent starts for the same role share one call, later ones hit the cache.
+    results = await asyncio.gather(
+        flow.generate_questions("Data Engineer"),
+        flow.generate_questions("  data   engineer "),
+    )
+    again = await flow.generate_questions("Data Engineer")
+
+    expected_questions = ["Question A?", "Question B?", "Question C?"]
+    assert results[0] == results[1] == again == expected_questions
+    assert calls == 1
+    assert flow.question_cache.stats()["memory"]["hits"] == 1
+
+
+def test_question_cache_key_covers_the_provider(monkeypatch):
+    monkeypatch.setattr(providers, "_provider", None)
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    openai_key = flow.question_cache_key("Data Engineer")
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    assert flow.question_cache_key("Data Engineer") != openai_key
+
+
+def test_evaluation_cache_key_covers_the_provider(monkeypatch):
+    monkeypatch.setattr(providers, "_provider", None)
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    openai_key = flow.evaluation_cache_key("Q1", "A1")
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    assert flow.evaluation_cache_key("Q1", "A1") != openai_key
+
+
+@pytest.mark.asyncio
+async def test_identical_answers_are_evaluated_once(monkeypatch):
+    prompts = []
+
+    async def dummy_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
+        prompts.append(prompt)
+        if "Response: unparseable" in prompt:
+            return "No score here."
+        return "Score: 4, Comment: Solid."
+
+    monkeypatch.setattr(flow, "call_llm", dummy_call_api)
+
+    questions = ["Q1", "Q1", "Q2"]
+    first = await flow.evaluate_responses(questions, ["Same answer", "", ""])
+    # A retried submit with the same answers, modulo case and whitespace.
+    again = await flow.evaluate_responses(questions, ["same  answer ", "", ""])
+
+    assert [(e["score"], e["comment"]) for e in again] == [
+        (e["score"], e["comment"]) for e in first
+    ]
+    assert len(prompts) == 3
+
+    # Answers that could not be parsed are asked for again.
+    await flow.evaluate_responses(["Q1"], ["unparseable"])
+    await flow.evaluate_responses(["Q1"], ["unparseable"])
+    assert len(prompts) == 5
+
+
+@pytest.mark.asyncio
+async def test_batched_evaluation_skips_cached_pairs(monkeypatch):
+    prompts = []
+
+    async def dummy_call_api(prompt: str, max_tokens=None, timeout=None) -> str:
+        prompts.append(prompt)
+        return "Item 1: Score: 5, Comment: Great."
+
+    monkeypatch.setattr(flow, "call_llm", dummy_call_api)
+    monkeypatch.setattr(flow, "EVALUATION_MODE", "batched")
+
+    await flow.evaluate_responses(["Q1"], ["A1"])
+    evaluations = await flow.evaluate_responses(["Q1", "Q2"], ["A1", "A2"])
+
+    assert [e["score"] for e in evaluations] == [5, 5]
+    assert len(prompts) == 2
+    assert "Question: Q1" not in prompts[1]
+
+
+class FakeStreamingProvider(providers.LLMProvider):
+    name = "fake"
+
+    def __init__(self, chunks, failures=0):
+        self.chunks = chunks
+        self.failures = failures
+        self.calls = 0
+        self.released = asyncio.Event()
+
+    async def complete(self, prompt, max_tokens, temperature):
+        raise NotImplementedError
+
+    async def stream(self, prompt, max_tokens, temperature):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise providers.RateLimitedError("429", retry_after=0)
+        yield self.chunks[0]
+        # The rest of the completion only arrives once the first question is out.
+        await self.released.wait()
+        for chunk in self.chunks[1:]:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_questions_yields_each_question_early(monkeypatch):
+    provider = FakeStreamingProvider(
+        ["Question A?\nQues", "tion B?\n", "Question C?"], failures=1
+    )
+    monkeypatch.setattr(providers, "_provider", provider)
+    monkeypatch.setattr(
+        flow.llm_limiter,
+        "settings",
+        dataclasses.replace(flow.llm_limiter.settings, retry_base_seconds=0),
+    )
+
+    stream = flow.stream_questions("Platform Engineer")
+    assert await stream.__anext__() == "Question A?"
+    provider.released.set()
+    rest = [question async for question in stream]
+
+    assert rest == ["Question B?", "Question C?"]
+    # Rate limited once before the first chunk, then retried.
+    assert provider.calls == 2
+
+    # The complete set is cached for both the streaming and the regular path.
+    cached = [question async for question in flow.stream_questions("Platform Engineer")]
+    assert cached == await flow.generate_questions("platform engineer")
+    assert cached == ["Question A?", "Question B?", "Question C?"]
+    assert provider.calls == 2
@@ -1,10 +1,13 @@
 import pytest
 
 from app.agents.helpers import (
+    QuestionStreamParser,
     compute_overall_score,
+    create_batch_evaluation_prompt,
     create_evaluation_prompt,
     create_questions_prompt,
     determine_feedback,
+    parse_batch_evaluation_result,
     parse_evaluation_result,
     parse_questions_response,
 )
@@ -68,13 +71,63 @@ def test_parse_evaluation_result(input_text, expected_score, expected_comment):
 
 
 def test_parse_evaluation_result_invalid():
-    # If parsing fails, default to 3 and error message.
+    # If parsing fails, the result is unscored with an error message.
     input_text = "Some invalid format"
     score, comment = parse_evaluation_result(input_text)
-    assert score == 3
+    assert score is None
     assert comment == "Evaluation could not be parsed."
 
 
+# --- Tests for create_batch_evaluation_prompt ---
+def test_create_batch_evaluation_prompt():
+    pairs = [("Question A?", "Answer A."), ("Question B?", "Answer B.")]
+    prompt = create_batch_evaluation_prompt(pairs)
+    assert "Item 1:\nQuestion: Question A?\nResponse: Answer A." in prompt
+    assert "Item 2:\nQuestion: Question B?\nResponse: Answer B." in prompt
+    assert "Item <number>: Score: <score>, Comment: <comment>" in prompt
+
+
+# --- Tests for parse_batch_evaluation_result ---
+def test_parse_batch_evaluation_result():
+    result_text = (
+        "Item 1: Score: 4, Comment: Good experience.\n"
+        "Item 2: Score: 2, Comment: Too vague.\n"
+        "3. Score: 5"
+    )
+    results = parse_batch_evaluation_result(result_text, 3)
+    assert results == [
+        (4, "Good experience."),
+        (2, "Too vague."),
+        (5, "No comment provided."),
+    ]
+
+
+def test_parse_batch_evaluation_result_partial():
+    # Missing, unparseable, repeated and out-of-range items are reported as None.
+    result_text = (
+        "Item 1: Score: four, Comment: Hmm.\n"
+        "Item 2: Score: 3, Comment: Fine.\n"
+        "Item 3: Score: 4, Comment: First.\n"
+        "Item 3: Score: 2, Comment: Second.\n"
+        "Item 7: Score: 5, Comment: Out of range."
+    )
+    results = parse_batch_evaluation_result(result_text, 4)
+    assert results == [None, (3, "Fine."), None, None]
+
+
+# --- Tests for QuestionStreamParser ---
+def test_question_stream_parser_matches_parse_questions_response():
+    text = "\n1. What is X?\n  \n2. Why Y?\n3. How Z?\n4. Extra?"
+    parser = QuestionStreamParser()
+    completed = [parser.feed(text[i : i + 4]) for i in range(0, len(text), 4)]
+    parser.close()
+
+    assert parser.questions == parse_questions_response(text)
+    # Questions are returned by the chunk that ends their line.
+    assert [q for chunk in completed for q in chunk] == parser.questions
+    assert QuestionStreamParser().close() == []
+
+
 # --- Tests for compute_overall_score ---
 def test_compute_overall_score():
     evaluations = [{"score": 4}, {"score": 5}, {"score": 3}]
@@ -82,6 +135,12 @@ def test_compute_overall_score():
     assert overall == pytest.approx(4.0)
 
 
+def test_compute_overall_score_leaves_out_failed_evaluations():
+    evaluations = [{"score": 4}, {"score": None}, {"score": 5}]
+    assert compute_overall_score(evaluations) == pytest.approx(4.5)
+    assert compute_overall_score([{"score": None}]) is None
+
+
 # --- Tests for determine_feedback ---
 @pytest.mark.parametrize(
     "overall_score, expected_feedback",
@@ -0,0 +1,96 @@
+import pytest
+
+from app.agents import flow, providers
+from app.agents.helpers import (
+    create_batch_evaluation_prompt,
+    create_evaluation_prompt,
+    create_questions_prompt,
+    parse_batch_evaluation_result,
+    parse_evaluation_result,
+    parse_questions_response,
+)
+
+
+def make_stub(**overrides) -> providers.StubProvider:
+    values = dict(
+        latency_distribution="constant",
+        latency_ms=0,
+        latency_spread_ms=0,
+        ms_per_token=0,
+        error_rate=0,
+        completion_tokens=20,
+        seed=1,
+    )
+    values.update(overrides)
+    return providers.StubProvider(providers.StubSettings(**values))
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_returns_parseable_completions():
+    stub = make_stub()
+
+    completion = await stub.complete(
+        create_questions_prompt("Software Engineer"), max_tokens=100, temperature=0
+    )
+    assert len(parse_questions_response(completion.text)) == 3
+    assert completion.completion_tokens == 20
+    assert completion.prompt_tokens > 0
+
+    prompt = create_evaluation_prompt("Question?", "Answer.")
+    first = await stub.complete(prompt, max_tokens=10, temperature=0)
+    second = await stub.complete(prompt, max_tokens=10, temperature=0)
+    score, comment = parse_evaluation_result(first.text)
+    assert 1 <= score <= 5
+    assert comment == "Stub evaluation."
+    assert first.text == second.text
+    assert first.completion_tokens == 10
+
+    batch = create_batch_evaluation_prompt([("Q1", "A1"), ("Q2", "A2")])
+    completion = await stub.complete(batch, max_tokens=100, temperature=0)
+    assert None not in parse_batch_evaluation_result(completion.text, 2)
+
+
+@pytest.mark.parametrize(
+    "distribution", ["constant", "uniform", "normal", "lognormal", "exponential"]
+)
+def test_stub_latency_distributions_are_reproducible(distribution):
+    first = make_stub(
+        latency_distribution=distribution, latency_ms=100, latency_spread_ms=20
+    )
+    second = make_stub(
+        latency_distribution=distribution, latency_ms=100, latency_spread_ms=20
+    )
+    samples = [first.sample_latency(0) for _ in range(50)]
+    assert samples == [second.sample_latency(0) for _ in range(50)]
+    assert all(sample >= 0 for sample in samples)
+
+
+def test_stub_latency_per_token():
+    stub = make_stub(latency_ms=100, ms_per_token=2)
+    assert stub.sample_latency(50) == pytest.approx(0.2)
+
+
+@pytest.mark.asyncio
+async def test_stub_error_rate():
+    stub = make_stub(error_rate=1)
+    with pytest.raises(providers.LLMError):
+        await stub.complete("prompt", max_tokens=10, temperature=0)
+
+
+@pytest.mark.asyncio
+async def test_flow_uses_selected_provider(monkeypatch):
+    monkeypatch.setenv("STUB_LLM_COMPLETION_TOKENS", "5")
+    providers.init_provider("stub")
+    try:
+        questions = await flow.generate_questions("Stub Engineer")
+        score, _ = await flow.evaluate_response(questions[0], "Answer.")
+    finally:
+        await providers.close_provider()
+
+    assert len(questions) == 3
+    assert 1 <= score <= 5
+
+
+def test_unknown_provider():
+    with pytest.raises(ValueError):
+        providers.init_provider("unknown")
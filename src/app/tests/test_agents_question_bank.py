@@ -0,0 +1,125 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.agents.question_bank import (
+    QuestionBank,
+    TfidfIndex,
+    import_generated_questions,
+    strip_numbering,
+)
+from app.models import BankedQuestion, Base
+
+engine_test = create_async_engine(
+    "sqlite+aiosqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+async_session_test = sessionmaker(
+    engine_test, class_=AsyncSession, expire_on_commit=False
+)
+
+
+@pytest_asyncio.fixture
+async def setup_database():
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+JOB_DESCRIPTIONS = [
+    "Senior Python backend engineer, FastAPI and PostgreSQL",
+    "Frontend developer with React and TypeScript",
+    "Data engineer building Spark pipelines",
+]
+
+
+def test_tfidf_index_ranks_by_similarity():
+    index = TfidfIndex(JOB_DESCRIPTIONS)
+
+    matches = index.search("Python backend engineer (FastAPI, PostgreSQL)", k=2)
+    assert [row for row, _ in matches] == [0, 2]
+    assert matches[0][1] > 0.8 > matches[1][1]
+
+    [(row, similarity)] = index.search(JOB_DESCRIPTIONS[0].upper(), k=1)
+    assert row == 0
+    assert similarity == pytest.approx(1.0, abs=1e-5)
+    assert index.search("Chef", k=3) == []
+
+
+def test_unknown_terms_lower_similarity():
+    index = TfidfIndex(JOB_DESCRIPTIONS)
+    exact = index.search("Frontend developer", k=1)[0][1]
+    diluted = index.search("Frontend developer for embedded Rust firmware", k=1)[0][1]
+    assert diluted < exact
+
+
+def test_lookup_serves_numbered_questions_above_threshold():
+    bank = QuestionBank(min_similarity=0.8, top_k=3)
+    bank.build(
+        {
+            JOB_DESCRIPTIONS[0]: ["Explain the GIL?", "How do you use asyncio?"],
+            JOB_DESCRIPTIONS[1]: ["What is a React hook?", "Why TypeScript?", "CSS?"],
+        }
+    )
+
+    assert bank.lookup("Frontend developer with React and TypeScript") == [
+        "1. What is a React hook?",
+        "2. Why TypeScript?",
+        "3. CSS?",
+    ]
+    # Too few questions for the best match and nothing else is close enough.
+    assert bank.lookup(JOB_DESCRIPTIONS[0]) is None
+    assert bank.lookup("Embedded firmware engineer") is None
+    assert bank.stats()["hits"] == 1
+    assert bank.stats()["misses"] == 2
+
+    bank.enabled = False
+    assert bank.lookup("Frontend developer with React and TypeScript") is None
+
+
+def test_strip_numbering():
+    assert strip_numbering("1. What is Python?") == "What is Python?"
+    assert strip_numbering("  2) Why?") == "Why?"
+    assert strip_numbering("What is 1. about?") == "What is 1. about?"
+
+
+@pytest.mark.asyncio
+async def test_import_and_load_approved_questions(setup_database):
+    async with async_session_test() as db:
+        for number, job_description in enumerate(
+            [JOB_DESCRIPTIONS[1], " frontend developer with react and typescript "]
+        ):
+            crud.create_session(
+                db,
+                f"session-{number}",
+                "cand",
+                job_description,
+                ["1. What is a React hook?", "2. Why TypeScript?", "3. CSS?"],
+            )
+        await db.commit()
+
+    assert await import_generated_questions(async_session_test) == 3
+    # Already banked questions are not imported twice.
+    assert await import_generated_questions(async_session_test, approve=True) == 0
+
+    bank = QuestionBank(min_similarity=0.8, top_k=3)
+    assert await bank.load(async_session_test) == 0
+    assert bank.lookup(JOB_DESCRIPTIONS[1]) is None
+
+    async with async_session_test() as db:
+        for question in (await db.execute(select(BankedQuestion))).scalars():
+            question.approved = True
+        await db.commit()
+    assert await bank.load(async_session_test) == 3
+    assert bank.lookup(JOB_DESCRIPTIONS[1]) == [
+        "1. What is a React hook?",
+        "2. Why TypeScript?",
+        "3. CSS?",
+    ]
@@ -0,0 +1,152 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.agents import providers, rate_limit
+from app.agents.providers import Completion, RateLimitedError
+
+
+def make_limiter(**overrides) -> rate_limit.LLMRateLimiter:
+    values = dict(
+        requests_per_minute=0,
+        tokens_per_minute=0,
+        initial_concurrency=4,
+        min_concurrency=1,
+        max_concurrency=8,
+        backoff_factor=0.5,
+        latency_target_seconds=0,
+        max_retries=3,
+        retry_base_seconds=0.001,
+        retry_max_seconds=0.01,
+    )
+    values.update(overrides)
+    return rate_limit.LLMRateLimiter(rate_limit.RateLimitSettings(**values))
+
+
+def test_token_bucket_reservations_queue_up(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    bucket = rate_limit.TokenBucket(per_minute=60)
+
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1)
+    assert bucket.reserve(1) == pytest.approx(2)
+    now[0] += 2
+    bucket.adjust(-2)
+    assert bucket.reserve(1) == 0
+    assert rate_limit.TokenBucket(per_minute=0).reserve(10**6) == 0
+
+
+def test_adaptive_limit_increases_additively_and_backs_off():
+    limit = rate_limit.AdaptiveConcurrencyLimit(
+        initial=4, minimum=1, maximum=8, latency_target_seconds=1
+    )
+    # About one extra slot per limit's worth of successful calls.
+    for _ in range(5):
+        limit.in_flight += 1
+        limit.release(latency=0.1)
+    assert int(limit.limit) == 5
+
+    limit.in_flight += 1
+    limit.release(rate_limited=True)
+    assert int(limit.limit) == 2
+
+    backed_off = limit.limit
+    limit.in_flight += 1
+    limit.release(latency=5)
+    assert limit.limit == pytest.approx(backed_off * 0.9)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_is_enforced():
+    limiter = make_limiter(initial_concurrency=2, max_concurrency=2)
+    active = peak = 0
+
+    async def attempt():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return Completion("ok", 1, 1)
+
+    await asyncio.gather(*(limiter.call(attempt, 10) for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.stats()["calls"] == 6
+    assert limiter.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_calls_are_retried_after_the_hint():
+    limiter = make_limiter()
+    calls = []
+
+    async def attempt():
+        calls.append(asyncio.get_running_loop().time())
+        if len(calls) == 1:
+            raise RateLimitedError("429", retry_after=0.05)
+        return Completion("ok", 1, 1)
+
+    completion = await limiter.call(attempt, 10)
+
+    assert completion.text == "ok"
+    assert calls[1] - calls[0] >= 0.05
+    stats = limiter.stats()
+    assert stats["retries"] == 1
+    assert stats["rate_limited"] == 1
+    assert stats["concurrency_limit"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded_and_other_errors_are_not_retried():
+    limiter = make_limiter(max_retries=2)
+    attempts = 0
+
+    async def transient():
+        nonlocal attempts
+        attempts += 1
+        raise providers.TransientLLMError("503")
+
+    with pytest.raises(providers.TransientLLMError):
+        await limiter.call(transient, 10)
+    assert attempts == 3
+
+    async def permanent():
+        raise providers.LLMError("bad request")
+
+    with pytest.raises(providers.LLMError):
+        await limiter.call(permanent, 10)
+    assert limiter.stats()["retries"] == 2
+    assert limiter.concurrency.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_enforces_requests_per_minute():
+    stub = providers.StubProvider(
+        providers.StubSettings(
+            latency_distribution="constant",
+            latency_ms=0,
+            latency_spread_ms=0,
+            ms_per_token=0,
+            error_rate=0,
+            completion_tokens=5,
+            seed=1,
+            requests_per_minute=2,
+        )
+    )
+    await stub.complete("Score this", max_tokens=5, temperature=0)
+    await stub.complete("Score this", max_tokens=5, temperature=0)
+    with pytest.raises(RateLimitedError) as exc_info:
+        await stub.complete("Score this", max_tokens=5, temperature=0)
+    assert 0 < exc_info.value.retry_after <= 60
+
+
+def test_retry_after_headers():
+    response = httpx.Response(429, headers={"retry-after-ms": "250"})
+    assert providers._retry_after(response) == 0.25
+    assert (
+        providers._retry_after(httpx.Response(429, headers={"retry-after": "3"})) == 3
+    )
+    assert providers._retry_after(httpx.Response(429)) is None
@@ -0,0 +1,78 @@
+import copy
+
+import pytest
+
+from app.agents import providers
+from app.benchmarks.interview_api import (
+    compare,
+    main,
+    percentile,
+    run_benchmark,
+)
+
+
+def test_percentile():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert percentile(values, 0.5) == 3.0
+    assert percentile(values, 0.95) == pytest.approx(4.8)
+    assert percentile([], 0.5) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_smoke(tmp_path):
+    stub_settings = providers.StubSettings(
+        latency_distribution="constant",
+        latency_ms=5,
+        latency_spread_ms=0,
+        ms_per_token=0,
+        error_rate=0,
+        completion_tokens=10,
+        seed=0,
+    )
+    report = await run_benchmark(
+        sessions=6,
+        concurrency=3,
+        roles=2,
+        warmup=0,
+        database_url=f"sqlite+aiosqlite:///{tmp_path}/bench.db",
+        stub_settings=stub_settings,
+        reset_database=True,
+    )
+
+    for endpoint in ("start", "submit"):
+        stats = report["endpoints"][endpoint]
+        assert stats["requests"] == 6
+        assert stats["errors"] == 0
+        assert stats["rps"] > 0
+        assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"]
+    assert report["endpoints"]["submit"]["breakdown_ms"]["llm"] >= 5
+    assert report["memory"]["peak_bytes_per_session"] > 0
+
+    assert compare(report, report, max_regression=0.2) == []
+    slower = copy.deepcopy(report)
+    slower["endpoints"]["submit"]["latency_ms"]["p95"] *= 2
+    assert compare(slower, report, max_regression=0.2) == [
+        f"submit p95 {report['endpoints']['submit']['latency_ms']['p95']:.1f}ms -> "
+        f"{slower['endpoints']['submit']['latency_ms']['p95']:.1f}ms"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_refuses_to_reset_a_database_unconfirmed(tmp_path):
+    with pytest.raises(ValueError):
+        await run_benchmark(database_url=f"sqlite+aiosqlite:///{tmp_path}/app.db")
+    assert not (tmp_path / "app.db").exists()
+
+    with pytest.raises(SystemExit):
+        main(["--database-url", f"sqlite+aiosqlite:///{tmp_path}/app.db"])
+
+
+def test_startup_benchmark_smoke():
+    from app.benchmarks.startup import METRICS, run_benchmark
+
+    report = run_benchmark(runs=1)
+    (sample,) = report["runs"]
+    assert set(sample) == set(METRICS)
+    assert 0 < sample["import_seconds"] < sample["ready_seconds"]
+    assert sample["rss_mb"] > 0
+    assert report["summary"]["rss_mb"]["max"] == sample["rss_mb"]
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.future import select
+
+from app.database import (
+    PROFILES,
+    InstrumentedAsyncQueuePool,
+    create_engine_from_settings,
+    get_engine_settings,
+    pool_stats,
+    routing_session_factory,
+)
+from app.models import Base, CacheEntry
+from app.utils import metrics
+
+
+def test_engine_settings_profiles(monkeypatch):
+    monkeypatch.setenv("DB_PROFILE", "prod")
+    assert get_engine_settings() == PROFILES["prod"]
+    assert get_engine_settings().echo is False
+
+    monkeypatch.setenv("DB_POOL_SIZE", "42")
+    monkeypatch.setenv("DB_ECHO", "true")
+    settings = get_engine_settings()
+    assert settings.pool_size == 42
+    assert settings.echo is True
+    assert settings.max_overflow == PROFILES["prod"].max_overflow
+
+
+def test_unknown_engine_profile_is_rejected(monkeypatch):
+    monkeypatch.setenv("DB_PROFILE", "production")
+    with pytest.raises(ValueError, match="dev, prod"):
+        get_engine_settings()
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_record_checkouts(tmp_path):
+    settings = PROFILES["prod"]
+    engine = create_engine_from_settings(
+        f"sqlite+aiosqlite:///{tmp_path}/pool.db", settings, name="test"
+    )
+    assert isinstance(engine.sync_engine.pool, InstrumentedAsyncQueuePool)
+    waits = metrics.DB_POOL_CHECKOUT_WAIT.count(pool="test")
+
+    async with engine.connect():
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 1
+        assert stats["saturation"] == pytest.approx(
+            1 / (settings.pool_size + settings.max_overflow)
+        )
+        assert metrics.DB_POOL_CHECKED_OUT.value(pool="test") == 1
+        assert metrics.DB_POOL_SATURATION.value(pool="test") == stats["saturation"]
+    async with engine.connect():
+        pass
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 2
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
+    # Also exported for /ops/metrics scrapes.
+    assert metrics.DB_POOL_CHECKOUT_WAIT.count(pool="test") == waits + 2
+    assert metrics.DB_POOL_CHECKED_OUT.value(pool="test") == 0
+    assert 'db_pool_saturation{pool="test"} 0.0' in metrics.render_prometheus()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_routing_session_reads_replica_until_first_write(tmp_path):
+    settings = PROFILES["prod"]
+    primary = create_engine_from_settings(
+        f"sqlite+aiosqlite:///{tmp_path}/primary.db", settings
+    )
+    replica = create_engine_from_settings(
+        f"sqlite+aiosqlite:///{tmp_path}/replica.db", settings
+    )
+    for engine, name in ((primary, "primary"), (replica, "replica")):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                insert(CacheEntry), [{"namespace": "db", "key": "name", "value": name}]
+            )
+
+    session_factory = routing_session_factory(primary, replica)
+    query = select(CacheEntry.value).where(CacheEntry.namespace == "db")
+    name = query.where(CacheEntry.key == "name")
+    async with session_factory() as db:
+        assert await db.scalar(name) == "replica"
+        await db.execute(text("SELECT 1"))
+        assert await db.scalar(name) == "replica"
+
+        db.add(CacheEntry(namespace="db", key="written", value="new"))
+        await db.flush()
+        # Sticks to the primary to read its own writes.
+        assert await db.scalar(query.where(CacheEntry.key == "written")) == "new"
+        await db.commit()
+
+    async with session_factory() as db:
+        assert await db.scalar(name.with_for_update()) == "primary"
@@ -0,0 +1,170 @@
+import csv
+import datetime
+import io
+
+import orjson
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, exports
+from app.database import get_read_session_factory
+from app.main import app
+from app.models import Base, InterviewSession
+
+engine_test = create_async_engine(
+    "sqlite+aiosqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+async_session_test = sessionmaker(
+    engine_test, class_=AsyncSession, expire_on_commit=False
+)
+
+SUBMITTED = datetime.datetime(2025, 3, 1)
+
+
+@pytest_asyncio.fixture
+async def setup_database():
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session_test() as db:
+        for number in range(3):
+            crud.create_session(
+                db,
+                f"s{number}",
+                "cand",
+                "Engineer" if number < 2 else "Designer",
+                ["Q1", "Q2"],
+            )
+        # Never submitted, never exported.
+        crud.create_session(db, "s3", "cand", "Engineer", ["Q1"])
+        await db.commit()
+        for number in range(3):
+            await crud.save_submission(
+                db,
+                f"s{number}",
+                ["A1", "A2"],
+                [{"score": 4, "comment": "Good."}, {"score": 2, "comment": "Weak."}],
+                "Fine.",
+                3.0,
+            )
+            await db.execute(
+                update(InterviewSession)
+                .where(InterviewSession.id == f"s{number}")
+                .values(submitted_at=SUBMITTED + datetime.timedelta(days=number))
+            )
+        await db.commit()
+    yield
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+async def collect(kind, fmt, cutoff, **filters) -> bytes:
+    chunks = exports.export(
+        async_session_test, kind, fmt, cutoff, batch_size=2, **filters
+    )
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.asyncio
+async def test_export_evaluations_ndjson_from_watermark(setup_database):
+    cutoff = SUBMITTED + datetime.timedelta(days=2)
+    body = await collect(
+        "evaluations",
+        "ndjson",
+        cutoff,
+        watermark=SUBMITTED + datetime.timedelta(days=1),
+    )
+    rows = [orjson.loads(line) for line in body.splitlines()]
+    assert [(row["session_id"], row["position"]) for row in rows] == [
+        ("s1", 0),
+        ("s1", 1),
+    ]
+    assert rows[1]["question"] == "Q2"
+    assert rows[1]["response"] == "A2"
+    assert rows[1]["score"] == 2
+    assert set(rows[0]) == set(exports.columns("evaluations"))
+
+
+@pytest.mark.asyncio
+async def test_export_sessions_csv_filtered_by_job(setup_database):
+    body = await collect(
+        "sessions", "csv", datetime.datetime(2030, 1, 1), job_title="Engineer"
+    )
+    rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+    assert [row["session_id"] for row in rows] == ["s0", "s1"]
+    assert rows[0]["submitted_at"] == SUBMITTED.isoformat()
+    assert rows[0]["overall_score"] == "3.0"
+
+
+@pytest.mark.asyncio
+async def test_export_parquet_row_groups(setup_database):
+    pq = pytest.importorskip("pyarrow.parquet")
+    body = await collect("evaluations", "parquet", datetime.datetime(2030, 1, 1))
+    parquet = pq.ParquetFile(io.BytesIO(body))
+    # One row group per batch of two rows.
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column("session_id").to_pylist() == [
+        "s0",
+        "s0",
+        "s1",
+        "s1",
+        "s2",
+        "s2",
+    ]
+    assert table.column("score").to_pylist() == [4, 2] * 3
+
+
+@pytest.mark.asyncio
+async def test_export_to_file_advances_watermark(setup_database, tmp_path, monkeypatch):
+    watermark_file = str(tmp_path / "sessions.watermark")
+    monkeypatch.setattr(
+        exports, "export_cutoff", lambda: SUBMITTED + datetime.timedelta(days=1)
+    )
+    output = io.BytesIO()
+    await exports.export_to_file(
+        async_session_test, "sessions", "ndjson", output, watermark_file
+    )
+    assert [
+        orjson.loads(line)["session_id"] for line in output.getvalue().splitlines()
+    ] == ["s0"]
+    assert exports.read_watermark(watermark_file) == SUBMITTED + datetime.timedelta(
+        days=1
+    )
+
+    monkeypatch.setattr(exports, "export_cutoff", lambda: datetime.datetime(2030, 1, 1))
+    output = io.BytesIO()
+    await exports.export_to_file(
+        async_session_test, "sessions", "ndjson", output, watermark_file
+    )
+    assert [
+        orjson.loads(line)["session_id"] for line in output.getvalue().splitlines()
+    ] == ["s1", "s2"]
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint(setup_database):
+    app.dependency_overrides[get_read_session_factory] = lambda: async_session_test
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get(
+                "/export/sessions", params={"format": "csv", "job_title": "Designer"}
+            )
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/csv")
+            assert "X-Export-Watermark" in response.headers
+            assert response.text.splitlines()[1].startswith("s2,")
+
+            response = await client.get("/export/sessions", params={"format": "xml"})
+            assert response.status_code == 400
+            assert (await client.get("/export/candidates")).status_code == 404
+    finally:
+        del app.dependency_overrides[get_read_session_factory]
@@ -1,5 +1,6 @@
 import asyncio
 import importlib
+import json
 
 import pytest
 import pytest_asyncio
@@ -11,13 +12,23 @@ from app import agents, main
 importlib.reload(agents)
 importlib.reload(main)
 
-from app.database import get_db
+from app import crud, ranking
+from app.database import get_db, get_session_factory
 from app.main import app
-from app.models import Base
+from app.models import (
+    AnswerDraft,
+    Base,
+    InterviewEvaluation,
+    InterviewSession,
+    ScoreSketchBin,
+)
+from app.workers import answers
+from app.workers.evaluation import EvaluationWorkerPool
 
 # Use a file-based SQLite database for testing.
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -40,6 +51,7 @@ async def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_session_factory] = lambda: async_session_test
 
 
 # Use an async fixture for setting up and tearing down the database.
@@ -73,6 +85,8 @@ def override_flow(monkeypatch):
 # Reload the router module so that it picks up our monkeypatched functions.
 importlib.reload(__import__("app.routers.interview", fromlist=[""]))
 
+from app.routers import interview
+
 
 # Create an async client fixture using ASGITransport.
 @pytest_asyncio.fixture
@@ -123,3 +137,610 @@ async def test_submit_responses(async_client: AsyncClient):
     assert submit_data["candidate_id"] == "1"
     assert submit_data["overall_score"] == pytest.approx(4.0)
     assert submit_data["feedback"] == "Overall performance is satisfactory."
+
+
+@pytest.mark.asyncio
+async def test_submit_responses_stream(async_client: AsyncClient):
+    start_payload = {"candidate_id": "2", "job_description": "Data Engineer"}
+    start_response = await async_client.post("/interview/start", json=start_payload)
+    session_id = start_response.json()["session_id"]
+
+    submit_payload = {
+        "session_id": session_id,
+        "responses": ["Answer 1", "Answer 2", "Answer 3"],
+    }
+    async with async_client.stream(
+        "POST", "/interview/submit/stream", json=submit_payload
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) async for line in response.aiter_lines() if line]
+
+    evaluations = [line for line in lines if line["type"] == "evaluation"]
+    assert sorted(line["index"] for line in evaluations) == [0, 1, 2]
+    assert all(line["score"] == 4 for line in evaluations)
+    assert lines[-1] == {
+        "type": "summary",
+        "session_id": session_id,
+        "candidate_id": "2",
+        "feedback": "Overall performance is satisfactory.",
+        "overall_score": 4.0,
+    }
+
+    # The evaluations were persisted with the session.
+    async with async_session_test() as db:
+        session_record = await db.get(InterviewSession, session_id)
+        assert session_record.overall_score == pytest.approx(4.0)
+        scores = await db.execute(
+            select(InterviewEvaluation.score).where(
+                InterviewEvaluation.session_id == session_id
+            )
+        )
+        assert list(scores.scalars()) == [4, 4, 4]
+
+
+@pytest.mark.asyncio
+async def test_submit_responses_stream_unknown_session(async_client: AsyncClient):
+    submit_payload = {"session_id": "missing", "responses": ["Answer 1"]}
+    response = await async_client.post("/interview/submit/stream", json=submit_payload)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_submit_responses_async(async_client: AsyncClient):
+    start_payload = {"candidate_id": "3", "job_description": "QA Engineer"}
+    start_response = await async_client.post("/interview/start", json=start_payload)
+    session_id = start_response.json()["session_id"]
+
+    submit_payload = {
+        "session_id": session_id,
+        "responses": ["Answer 1", "Answer 2", "Answer 3"],
+    }
+    submit_response = await async_client.post(
+        "/interview/submit/async", json=submit_payload
+    )
+    assert submit_response.status_code == 202, submit_response.text
+    job = submit_response.json()
+    assert job["status"] == "queued"
+
+    pool = EvaluationWorkerPool(async_session_test)
+    job_id = await pool.claim_job()
+    assert job_id == job["job_id"]
+    await pool.process_job(job_id)
+
+    status_response = await async_client.get(f"/interview/jobs/{job_id}")
+    assert status_response.status_code == 200
+    status = status_response.json()
+    assert status["status"] == "done"
+    assert status["attempts"] == 1
+    assert status["result"] == {
+        "session_id": session_id,
+        "candidate_id": "3",
+        "feedback": "Overall performance is satisfactory.",
+        "overall_score": 4.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_evaluation_job_not_found(async_client: AsyncClient):
+    response = await async_client.get("/interview/jobs/missing")
+    assert response.status_code == 404
+
+
+async def start_session(async_client: AsyncClient, candidate_id: str) -> str:
+    start_payload = {"candidate_id": candidate_id, "job_description": "SRE"}
+    start_response = await async_client.post("/interview/start", json=start_payload)
+    return start_response.json()["session_id"]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submits_return_the_first_result(
+    async_client: AsyncClient, monkeypatch
+):
+    calls = 0
+    evaluate_responses = flow.evaluate_responses
+
+    async def counting_evaluate_responses(questions, responses):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return await evaluate_responses(questions, responses)
+
+    monkeypatch.setattr(flow, "evaluate_responses", counting_evaluate_responses)
+    session_id = await start_session(async_client, "4")
+    submit_payload = {"session_id": session_id, "responses": ["A1", "A2", "A3"]}
+
+    # Concurrent duplicates share one evaluation, a later retry reads the result.
+    first, second = await asyncio.gather(
+        async_client.post("/interview/submit", json=submit_payload),
+        async_client.post("/interview/submit", json=submit_payload),
+    )
+    retry = await async_client.post("/interview/submit", json=submit_payload)
+    assert first.status_code == second.status_code == retry.status_code == 200
+    assert first.json() == second.json() == retry.json()
+    assert calls == 1
+
+    # A new idempotency key is a new submit.
+    response = await async_client.post(
+        "/interview/submit", json=submit_payload, headers={"Idempotency-Key": "k2"}
+    )
+    assert response.status_code == 200
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_started_session_submits_skip_question_reads(
+    async_client: AsyncClient, monkeypatch
+):
+    session_id = await start_session(async_client, "4b")
+
+    async def fail_read(db, session_id):
+        raise AssertionError("The questions should come from started_sessions")
+
+    monkeypatch.setattr(crud, "get_session", fail_read)
+    monkeypatch.setattr(crud, "get_questions", fail_read)
+    submit_payload = {"session_id": session_id, "responses": ["A1", "A2"]}
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 400
+
+    submit_payload["responses"].append("A3")
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 200
+    retry = await async_client.post("/interview/submit", json=submit_payload)
+    assert retry.json() == response.json()
+
+
+@pytest.mark.asyncio
+async def test_retries_of_a_submit_stored_elsewhere_return_its_result(
+    async_client: AsyncClient, monkeypatch
+):
+    session_id = await start_session(async_client, "4c")
+    responses = ["A1", "A2", "A3"]
+    # Another process stores the submit, this one still has the session cached.
+    async with async_session_test() as db:
+        assert await crud.save_submission(
+            db,
+            session_id,
+            responses,
+            [{"score": 3, "comment": "Stored."}] * 3,
+            "Stored elsewhere.",
+            3.0,
+            key=crud.submission_key(session_id, responses),
+            expected_version=0,
+        )
+        await db.commit()
+    assert interview.started_sessions.get(session_id) is not None
+
+    async def fail_evaluate_responses(questions, responses):
+        raise AssertionError("A duplicate submit should not be evaluated")
+
+    monkeypatch.setattr(flow, "evaluate_responses", fail_evaluate_responses)
+    monkeypatch.setattr(flow, "iter_evaluations", fail_evaluate_responses)
+    submit_payload = {"session_id": session_id, "responses": responses}
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 200, response.text
+    assert response.json()["feedback"] == "Stored elsewhere."
+
+    async with async_client.stream(
+        "POST", "/interview/submit/stream", json=submit_payload
+    ) as response:
+        assert response.status_code == 200
+        lines = [json.loads(line) async for line in response.aiter_lines() if line]
+    assert [line["score"] for line in lines[:-1]] == [3, 3, 3]
+    assert lines[-1]["type"] == "summary"
+    assert lines[-1]["overall_score"] == pytest.approx(3.0)
+
+
+@pytest.mark.asyncio
+async def test_submit_racing_another_submit_gets_conflict(
+    async_client: AsyncClient, monkeypatch
+):
+    evaluate_responses = flow.evaluate_responses
+    session_id = await start_session(async_client, "5")
+
+    async def evaluate_while_another_submit_starts(questions, responses):
+        async with async_session_test() as db:
+            session_record = await crud.get_session(db, session_id)
+            assert await crud.claim_submission(
+                db, session_id, "other", session_record.version
+            )
+            await db.commit()
+        return await evaluate_responses(questions, responses)
+
+    monkeypatch.setattr(
+        flow, "evaluate_responses", evaluate_while_another_submit_starts
+    )
+    submit_payload = {"session_id": session_id, "responses": ["A1", "A2", "A3"]}
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 409
+
+    async with async_session_test() as db:
+        session_record = await db.get(InterviewSession, session_id)
+        assert session_record.submission_key == "other"
+        assert session_record.overall_score is None
+
+
+@pytest.mark.asyncio
+async def test_failed_evaluations_are_left_out_of_the_overall_score(
+    async_client: AsyncClient, monkeypatch
+):
+    async def evaluate_unless_broken(question: str, response_text: str) -> tuple:
+        if response_text.startswith("Broken"):
+            raise RuntimeError("API unavailable")
+        return (len(response_text), "Evaluated")
+
+    monkeypatch.setattr(flow, "evaluate_response", evaluate_unless_broken)
+    session_id = await start_session(async_client, "failed")
+    submit_payload = {"session_id": session_id, "responses": ["Ok", "Broken", "Okay"]}
+    async with async_client.stream(
+        "POST", "/interview/submit/stream", json=submit_payload
+    ) as response:
+        lines = [json.loads(line) async for line in response.aiter_lines() if line]
+
+    evaluations = sorted(lines[:-1], key=lambda line: line["index"])
+    assert [line["score"] for line in evaluations] == [2, None, 4]
+    assert [line["error"] for line in evaluations] == [False, True, False]
+    assert lines[-1]["overall_score"] == pytest.approx(3.0)
+
+    # No score is invented when no answer could be evaluated.
+    session_id = await start_session(async_client, "failed-all")
+    submit_payload = {"session_id": session_id, "responses": ["Broken"] * 3}
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 502
+    async with async_session_test() as db:
+        session_record = await db.get(InterviewSession, session_id)
+        assert session_record.overall_score is None
+
+
+@pytest.mark.asyncio
+async def test_duplicate_async_submit_returns_the_same_job(async_client: AsyncClient):
+    session_id = await start_session(async_client, "6")
+    submit_payload = {"session_id": session_id, "responses": ["A1", "A2", "A3"]}
+
+    first = await async_client.post("/interview/submit/async", json=submit_payload)
+    second = await async_client.post("/interview/submit/async", json=submit_payload)
+    assert first.status_code == second.status_code == 202
+    assert first.json()["job_id"] == second.json()["job_id"]
+
+
+@pytest.mark.asyncio
+async def test_start_interviews_batch(async_client: AsyncClient, monkeypatch):
+    job_descriptions = []
+
+    async def counting_generate_questions(job_description: str) -> list:
+        job_descriptions.append(job_description)
+        return await dummy_generate_questions(job_description)
+
+    monkeypatch.setattr(flow, "generate_questions", counting_generate_questions)
+    items = [
+        {"candidate_id": "b1", "job_description": "Backend Engineer"},
+        {"candidate_id": "b2", "job_description": "backend  engineer"},
+        {"candidate_id": "b3", "job_description": "Designer"},
+    ]
+    response = await async_client.post("/interview/start/batch", json={"items": items})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    # One generation per distinct job description.
+    assert len(job_descriptions) == 2
+    results = sorted(lines[:-1], key=lambda line: line["index"])
+    assert [line["status"] for line in results] == [200, 200, 200]
+    assert [line["result"]["candidate_id"] for line in results] == ["b1", "b2", "b3"]
+    assert lines[-1] == {"type": "summary", "total": 3, "succeeded": 3, "failed": 0}
+
+    async with async_session_test() as db:
+        session_record = await db.get(
+            InterviewSession, results[1]["result"]["session_id"]
+        )
+        assert session_record.candidate_id == "b2"
+
+
+@pytest.mark.asyncio
+async def test_submit_responses_batch(async_client: AsyncClient):
+    first = await start_session(async_client, "b4")
+    second = await start_session(async_client, "b5")
+    answers = ["A1", "A2", "A3"]
+    items = [
+        {"session_id": first, "responses": answers},
+        {"session_id": "missing", "responses": answers},
+        {"session_id": second, "responses": ["A1"]},
+        {"session_id": first, "responses": answers},
+        {"session_id": second, "responses": answers},
+        {"session_id": second, "responses": ["B1", "B2", "B3"]},
+    ]
+    response = await async_client.post("/interview/submit/batch", json={"items": items})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    statuses = {line["index"]: line["status"] for line in lines[:-1]}
+    assert statuses == {0: 200, 1: 404, 2: 400, 3: 200, 4: 200, 5: 409}
+    assert lines[-1] == {"type": "summary", "total": 6, "succeeded": 3, "failed": 3}
+
+    async with async_session_test() as db:
+        for session_id in (first, second):
+            session_record = await db.get(InterviewSession, session_id)
+            assert session_record.overall_score == pytest.approx(4.0)
+
+    # Replaying the batch returns the stored results.
+    response = await async_client.post(
+        "/interview/submit/batch", json={"items": items[:1]}
+    )
+    assert json.loads(response.text.splitlines()[0])["result"]["overall_score"] == 4.0
+
+
+@pytest.mark.asyncio
+async def test_submit_responses_batch_with_idempotency_keys(
+    async_client: AsyncClient, monkeypatch
+):
+    calls = 0
+
+    async def counting_evaluate_response(question: str, response_text: str) -> tuple:
+        nonlocal calls
+        calls += 1
+        return (3, "Counted")
+
+    monkeypatch.setattr(flow, "evaluate_response", counting_evaluate_response)
+    flow.evaluation_cache.clear()
+    started = await start_session(async_client, "b6")
+    # A session created before the normalized schema, with its questions in the blob.
+    async with async_session_test() as db:
+        db.add(
+            InterviewSession(
+                id="legacy-batch",
+                candidate_id="b7",
+                session_data={"questions": ["Legacy 1?", "Legacy 2?"]},
+            )
+        )
+        await db.commit()
+
+    items = [
+        {
+            "session_id": started,
+            "responses": ["K1", "K2", "K3"],
+            "idempotency_key": "k1",
+        },
+        {"session_id": "legacy-batch", "responses": ["L1", "L2"]},
+    ]
+    response = await async_client.post("/interview/submit/batch", json={"items": items})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["status"] for line in lines[:-1]] == [200, 200]
+    assert calls == 5
+
+    # The key identifies the submit whatever the responses of the retry.
+    items[0]["responses"] = ["X1", "X2", "X3"]
+    response = await async_client.post(
+        "/interview/submit/batch", json={"items": items[:1]}
+    )
+    assert json.loads(response.text.splitlines()[0])["status"] == 200
+    assert calls == 5
+
+    items[0]["idempotency_key"] = "k2"
+    response = await async_client.post(
+        "/interview/submit/batch", json={"items": items[:1]}
+    )
+    assert json.loads(response.text.splitlines()[0])["status"] == 200
+    assert calls == 8
+    async with async_session_test() as db:
+        session_record = await db.get(InterviewSession, started)
+        assert session_record.version == 2
+        assert session_record.overall_score == pytest.approx(3.0)
+        # Claims made at an outdated version are refused.
+        assert await crud.claim_submissions(db, [(started, "k3", 1)]) == set()
+
+
+@pytest.mark.asyncio
+async def test_start_interview_stream(async_client: AsyncClient, monkeypatch):
+    async def dummy_stream_questions(job_description: str):
+        for question in await dummy_generate_questions(job_description):
+            yield question
+
+    monkeypatch.setattr(flow, "stream_questions", dummy_stream_questions)
+    payload = {"candidate_id": "7", "job_description": "Software Engineer"}
+    async with async_client.stream(
+        "POST", "/interview/start/stream", json=payload
+    ) as response:
+        assert response.status_code == 200
+        lines = [json.loads(line) async for line in response.aiter_lines() if line]
+
+    assert [line["type"] for line in lines] == [
+        "session",
+        "question",
+        "question",
+        "question",
+        "summary",
+    ]
+    session_id = lines[0]["session_id"]
+    assert [line["question"] for line in lines[1:4]] == lines[-1]["questions"]
+
+    # The session is stored once the stream completes and can be submitted.
+    submit_payload = {"session_id": session_id, "responses": ["A1", "A2", "A3"]}
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.asyncio
+async def test_start_interview_stream_reports_storage_errors(
+    async_client: AsyncClient, monkeypatch
+):
+    async def dummy_stream_questions(job_description: str):
+        for question in await dummy_generate_questions(job_description):
+            yield question
+
+    def failing_create_session(*args):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(flow, "stream_questions", dummy_stream_questions)
+    monkeypatch.setattr(crud, "create_session", failing_create_session)
+    payload = {"candidate_id": "8", "job_description": "Software Engineer"}
+    async with async_client.stream(
+        "POST", "/interview/start/stream", json=payload
+    ) as response:
+        assert response.status_code == 200
+        lines = [json.loads(line) async for line in response.aiter_lines() if line]
+
+    assert [line["type"] for line in lines][-2:] == ["question", "error"]
+    assert lines[-1]["detail"] == "The interview session could not be stored."
+
+
+@pytest.mark.asyncio
+async def test_answers_sent_ahead_are_evaluated_before_the_submit(
+    async_client: AsyncClient, monkeypatch
+):
+    async def evaluate_by_length(question: str, response_text: str) -> tuple:
+        return (len(response_text) % 5 + 1, "Evaluated ahead")
+
+    monkeypatch.setattr(flow, "evaluate_response", evaluate_by_length)
+    session_id = await start_session(async_client, "answers")
+
+    for index, answer in enumerate(["Early one", "Early three"]):
+        response = await async_client.post(
+            "/interview/answer",
+            json={"session_id": session_id, "index": index, "response": answer},
+        )
+        assert response.status_code == 202
+        assert response.json()["status"] == "evaluating"
+    await answers.stop()
+
+    evaluated = []
+    evaluate_responses = flow.evaluate_responses
+
+    async def recording_evaluate_responses(questions, responses):
+        evaluated.extend(responses)
+        return await evaluate_responses(questions, responses)
+
+    monkeypatch.setattr(flow, "evaluate_responses", recording_evaluate_responses)
+    # The second answer changed since it was sent, the third one was not sent.
+    submit_payload = {
+        "session_id": session_id,
+        "responses": ["Early one", "Changed", "Late"],
+    }
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 200
+    assert evaluated == ["Changed", "Late"]
+    assert response.json()["overall_score"] == pytest.approx((5 + 3 + 5) / 3)
+
+    async with async_session_test() as db:
+        drafts = await db.execute(
+            select(AnswerDraft).where(AnswerDraft.session_id == session_id)
+        )
+        assert drafts.first() is None
+
+    bad_index = {"session_id": session_id, "index": 3, "response": "?"}
+    response = await async_client.post("/interview/answer", json=bad_index)
+    assert response.status_code == 400
+    unknown = {"session_id": "missing", "index": 0, "response": "?"}
+    response = await async_client.post("/interview/answer", json=unknown)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_replaced_answer_cancels_its_evaluation(
+    async_client: AsyncClient, monkeypatch
+):
+    cancelled = []
+
+    async def slow_evaluate_response(question: str, response_text: str) -> tuple:
+        try:
+            await asyncio.sleep(0 if response_text == "Second" else 10)
+        except asyncio.CancelledError:
+            cancelled.append(response_text)
+            raise
+        return (5, "Evaluated ahead")
+
+    monkeypatch.setattr(flow, "evaluate_response", slow_evaluate_response)
+    session_id = await start_session(async_client, "replaced")
+
+    for answer in ("First", "Second"):
+        response = await async_client.post(
+            "/interview/answer",
+            json={"session_id": session_id, "index": 0, "response": answer},
+        )
+        assert response.json()["status"] == "evaluating"
+    await answers.stop(timeout=1)
+
+    assert cancelled == ["First"]
+    async with async_session_test() as db:
+        draft = await db.scalar(
+            select(AnswerDraft).where(AnswerDraft.session_id == session_id)
+        )
+        assert (draft.response, draft.score) == ("Second", 5)
+
+
+@pytest.mark.asyncio
+async def test_answers_past_the_pending_limit_are_only_stored(
+    async_client: AsyncClient, monkeypatch
+):
+    released = asyncio.Event()
+
+    async def blocked_evaluate_response(question: str, response_text: str) -> tuple:
+        await released.wait()
+        return (5, "Evaluated ahead")
+
+    monkeypatch.setattr(flow, "evaluate_response", blocked_evaluate_response)
+    monkeypatch.setattr(answers, "ANSWER_EVALUATION_MAX_PENDING", 1)
+    session_id = await start_session(async_client, "pending")
+
+    statuses = []
+    for index in range(2):
+        response = await async_client.post(
+            "/interview/answer",
+            json={"session_id": session_id, "index": index, "response": "Ahead"},
+        )
+        statuses.append(response.json()["status"])
+    assert statuses == ["evaluating", "stored"]
+    assert answers.pending() == 1
+    released.set()
+    await answers.stop()
+
+
+@pytest.mark.asyncio
+async def test_streamed_submits_are_counted_once_in_the_sketches(
+    async_client: AsyncClient,
+):
+    async def job_counts():
+        async with async_session_test() as db:
+            result = await db.execute(
+                select(ScoreSketchBin.bin, ScoreSketchBin.count).where(
+                    ScoreSketchBin.scope == ranking.JOB,
+                    ScoreSketchBin.key == ranking.sketch_key(ranking.JOB, "Sketched"),
+                    ScoreSketchBin.count != 0,
+                )
+            )
+            return sorted(result.all())
+
+    start_payload = {"candidate_id": "sketched", "job_description": "Sketched"}
+    start_response = await async_client.post("/interview/start", json=start_payload)
+    session_id = start_response.json()["session_id"]
+    submit_payload = {"session_id": session_id, "responses": ["A1", "A2", "A3"]}
+    async with async_client.stream(
+        "POST", "/interview/submit/stream", json=submit_payload
+    ) as response:
+        [line async for line in response.aiter_lines()]
+    four = int(ranking.score_bins(4.0))
+    assert await job_counts() == [(four, 1)]
+
+    # A resubmit replaces the streamed result instead of adding to it.
+    submit_payload["responses"] = ["B1", "B2", "B3"]
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 200, response.text
+    assert await job_counts() == [(four, 1)]
+
+    # A claim whose result was never stored, e.g. an interrupted stream, is not
+    # removed again by the next submit.
+    async with async_session_test() as db:
+        session_record = await db.get(InterviewSession, session_id)
+        assert await crud.claim_submission(
+            db, session_id, "interrupted", session_record.version
+        )
+        await db.commit()
+    assert await job_counts() == []
+    interview.started_sessions.clear()
+    submit_payload["responses"] = ["C1", "C2", "C3"]
+    response = await async_client.post("/interview/submit", json=submit_payload)
+    assert response.status_code == 200, response.text
+    assert await job_counts() == [(four, 1)]
+    async with async_session_test() as db:
+        negative = await db.execute(
+            select(ScoreSketchBin.count).where(ScoreSketchBin.count < 0)
+        )
+        assert negative.first() is None
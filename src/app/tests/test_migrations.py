@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.migrations.normalize_session_data import migrate
+from app.models import InterviewEvaluation, InterviewSession, job_title_key
+
+
+@pytest.mark.asyncio
+async def test_normalize_session_data_migration():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    # Table as created by the original schema, before the normalized tables.
+    submitted = {
+        "candidate_id": "1",
+        "questions": ["Q1", "Q2"],
+        "responses": ["A1", "A2"],
+        "evaluations": [
+            {"question": "Q1", "response": "A1", "score": 4, "comment": "Good."},
+            {"question": "Q2", "response": "A2", "score": 2, "comment": "Weak."},
+        ],
+        "feedback": "Candidate may need further evaluation.",
+        "overall_score": 3.0,
+    }
+    started = {"candidate_id": "2", "questions": ["Q3"], "responses": []}
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE interview_sessions (id VARCHAR PRIMARY KEY, "
+                "candidate_id VARCHAR, job_title VARCHAR, timestamp DATETIME, "
+                "session_data JSON)"
+            )
+        )
+        await conn.execute(
+            text(
+                "CREATE INDEX ix_interview_sessions_job_title "
+                "ON interview_sessions (job_title)"
+            )
+        )
+        for session_id, data in (("s1", submitted), ("s2", started)):
+            await conn.execute(
+                text(
+                    "INSERT INTO interview_sessions VALUES "
+                    "(:id, :candidate_id, 'Engineer', '2025-01-01 00:00:00', :data)"
+                ),
+                {
+                    "id": session_id,
+                    "candidate_id": data["candidate_id"],
+                    "data": json.dumps(data),
+                },
+            )
+
+    assert await migrate(engine, session_factory, batch_size=1) == 2
+    # Re-running skips migrated sessions.
+    assert await migrate(engine, session_factory) == 0
+
+    async with session_factory() as db:
+        assert await crud.get_questions(db, "s1") == ["Q1", "Q2"]
+        assert await crud.get_questions(db, "s2") == ["Q3"]
+        session_record = await crud.get_session(db, "s1")
+        assert session_record.overall_score == pytest.approx(3.0)
+        assert session_record.feedback == "Candidate may need further evaluation."
+        scores = await db.execute(
+            select(InterviewEvaluation.score)
+            .where(InterviewEvaluation.session_id == "s1")
+            .order_by(InterviewEvaluation.position)
+        )
+        assert list(scores.scalars()) == [4, 2]
+        assert (await crud.get_session(db, "s2")).overall_score is None
+        # Existing sessions get their job title digest, the new index replaces the
+        # one on job_title.
+        job_keys = await db.execute(select(InterviewSession.job_key))
+        assert set(job_keys.scalars()) == {job_title_key("Engineer")}
+
+    async with engine.connect() as conn:
+        indexes = await conn.run_sync(
+            lambda sync_conn: {
+                index["name"]
+                for index in inspect(sync_conn).get_indexes("interview_sessions")
+            }
+        )
+    assert "ix_interview_sessions_job_title" not in indexes
+    assert "ix_interview_sessions_job_key" in indexes
+    assert "ix_interview_sessions_job_key_score" in indexes
+
+    await engine.dispose()
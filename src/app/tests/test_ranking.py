@@ -0,0 +1,113 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, ranking
+from app.models import Base, ScoreSketchBin
+
+engine_test = create_async_engine(
+    "sqlite+aiosqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+async_session_test = sessionmaker(
+    engine_test, class_=AsyncSession, expire_on_commit=False
+)
+
+
+@pytest_asyncio.fixture
+async def setup_database():
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    ranking._sketch_cache.clear()
+    yield
+    ranking._sketch_cache.clear()
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+def test_sketch_percentiles_and_quantiles():
+    sketch = ranking.ScoreSketch.from_scores([1, 2, 2, 3, 4, 5, 5, 5])
+    assert sketch.total == 8
+    # One score below 2 and half of the two equal to it.
+    assert sketch.percentile(2) == pytest.approx(100 * 2 / 8)
+    assert sketch.percentile(5) == pytest.approx(100 * 6.5 / 8)
+    assert sketch.percentile(4.5) == pytest.approx(100 * 5 / 8)
+    assert sketch.quantile(0.5) == 3.0
+    assert sketch.quantile(1.0) == 5.0
+    assert ranking.ScoreSketch().percentile(3) is None
+
+    merged = sketch.merge(ranking.ScoreSketch.from_scores([1, 1]))
+    assert merged.total == 10
+    assert merged.percentile(1) == pytest.approx(100 * 1.5 / 10)
+    merged.add(10)
+    assert merged.percentile(5) < 100
+
+
+def test_question_keys_ignore_numbering_and_case():
+    assert ranking.sketch_key(
+        ranking.QUESTION, "1. What is the GIL?"
+    ) == ranking.sketch_key(ranking.QUESTION, " what is  the GIL?")
+    assert ranking.sketch_key(ranking.JOB, "Engineer") != ranking.sketch_key(
+        ranking.JOB, "engineer"
+    )
+
+
+async def stored_bins():
+    async with async_session_test() as db:
+        result = await db.execute(
+            select(
+                ScoreSketchBin.scope,
+                ScoreSketchBin.key,
+                ScoreSketchBin.bin,
+                ScoreSketchBin.count,
+            ).where(ScoreSketchBin.count != 0)
+        )
+        return sorted(result.all())
+
+
+async def submit(session_id, scores, version=None):
+    evaluations = [{"score": score, "comment": "."} for score in scores]
+    async with async_session_test() as db:
+        saved = await crud.save_submission(
+            db,
+            session_id,
+            ["A"] * len(scores),
+            evaluations,
+            "Fine.",
+            sum(scores) / len(scores),
+            expected_version=version,
+        )
+        await db.commit()
+    return saved
+
+
+@pytest.mark.asyncio
+async def test_submits_update_sketches_incrementally(setup_database):
+    async with async_session_test() as db:
+        for number in range(3):
+            crud.create_session(
+                db, f"s{number}", "cand", "Engineer", ["1. Q1", "2. Q2"]
+            )
+        await db.commit()
+
+    assert await submit("s0", [2, 2])
+    assert await submit("s1", [4, 4])
+    assert await submit("s2", [5, 3], version=0)
+    # A resubmit replaces the scores of the previous submit.
+    assert await submit("s2", [5, 5], version=1)
+
+    async with async_session_test() as db:
+        cohort = await ranking.get_sketch(db, ranking.JOB, "Engineer")
+        question = await ranking.get_sketch(db, ranking.QUESTION, "Q2")
+    assert cohort.total == 3
+    assert cohort.percentile(5.0) == pytest.approx(100 * 2.5 / 3)
+    assert question.total == 3
+    assert question.percentile(2) == pytest.approx(100 * 0.5 / 3)
+
+    incremental = await stored_bins()
+    assert await ranking.rebuild(async_session_test, batch_size=2) == len(incremental)
+    assert await stored_bins() == incremental
@@ -0,0 +1,192 @@
+import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.database import get_read_db
+from app.main import app
+from app.models import Base, InterviewSession
+from app.routers import sessions
+
+engine_test = create_async_engine(
+    "sqlite+aiosqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+async_session_test = sessionmaker(
+    engine_test, class_=AsyncSession, expire_on_commit=False
+)
+
+START = datetime.datetime(2025, 1, 1)
+
+
+async def override_get_read_db():
+    async with async_session_test() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def client():
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session_test() as db:
+        await db.execute(
+            insert(InterviewSession),
+            [
+                {
+                    "id": f"s{number}",
+                    "candidate_id": f"c{number % 2}",
+                    "job_title": "Engineer" if number < 4 else "Designer",
+                    # s0 and s1 share a timestamp, the id breaks the tie.
+                    "timestamp": START + datetime.timedelta(days=max(number, 1)),
+                    "session_data": {"questions": ["Legacy?"]},
+                    "overall_score": [1.0, 2.5, 5.0, None, 3.5][number],
+                }
+                for number in range(5)
+            ],
+        )
+        await db.commit()
+
+    previous = app.dependency_overrides.get(get_read_db)
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    sessions._stats_cache.clear()
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        yield ac
+    if previous is None:
+        del app.dependency_overrides[get_read_db]
+    else:
+        app.dependency_overrides[get_read_db] = previous
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_keyset_pagination(client):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/sessions", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == ["s4", "s3", "s2", "s1", "s0"]
+
+    item = page["items"][0]
+    assert set(item) == set(sessions.DEFAULT_SESSION_FIELDS)
+    assert "session_data" not in item
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_filters_and_fields(client):
+    response = await client.get(
+        "/sessions",
+        params={
+            "candidate_id": "c0",
+            "job_title": "Engineer",
+            "since": "2025-01-02T00:00:00",
+            "fields": "overall_score,session_data",
+        },
+    )
+    assert response.json() == {
+        "items": [
+            {
+                "id": "s2",
+                "overall_score": 5.0,
+                "session_data": {"questions": ["Legacy?"]},
+            },
+            {
+                "id": "s0",
+                "overall_score": 1.0,
+                "session_data": {"questions": ["Legacy?"]},
+            },
+        ],
+        "next_cursor": None,
+    }
+
+    response = await client.get("/sessions", params={"fields": "password"})
+    assert response.status_code == 400
+    response = await client.get("/sessions", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_score_stats_per_job(client):
+    response = await client.get("/sessions/stats/scores")
+    assert response.status_code == 200
+    engineer, designer = response.json()["jobs"]
+    assert engineer == {
+        "job_title": "Engineer",
+        "sessions": 4,
+        "scored": 3,
+        "avg_score": pytest.approx(17 / 6),
+        "min_score": 1.0,
+        "max_score": 5.0,
+        "distribution": {"1-2": 1, "2-3": 1, "3-4": 0, "4-5": 1},
+    }
+    assert designer["sessions"] == 1
+    assert designer["distribution"]["3-4"] == 1
+
+    response = await client.get("/sessions/stats/scores", params={"min_sessions": 2})
+    assert [job["job_title"] for job in response.json()["jobs"]] == ["Engineer"]
+
+
+@pytest.mark.asyncio
+async def test_get_session_detail(client):
+    async with async_session_test() as db:
+        crud.create_session(db, "s9", "c9", "Engineer", ["Q1"])
+        await db.commit()
+        await crud.save_submission(
+            db, "s9", ["A1"], [{"score": 4, "comment": "Good."}], "Strong.", 4.0
+        )
+        await db.commit()
+
+    response = await client.get(
+        "/sessions/s9", params={"fields": "overall_score", "include_evaluations": True}
+    )
+    assert response.json() == {
+        "session": {"id": "s9", "overall_score": 4.0},
+        "evaluations": [
+            {"question": "Q1", "response": "A1", "score": 4, "comment": "Good."}
+        ],
+    }
+    assert (await client.get("/sessions/missing")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_session_ranking(client):
+    async with async_session_test() as db:
+        for number, scores in enumerate([[1, 3], [4, 2], [5, 5]]):
+            crud.create_session(db, f"r{number}", "c", "Analyst", ["Q1", "Q2"])
+            await db.commit()
+            await crud.save_submission(
+                db,
+                f"r{number}",
+                ["A1", "A2"],
+                [{"score": score, "comment": "."} for score in scores],
+                "Fine.",
+                sum(scores) / 2,
+            )
+            await db.commit()
+
+    response = await client.get("/sessions/r1/ranking")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["overall_score"] == 3.0
+    assert body["percentile"] == 50.0
+    assert body["cohort_size"] == 3
+    assert body["quantiles"]["p50"] == 3.0
+    assert [answer["percentile"] for answer in body["answers"]] == [50.0, 16.7]
+
+    assert (await client.get("/sessions/s3/ranking")).status_code == 409
+    assert (await client.get("/sessions/missing/ranking")).status_code == 404
@@ -0,0 +1,160 @@
+import asyncio
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, CacheEntry
+from app.utils.cache import (
+    DatabaseCacheTier,
+    SingleFlight,
+    TieredCache,
+    TTLCache,
+    make_cache_key,
+    normalize_text,
+)
+
+engine_test = create_async_engine(
+    "sqlite+aiosqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+async_session_test = sessionmaker(
+    engine_test, class_=AsyncSession, expire_on_commit=False
+)
+
+
+@pytest_asyncio.fixture
+async def setup_database():
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+def test_cache_key_normalization():
+    assert normalize_text("  Senior   Python\nEngineer ") == "senior python engineer"
+    assert make_cache_key("a", 1) == make_cache_key("a", 1)
+    assert make_cache_key("a", 1) != make_cache_key("a", 2)
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl_seconds=5)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] += 6
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    single_flight = SingleFlight()
+    results = await asyncio.gather(*(single_flight.do("k", compute) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert single_flight.shared == 4
+    assert len(single_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancels_abandoned_calls():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def compute():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    single_flight = SingleFlight(cancel_abandoned=True)
+    callers = [asyncio.ensure_future(single_flight.do("k", compute)) for _ in range(2)]
+    await started.wait()
+    callers[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    callers[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert len(single_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_survives_restart(setup_database):
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return ["Q1", "Q2"]
+
+    cache = TieredCache(
+        "test", maxsize=10, persistent=True, session_factory=async_session_test
+    )
+    assert await cache.get_or_compute("k", compute) == ["Q1", "Q2"]
+    assert await cache.get_or_compute("k", compute) == ["Q1", "Q2"]
+    assert calls == 1
+    assert cache.stats()["memory"]["hits"] == 1
+
+    # A fresh process only has the database tier.
+    restarted = TieredCache(
+        "test", maxsize=10, persistent=True, session_factory=async_session_test
+    )
+    assert await restarted.get_or_compute("k", compute) == ["Q1", "Q2"]
+    assert calls == 1
+    assert restarted.stats()["database"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_database_tier_purges_expired_entries(setup_database):
+    tier = DatabaseCacheTier(
+        "test", ttl_seconds=60, session_factory=async_session_test, purge_interval=0
+    )
+    other = DatabaseCacheTier(
+        "other", ttl_seconds=60, session_factory=async_session_test
+    )
+    await tier.set("old", 1)
+    await other.set("old", 1)
+    async with async_session_test() as db:
+        expired = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        for entry in await db.scalars(select(CacheEntry)):
+            entry.expires_at = expired
+        await db.commit()
+
+    # Setting an entry deletes the expired entries of its namespace only.
+    await tier.set("new", 2)
+    async with async_session_test() as db:
+        rows = await db.execute(select(CacheEntry.namespace, CacheEntry.key))
+        assert sorted(rows.all()) == [("other", "old"), ("test", "new")]
+    assert tier.stats()["purged"] == 1
+    assert await tier.get("new") == 2
@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.utils import metrics
+from app.utils.log_config import JsonFormatter
+
+
+def test_histogram_render():
+    histogram = metrics.Histogram(
+        "test_duration_seconds", "Test histogram.", ("route",), buckets=(0.1, 1)
+    )
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    assert histogram.count(route="/a") == 3
+    assert histogram.sum(route="/a") == pytest.approx(5.55)
+    assert histogram.series() == {("/a",): (3, pytest.approx(5.55))}
+    assert histogram.render() == [
+        "# HELP test_duration_seconds Test histogram.",
+        "# TYPE test_duration_seconds histogram",
+        'test_duration_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_duration_seconds_bucket{route="/a",le="1"} 2',
+        'test_duration_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_duration_seconds_sum{route="/a"} 5.55',
+        'test_duration_seconds_count{route="/a"} 3',
+    ]
+    metrics.REGISTRY.remove(histogram)
+
+
+def test_counter_render():
+    counter = metrics.Counter("test_total", "Test counter.", ("kind",))
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    assert counter.value(kind="a") == 3
+    assert counter.render()[-1] == 'test_total{kind="a"} 3'
+    metrics.REGISTRY.remove(counter)
+
+
+def test_json_formatter_merges_dict_messages():
+    record = logging.makeLogRecord(
+        {"name": "app.middleware", "levelno": 20, "levelname": "INFO"}
+    )
+    record.msg = {"event": "request", "status": 200}
+    formatted = JsonFormatter().format(record)
+    assert '"event": "request"' in formatted
+    assert '"status": 200' in formatted
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_are_recorded_per_route():
+    before = metrics.REQUEST_LATENCY.count(
+        method="GET", route="/ops/cache", status="200"
+    )
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/ops/cache")
+        assert response.status_code == 200
+        exposition = (await client.get("/ops/metrics")).text
+
+    after = metrics.REQUEST_LATENCY.count(
+        method="GET", route="/ops/cache", status="200"
+    )
+    assert after == before + 1
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/ops/cache",'
+        'status="200"}' in exposition
+    )
+
+
+@pytest.mark.asyncio
+async def test_token_usage_per_route():
+    metrics.LLM_TOKENS.observe(120, provider="stub", route="/test/usage", kind="prompt")
+    metrics.LLM_TOKENS.observe(
+        30, provider="stub", route="/test/usage", kind="completion"
+    )
+    metrics.LLM_TRUNCATED_COMPLETIONS.inc(route="/test/usage")
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        usage = (await client.get("/ops/token-usage")).json()["routes"]
+
+    assert usage["/test/usage"] == {
+        "calls": 1,
+        "prompt_tokens": 120,
+        "completion_tokens": 30,
+        "truncated_completions": 1,
+    }
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.agents import flow, providers
+from app.utils import tracing
+
+
+@pytest.fixture
+def exporter():
+    exporter = tracing.configure("memory")
+    yield exporter
+    tracing.configure("none")
+
+
+def test_span_is_noop_when_disabled():
+    tracing.configure("none")
+    with tracing.span("noop") as span:
+        assert span is None
+        tracing.set_attribute("ignored", 1)
+    assert tracing.traces()["resourceSpans"][0]["scopeSpans"][0]["spans"] == []
+
+
+@pytest.mark.asyncio
+async def test_nested_spans_share_the_trace(exporter):
+    @tracing.traced("inner")
+    async def inner():
+        tracing.set_attribute("llm.retries", 2)
+
+    with tracing.span("outer", **{"http.route": "/x"}):
+        await inner()
+
+    inner_span, outer_span = exporter.spans
+    assert inner_span.trace_id == outer_span.trace_id
+    assert inner_span.parent_span_id == outer_span.span_id
+    assert inner_span.attributes == {"llm.retries": 2}
+
+    spans = tracing.traces()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [span["name"] for span in spans] == ["inner", "outer"]
+    assert spans[0]["attributes"] == [
+        {"key": "llm.retries", "value": {"intValue": "2"}}
+    ]
+
+
+def test_span_records_errors(exporter):
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError("boom")
+    assert exporter.spans[0].to_otlp()["status"]["code"] == 2
+
+
+@pytest.mark.asyncio
+async def test_call_llm_span_has_token_counts(exporter, monkeypatch):
+    stub = providers.StubProvider(providers.StubSettings.from_env())
+    monkeypatch.setattr(providers, "_provider", stub)
+
+    await flow.call_llm("Evaluate this answer.")
+
+    (span,) = exporter.spans
+    assert span.name == "flow.call_llm"
+    assert span.attributes["llm.provider"] == "stub"
+    assert span.attributes["llm.completion_tokens"] > 0
+    assert span.attributes["llm.retries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_instrument_engine_records_db_spans(exporter):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    tracing.instrument_engine(engine)
+    with tracing.span("request"):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    await engine.dispose()
+
+    names = [span.name for span in exporter.spans]
+    assert "db.select" in names
+    db_span = exporter.spans[names.index("db.select")]
+    assert db_span.attributes["db.system"] == "sqlite"
+    assert db_span.trace_id == exporter.spans[-1].trace_id
+
+
+@pytest.mark.asyncio
+async def test_db_spans_outside_requests_are_sampled(exporter, monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    tracing.instrument_engine(engine)
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    # Like the queries of a background worker, without a request span.
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    assert not exporter.spans
+
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await engine.dispose()
+    assert [span.name for span in exporter.spans] == ["db.select"]
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure("file", path=str(path))
+    with tracing.span("exported"):
+        pass
+    tracing.configure("none")
+
+    document = json.loads(path.read_text().splitlines()[0])
+    span = document["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "exported"
@@ -0,0 +1,197 @@
+import asyncio
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.agents import flow
+from app.models import Base, EvaluationJob, InterviewResponse, InterviewSession
+from app.workers.evaluation import EvaluationWorkerPool
+
+engine_test = create_async_engine(
+    "sqlite+aiosqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+async_session_test = sessionmaker(
+    engine_test, class_=AsyncSession, expire_on_commit=False
+)
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def setup_database():
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session_test() as db:
+        db.add(
+            InterviewSession(
+                id="session-1",
+                candidate_id="1",
+                job_title="Software Engineer",
+                session_data={"candidate_id": "1", "questions": ["Q1", "Q2"]},
+            )
+        )
+        db.add(
+            EvaluationJob(
+                id="job-1",
+                session_id="session-1",
+                status="queued",
+                responses=["A1", "A2"],
+                attempts=0,
+            )
+        )
+        await db.commit()
+    yield
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    # Lease heartbeats use the shared connection concurrently, which binds it to the
+    # event loop of the test, so the next test gets a new one.
+    await engine_test.dispose()
+
+
+async def get_job(job_id: str) -> EvaluationJob:
+    async with async_session_test() as db:
+        return await db.get(EvaluationJob, job_id)
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_processes_queued_job(monkeypatch):
+    async def dummy_evaluate_response(question: str, response_text: str) -> tuple:
+        return (5, "Great.")
+
+    monkeypatch.setattr(flow, "evaluate_response", dummy_evaluate_response)
+
+    pool = EvaluationWorkerPool(async_session_test, workers=1, poll_seconds=0.01)
+    await pool.start()
+    # Poll the pool rather than the database, the test engine shares one connection.
+    for _ in range(100):
+        if pool.processed:
+            break
+        await asyncio.sleep(0.01)
+    await pool.stop()
+
+    job = await get_job("job-1")
+    assert job.status == "done"
+    assert job.result["overall_score"] == pytest.approx(5.0)
+    assert pool.processed == 1
+    async with async_session_test() as db:
+        session_record = await db.get(InterviewSession, "session-1")
+        assert session_record.overall_score == pytest.approx(5.0)
+        responses = await db.execute(
+            select(InterviewResponse.text).order_by(InterviewResponse.position)
+        )
+        assert list(responses.scalars()) == ["A1", "A2"]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_marked_failed(monkeypatch):
+    async def broken_validate_scores(evaluations):
+        raise RuntimeError("boom")
+
+    async def dummy_evaluate_response(question: str, response_text: str) -> tuple:
+        return (5, "Great.")
+
+    monkeypatch.setattr(flow, "evaluate_response", dummy_evaluate_response)
+    monkeypatch.setattr(flow, "validate_scores", broken_validate_scores)
+
+    pool = EvaluationWorkerPool(
+        async_session_test, max_attempts=2, retry_base_seconds=0
+    )
+    assert await pool.claim_job() == "job-1"
+    await pool.process_job("job-1")
+    job = await get_job("job-1")
+    assert job.status == "queued"
+    assert "boom" in job.error
+
+    assert await pool.claim_job() == "job-1"
+    await pool.process_job("job-1")
+    job = await get_job("job-1")
+    assert job.status == "failed"
+    assert job.attempts == 2
+    assert await pool.claim_job() is None
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed():
+    pool = EvaluationWorkerPool(async_session_test, lease_seconds=60)
+    assert await pool.claim_job() == "job-1"
+    assert await pool.claim_job() is None
+
+    async with async_session_test() as db:
+        job = await db.get(EvaluationJob, "job-1")
+        job.updated_at = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+        await db.commit()
+
+    assert await pool.claim_job() == "job-1"
+    assert (await get_job("job-1")).attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_job_losing_the_submit_race_fails_without_retry(monkeypatch):
+    async def racing_evaluate_response(question: str, response_text: str) -> tuple:
+        # Another submit of the session is stored while the job is evaluated.
+        async with async_session_test() as db:
+            session_record = await db.get(InterviewSession, "session-1")
+            session_record.version += 1
+            session_record.overall_score = 2.0
+            await db.commit()
+        return (5, "Great.")
+
+    monkeypatch.setattr(flow, "evaluate_response", racing_evaluate_response)
+    flow.evaluation_cache.clear()
+
+    pool = EvaluationWorkerPool(async_session_test, retry_base_seconds=0)
+    assert await pool.claim_job() == "job-1"
+    await pool.process_job("job-1")
+
+    job = await get_job("job-1")
+    assert job.status == "failed"
+    assert job.attempts == 1
+    assert "SubmissionConflict" in job.error
+    assert await pool.claim_job() is None
+    async with async_session_test() as db:
+        session_record = await db.get(InterviewSession, "session-1")
+        assert session_record.overall_score == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_on_the_last_attempt_fails_the_job():
+    pool = EvaluationWorkerPool(async_session_test, lease_seconds=60, max_attempts=1)
+    assert await pool.claim_job() == "job-1"
+
+    async with async_session_test() as db:
+        job = await db.get(EvaluationJob, "job-1")
+        job.updated_at = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+        await db.commit()
+
+    assert await pool.claim_job() is None
+    job = await get_job("job-1")
+    assert job.status == "failed"
+    assert job.attempts == 1
+    assert pool.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_evaluating(monkeypatch):
+    pool = EvaluationWorkerPool(async_session_test, lease_seconds=0.3)
+    reclaimed = []
+
+    async def slow_evaluate_response(question: str, response_text: str) -> tuple:
+        await asyncio.sleep(0.4)
+        reclaimed.append(await pool.claim_job())
+        return (4, "Good.")
+
+    monkeypatch.setattr(flow, "evaluate_response", slow_evaluate_response)
+    flow.evaluation_cache.clear()
+
+    assert await pool.claim_job() == "job-1"
+    await pool.process_job("job-1")
+
+    assert reclaimed and all(job_id is None for job_id in reclaimed)
+    job = await get_job("job-1")
+    assert job.status == "done"
+    assert job.attempts == 1
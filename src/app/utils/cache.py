@@ -0,0 +1,332 @@
+# app/utils/cache.py
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from app.models import CacheEntry
+
+LOGGER = logging.getLogger(__name__)
+
+# How often a database cache tier deletes its expired entries, see
+# DatabaseCacheTier.purge_expired.
+CACHE_PURGE_INTERVAL_SECONDS = float(
+    os.environ.get("CACHE_PURGE_INTERVAL_SECONDS", 300)
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize free text for cache keys: casefold and collapse whitespace.
+    """
+    return " ".join(text.split()).casefold()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable content-addressed key from JSON serializable parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries expire after ttl_seconds (never if None).
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = (
+            time.monotonic() + self.ttl_seconds
+            if self.ttl_seconds is not None
+            else None
+        )
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    With cancel_abandoned the execution is cancelled once every caller waiting for
+    it was cancelled, otherwise it runs to completion.
+    """
+
+    def __init__(self, cancel_abandoned: bool = False):
+        self.cancel_abandoned = cancel_abandoned
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shield the shared task so one cancelled caller does not cancel the others.
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if self.cancel_abandoned and not task.done():
+                    task.cancel()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class DatabaseCacheTier:
+    """
+    Cache tier stored in the cache_entries table so entries survive restarts.
+
+    Errors are logged and treated as misses, the tier is strictly best-effort.
+    Expired entries are deleted by set at most every purge_interval seconds.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: Optional[float] = None,
+        session_factory=None,
+        purge_interval: float = CACHE_PURGE_INTERVAL_SECONDS,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._session_factory = session_factory
+        self.purge_interval = purge_interval
+        self._last_purge = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.purged = 0
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from app.database import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(CacheEntry.value, CacheEntry.expires_at).where(
+                        CacheEntry.namespace == self.namespace, CacheEntry.key == key
+                    )
+                )
+                row = result.one_or_none()
+        except Exception as e:
+            LOGGER.error("Error reading %s cache entry: %r", self.namespace, e)
+            self.errors += 1
+            return None
+        if row is None or (
+            row.expires_at is not None and row.expires_at <= datetime.datetime.utcnow()
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row.value
+
+    async def set(self, key: str, value: Any) -> None:
+        expires_at = (
+            datetime.datetime.utcnow() + datetime.timedelta(seconds=self.ttl_seconds)
+            if self.ttl_seconds is not None
+            else None
+        )
+        try:
+            async with self.session_factory() as session:
+                await session.merge(
+                    CacheEntry(
+                        namespace=self.namespace,
+                        key=key,
+                        value=value,
+                        expires_at=expires_at,
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            LOGGER.error("Error writing %s cache entry: %r", self.namespace, e)
+            self.errors += 1
+        if time.monotonic() - self._last_purge >= self.purge_interval:
+            await self.purge_expired()
+
+    async def purge_expired(self) -> int:
+        """
+        Delete the expired entries of the namespace and return their number.
+        """
+        self._last_purge = time.monotonic()
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    delete(CacheEntry).where(
+                        CacheEntry.expires_at <= datetime.datetime.utcnow(),
+                        CacheEntry.namespace == self.namespace,
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            LOGGER.error("Error purging %s cache entries: %r", self.namespace, e)
+            self.errors += 1
+            return 0
+        self.purged += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "purged": self.purged,
+        }
+
+
+class TieredCache:
+    """
+    Read-through cache with an in-process LRU tier, an optional database tier and
+    single-flight deduplication of concurrent misses for the same key.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int,
+        ttl_seconds: Optional[float] = None,
+        persistent: bool = False,
+        session_factory=None,
+        cancel_abandoned: bool = False,
+    ):
+        self.namespace = namespace
+        self.memory = TTLCache(maxsize, ttl_seconds)
+        self.database = (
+            DatabaseCacheTier(namespace, ttl_seconds, session_factory)
+            if persistent
+            else None
+        )
+        self._single_flight = SingleFlight(cancel_abandoned)
+        self.computed = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None and self.database is not None:
+            value = await self.database.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.database is not None:
+            await self.database.set(key, value)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value for key, computing it once on a miss.
+
+        Falsy values, and values rejected by cacheable, are returned but not stored.
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        return await self._single_flight.do(
+            key, lambda: self._load(key, compute, cacheable)
+        )
+
+    async def _load(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]],
+    ) -> Any:
+        if self.database is not None:
+            value = await self.database.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                return value
+        value = await compute()
+        self.computed += 1
+        if value and (cacheable is None or cacheable(value)):
+            await self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "memory": self.memory.stats(),
+            "computed": self.computed,
+            "coalesced": self._single_flight.shared,
+        }
+        if self.database is not None:
+            stats["database"] = self.database.stats()
+        return stats
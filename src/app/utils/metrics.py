@@ -0,0 +1,275 @@
+# app/utils/metrics.py
+
+import contextvars
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Upper bounds in seconds, suited to requests that mostly wait on LLM calls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(labelnames, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum.
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def sum(self, **labels: str) -> float:
+        entry = self._values.get(self._key(labels))
+        return entry[1] if entry else 0.0
+
+    def series(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        """
+        Observation count and sum per label values.
+        """
+        return {
+            key: (sum(counts), total) for key, (counts, total) in self._values.items()
+        }
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        labelnames = self.labelnames + ("le",)
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = _format_labels(labelnames, key + (str(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_prometheus() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response headers are sent.",
+    ("method", "route", "status"),
+)
+DB_TIME = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent executing SQL statements per HTTP request.",
+    ("route",),
+)
+LLM_LATENCY = Histogram(
+    "llm_call_duration_seconds",
+    "Latency of LLM provider calls.",
+    ("provider", "route", "outcome"),
+)
+LLM_FIRST_CHUNK_LATENCY = Histogram(
+    "llm_time_to_first_chunk_seconds",
+    "Time until the first chunk of streamed LLM completions.",
+    ("provider", "route"),
+)
+LLM_TOKENS = Histogram(
+    "llm_tokens_per_call",
+    "Prompt and completion tokens per LLM call.",
+    ("provider", "route", "kind"),
+    buckets=TOKEN_BUCKETS,
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time LLM calls waited for the rate and concurrency limits.",
+    ("route",),
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth", "LLM calls currently waiting for the rate limiter."
+)
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "llm_concurrency_limit", "Current adaptive limit of concurrent LLM calls."
+)
+LLM_RETRIES = Counter(
+    "llm_retries_total", "Retried LLM calls by failure reason.", ("provider", "reason")
+)
+LLM_TRUNCATED_COMPLETIONS = Counter(
+    "llm_truncated_completions_total",
+    "LLM completions cut off by their max_tokens budget.",
+    ("route",),
+)
+LLM_PROMPT_CLIPPED = Counter(
+    "llm_prompt_clipped_total",
+    "Prompt inputs condensed or truncated to fit their token budget.",
+    ("kind", "action"),
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check out a pooled database connection.",
+    ("pool",),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Connection checkouts that timed out waiting for the pool.",
+    ("pool",),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Database connections currently checked out.", ("pool",)
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Database connections open beyond pool_size, negative while the pool fills up.",
+    ("pool",),
+)
+DB_POOL_SATURATION = Gauge(
+    "db_pool_saturation",
+    "Checked out connections over pool_size + max_overflow.",
+    ("pool",),
+)
+QUESTION_BANK_LOOKUPS = Counter(
+    "question_bank_lookups_total",
+    "Question bank lookups by outcome, a miss falls back to the LLM.",
+    ("outcome",),
+)
+
+
+class RequestStats:
+    """
+    Mutable per-request accumulator shared with every task serving the request.
+    """
+
+    def __init__(self, route: str):
+        self.route = route
+        self.db_seconds = 0.0
+
+
+current_request: contextvars.ContextVar[Optional[RequestStats]] = (
+    contextvars.ContextVar("current_request", default=None)
+)
+
+
+def current_route() -> str:
+    """
+    Route template of the request being served, "none" outside of requests.
+    """
+    stats = current_request.get()
+    return stats.route if stats is not None else "none"
+
+
+def instrument_engine(engine) -> None:
+    """
+    Attribute the SQL execution time of engine to the current request.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info["metrics_started"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_seconds += time.perf_counter() - started
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_started"):
+            conn.info["metrics_started"].pop()
@@ -1,13 +1,24 @@
 # app/utils/middleware.py
 
 import logging
+import os
+import random
+import time
 
 from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
+
+from app.utils import metrics, tracing
 
 # Configure a logger for this module.
 logger = logging.getLogger("app.middleware")
 
+# Fraction of successful, fast requests that get an access-log record. Errors and
+# slow requests are always logged.
+ACCESS_LOG_SAMPLE_RATE = float(os.environ.get("ACCESS_LOG_SAMPLE_RATE", 1.0))
+ACCESS_LOG_SLOW_SECONDS = float(os.environ.get("ACCESS_LOG_SLOW_SECONDS", 5.0))
+
 
 def add_middleware(app):
     # Add CORS middleware.
@@ -22,12 +33,54 @@ def add_middleware(app):
     app.middleware("http")(log_requests)
 
 
+def route_template(request: Request) -> str:
+    """
+    Path template of the route matching the request, e.g. "/interview/jobs/{job_id}".
+    """
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
 async def log_requests(request: Request, call_next):
-    # Log the incoming request.
-    logger.info(f"Incoming request: {request.method} {request.url}")
-    response = await call_next(request)
-    # Log the outgoing response.
-    logger.info(
-        f"Outgoing response: {response.status_code} for {request.method} {request.url}"
-    )
-    return response
+    route = route_template(request)
+    stats = metrics.RequestStats(route)
+    token = metrics.current_request.set(stats)
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        with tracing.span(
+            f"HTTP {request.method} {route}",
+            **{"http.method": request.method, "http.route": route},
+        ) as request_span:
+            response = await call_next(request)
+            status_code = response.status_code
+            if request_span is not None:
+                request_span.set_attribute("http.status_code", status_code)
+        return response
+    finally:
+        duration = time.perf_counter() - started
+        metrics.current_request.reset(token)
+        metrics.REQUEST_LATENCY.observe(
+            duration, method=request.method, route=route, status=str(status_code)
+        )
+        metrics.DB_TIME.observe(stats.db_seconds, route=route)
+        if (
+            status_code >= 500
+            or duration >= ACCESS_LOG_SLOW_SECONDS
+            or random.random() < ACCESS_LOG_SAMPLE_RATE
+        ):
+            # A dict message is formatted by the log listener, off the event loop.
+            logger.info(
+                {
+                    "event": "request",
+                    "method": request.method,
+                    "path": request.url.path,
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "db_ms": round(stats.db_seconds * 1000, 2),
+                }
+            )
@@ -0,0 +1,315 @@
+# app/utils/tracing.py
+
+"""
+Lightweight tracing with OpenTelemetry-compatible span data.
+
+Spans are exported as OTLP/JSON lines, the format read by the OpenTelemetry
+collector's otlpjsonfile receiver. TRACE_EXPORTER selects where they go:
+
+- "none" (default): tracing is disabled and span() is close to free.
+- "file": append to TRACE_EXPORT_PATH from a background thread.
+- "memory": keep the last TRACE_MEMORY_SPANS spans, served at GET /ops/traces.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "none")
+TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH", "traces.jsonl")
+TRACE_MEMORY_SPANS = int(os.environ.get("TRACE_MEMORY_SPANS", 1000))
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))
+SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "ai-interview-system")
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent.span_id if parent else ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_document(spans: List[Span]) -> dict:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "app.utils.tracing"},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class MemoryExporter:
+    """
+    Collector stand-in keeping the most recent spans in memory.
+    """
+
+    def __init__(self, maxlen: int = TRACE_MEMORY_SPANS):
+        self.spans: deque = deque(maxlen=maxlen)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def document(self, limit: Optional[int] = None) -> dict:
+        spans = list(self.spans)
+        return _otlp_document(spans[-limit:] if limit else spans)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileExporter:
+    """
+    Appends one OTLP/JSON document per span to a file from a background thread.
+    """
+
+    def __init__(self, path: str = TRACE_EXPORT_PATH):
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _run(self) -> None:
+        with open(self.path, "a") as fh:
+            while True:
+                span = self._queue.get()
+                if span is None:
+                    return
+                fh.write(json.dumps(_otlp_document([span])) + "\n")
+                if self._queue.empty():
+                    fh.flush()
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+_exporter = None
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+# Marks a trace that was not sampled so its child spans are skipped too.
+_UNSAMPLED = object()
+
+
+def configure(exporter: Optional[str] = TRACE_EXPORTER, **kwargs):
+    """
+    Select the span exporter ("none", "file" or "memory") and return it.
+    """
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+    if exporter == "file":
+        _exporter = FileExporter(**kwargs)
+    elif exporter == "memory":
+        _exporter = MemoryExporter(**kwargs)
+    else:
+        _exporter = None
+    return _exporter
+
+
+def get_exporter():
+    return _exporter
+
+
+def current_span() -> Optional[Span]:
+    span = _current_span.get()
+    return span if isinstance(span, Span) else None
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """
+    Set an attribute on the current span, if there is one.
+    """
+    span = current_span()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+def _sampled(parent) -> bool:
+    """
+    Whether a span under parent is recorded: root spans start a trace with
+    probability TRACE_SAMPLE_RATE, child spans follow their trace.
+    """
+    if parent is None:
+        return random.random() < TRACE_SAMPLE_RATE
+    return parent is not _UNSAMPLED
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """
+    Create a child of the current span without making it current, or a root span
+    subject to TRACE_SAMPLE_RATE, e.g. for queries of background workers.
+
+    Returns None when tracing is disabled or the trace is not sampled.
+    """
+    if _exporter is None:
+        return None
+    parent = _current_span.get()
+    if not _sampled(parent):
+        return None
+    return Span(name, parent, attributes)
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    if span is None:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.error = repr(error)
+    if _exporter is not None:
+        _exporter.export(span)
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    Run the block in a new span, child of the current one.
+    """
+    if _exporter is None:
+        yield None
+        return
+    parent = _current_span.get()
+    if not _sampled(parent):
+        token = _current_span.set(_UNSAMPLED)
+        try:
+            yield None
+        finally:
+            _current_span.reset(token)
+        return
+
+    new_span = Span(name, parent, attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        end_span(new_span, e)
+        raise
+    else:
+        end_span(new_span)
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """
+    Decorator running an async function inside span(name).
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_engine(engine) -> None:
+    """
+    Record a "db.<operation>" span for every SQL statement executed by engine.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        db_span = start_span(
+            f"db.{operation.lower()}",
+            **{"db.system": engine.dialect.name, "db.operation": operation},
+        )
+        conn.info.setdefault("tracing_spans", []).append(db_span)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        db_span = conn.info["tracing_spans"].pop()
+        if db_span is not None and cursor.rowcount is not None:
+            db_span.set_attribute("db.rowcount", cursor.rowcount)
+        end_span(db_span)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("tracing_spans"):
+            end_span(
+                conn.info["tracing_spans"].pop(), exception_context.original_exception
+            )
+
+
+def traces(limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Recent spans of the memory exporter as an OTLP/JSON document.
+    """
+    if isinstance(_exporter, MemoryExporter):
+        return _exporter.document(limit)
+    return _otlp_document([])
@@ -0,0 +1,117 @@
+"""
+Speculative evaluation of the answers sent one at a time with POST /interview/answer.
+
+Every answer is evaluated in a background task of the API process as soon as it
+arrives, and its score is stored on its answer_drafts row, so the final submit
+mostly aggregates scores that are already there. An evaluation still running
+when the submit arrives on the same process is joined through
+flow.evaluation_cache, and answers without a stored evaluation are evaluated by
+the submit.
+
+Sending another answer to the same question cancels the evaluation of the
+previous one, and at most ANSWER_EVALUATION_MAX_PENDING evaluations run per
+process, answers arriving past that are left for the submit.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Tuple
+
+from app import crud
+from app.agents import flow
+
+LOGGER = logging.getLogger(__name__)
+
+ANSWER_EVALUATION_MAX_PENDING = int(
+    os.environ.get("ANSWER_EVALUATION_MAX_PENDING", 1000)
+)
+
+# Running evaluations by (session id, question index).
+_tasks: Dict[Tuple[str, int], asyncio.Task] = {}
+
+
+def evaluate_in_background(
+    session_factory, session_id: str, position: int, question: str, response: str
+) -> bool:
+    """
+    Start evaluating an answer and store the evaluation once done.
+
+    Returns False when too many evaluations are pending and the answer is left for
+    the submit to evaluate.
+    """
+    key = (session_id, position)
+    previous = _tasks.pop(key, None)
+    if previous is not None:
+        previous.cancel()
+    if len(_tasks) >= ANSWER_EVALUATION_MAX_PENDING:
+        LOGGER.warning(
+            "%d answer evaluations pending, answer %d of session %s is left "
+            "for the submit",
+            len(_tasks),
+            position,
+            session_id,
+        )
+        return False
+    task = asyncio.create_task(
+        _evaluate(session_factory, session_id, position, question, response)
+    )
+    _tasks[key] = task
+    task.add_done_callback(lambda done: _forget(key, done))
+    return True
+
+
+def _forget(key: Tuple[str, int], task: asyncio.Task) -> None:
+    if _tasks.get(key) is task:
+        del _tasks[key]
+
+
+async def _evaluate(
+    session_factory, session_id: str, position: int, question: str, response: str
+) -> None:
+    try:
+        score, comment = await flow.evaluate_answer(question, response)
+        if score is None:
+            # Not stored, the submit evaluates the answer again.
+            LOGGER.warning(
+                "Evaluation of answer %d of session %s has no score",
+                position,
+                session_id,
+            )
+            return
+        async with session_factory() as db:
+            stored = await crud.save_answer_evaluation(
+                db, session_id, position, response, score, comment
+            )
+            await db.commit()
+    except Exception as e:
+        # The submit evaluates the answer itself.
+        LOGGER.error(
+            "Error evaluating answer %d of session %s: %r", position, session_id, e
+        )
+        return
+    if not stored:
+        LOGGER.debug(
+            "Answer %d of session %s changed before its evaluation",
+            position,
+            session_id,
+        )
+
+
+def pending() -> int:
+    """
+    Number of answer evaluations running in this process.
+    """
+    return len(_tasks)
+
+
+async def stop(timeout: float = 30) -> None:
+    """
+    Wait up to timeout seconds for the running evaluations, then cancel the rest.
+    """
+    if not _tasks:
+        return
+    _, still_running = await asyncio.wait(set(_tasks.values()), timeout=timeout)
+    for task in still_running:
+        task.cancel()
+    await asyncio.gather(*still_running, return_exceptions=True)
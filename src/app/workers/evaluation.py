@@ -0,0 +1,363 @@
+"""
+Worker pool processing queued evaluation jobs from the evaluation_jobs table.
+
+Jobs are created by POST /interview/submit/async. Workers run inside the API
+process when EVALUATION_QUEUE_MODE=inprocess, or in separate processes with:
+
+    python -m app.workers.evaluation
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import random
+import signal
+import time
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.future import select
+
+from app import crud
+from app.agents import flow, providers
+from app.models import EvaluationJob
+
+LOGGER = logging.getLogger(__name__)
+
+# "inprocess" runs the workers in the API process, "external" leaves the jobs to
+# separate `python -m app.workers.evaluation` processes.
+EVALUATION_QUEUE_MODE = os.environ.get("EVALUATION_QUEUE_MODE", "inprocess")
+EVALUATION_WORKERS = int(os.environ.get("EVALUATION_WORKERS", 2))
+EVALUATION_QUEUE_POLL_SECONDS = float(
+    os.environ.get("EVALUATION_QUEUE_POLL_SECONDS", 2)
+)
+EVALUATION_QUEUE_JOBS_PER_MINUTE = float(
+    os.environ.get("EVALUATION_QUEUE_JOBS_PER_MINUTE", 0)
+)
+EVALUATION_JOB_MAX_ATTEMPTS = int(os.environ.get("EVALUATION_JOB_MAX_ATTEMPTS", 3))
+EVALUATION_JOB_LEASE_SECONDS = float(
+    os.environ.get("EVALUATION_JOB_LEASE_SECONDS", 300)
+)
+EVALUATION_JOB_RETRY_BASE_SECONDS = float(
+    os.environ.get("EVALUATION_JOB_RETRY_BASE_SECONDS", 5)
+)
+
+
+class SubmissionConflict(Exception):
+    """
+    Raised when another submit of the session was stored while a job was evaluated.
+
+    Retrying would overwrite the result of that submit, so the job fails for good.
+    """
+
+
+class EvaluationWorkerPool:
+    """
+    Pool of asyncio workers claiming and processing evaluation jobs.
+
+    Workers only claim a job when the shared evaluation concurrency limit has a
+    free slot and, if jobs_per_minute is set, no faster than that rate, so bursts
+    queue up in the database instead of piling onto the LLM provider. Claiming uses
+    SELECT ... FOR UPDATE SKIP LOCKED on Postgres so several processes can share the
+    queue. Workers renew the lease of their job while evaluating it, jobs whose
+    worker died are reclaimed after lease_seconds, or failed when that was their
+    last attempt.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        workers: int = EVALUATION_WORKERS,
+        poll_seconds: float = EVALUATION_QUEUE_POLL_SECONDS,
+        jobs_per_minute: float = EVALUATION_QUEUE_JOBS_PER_MINUTE,
+        max_attempts: int = EVALUATION_JOB_MAX_ATTEMPTS,
+        lease_seconds: float = EVALUATION_JOB_LEASE_SECONDS,
+        retry_base_seconds: float = EVALUATION_JOB_RETRY_BASE_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.min_claim_interval = 60 / jobs_per_minute if jobs_per_minute else 0
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._pacing_lock = asyncio.Lock()
+        self._next_claim_at = 0.0
+        self.processed = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._run_worker()) for _ in range(self.workers)
+        ]
+        LOGGER.info("Started %d evaluation workers", self.workers)
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        Stop claiming jobs and wait up to timeout seconds for running ones.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """
+        Wake idle workers, called after a job has been enqueued.
+        """
+        self._wakeup.set()
+
+    async def _run_worker(self) -> None:
+        while not self._stopping:
+            await self._wait_for_capacity()
+            self._wakeup.clear()
+            try:
+                job_id = await self.claim_job()
+            except Exception as e:
+                LOGGER.error("Error claiming evaluation job: %r", e)
+                job_id = None
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.process_job(job_id)
+
+    async def _wait_for_capacity(self) -> None:
+        while not self._stopping and not flow.evaluation_slots_available():
+            await asyncio.sleep(0.05)
+        if self.min_claim_interval:
+            async with self._pacing_lock:
+                delay = self._next_claim_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._next_claim_at = time.monotonic() + self.min_claim_interval
+
+    async def claim_job(self) -> Optional[str]:
+        """
+        Mark the oldest available job as running and return its id.
+        """
+        now = datetime.datetime.utcnow()
+        lease_expired = now - datetime.timedelta(seconds=self.lease_seconds)
+        abandoned = and_(
+            EvaluationJob.status == "running",
+            EvaluationJob.updated_at <= lease_expired,
+        )
+        claimable = or_(
+            and_(EvaluationJob.status == "queued", EvaluationJob.available_at <= now),
+            and_(abandoned, EvaluationJob.attempts < self.max_attempts),
+        )
+        async with self.session_factory() as db:
+            # Jobs whose workers died on their last attempt are not run again.
+            expired = await db.execute(
+                update(EvaluationJob)
+                .where(abandoned, EvaluationJob.attempts >= self.max_attempts)
+                .values(
+                    status="failed",
+                    error="Lease expired on the last attempt",
+                    updated_at=now,
+                )
+            )
+            if expired.rowcount:
+                self.failed += expired.rowcount
+                await db.commit()
+            result = await db.execute(
+                select(EvaluationJob.id)
+                .where(claimable)
+                .order_by(EvaluationJob.available_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job_id = result.scalar_one_or_none()
+            if job_id is None:
+                return None
+            # Guard against another worker claiming it between the two statements
+            # on databases without row locks.
+            claimed = await db.execute(
+                update(EvaluationJob)
+                .where(EvaluationJob.id == job_id, claimable)
+                .values(
+                    status="running",
+                    attempts=EvaluationJob.attempts + 1,
+                    updated_at=now,
+                )
+            )
+            await db.commit()
+        return job_id if claimed.rowcount == 1 else None
+
+    async def process_job(self, job_id: str) -> None:
+        """
+        Evaluate a claimed job and store the result on the job and the session.
+
+        No database connection is held while the LLM calls are running, the lease
+        of the job is renewed meanwhile so it is not reclaimed by another worker.
+        """
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            async with self.session_factory() as db:
+                job = await db.get(EvaluationJob, job_id)
+                session_record = await crud.get_session(db, job.session_id)
+                questions = await crud.get_questions(db, job.session_id)
+                responses = job.responses
+
+            evaluations = await flow.evaluate_responses(questions, responses)
+            feedback, overall_score = await flow.validate_scores(evaluations)
+
+            async with self.session_factory() as db:
+                saved = await crud.save_submission(
+                    db,
+                    session_record.id,
+                    responses,
+                    evaluations,
+                    feedback,
+                    overall_score,
+                    key=job.idempotency_key,
+                    expected_version=session_record.version,
+                )
+                if not saved:
+                    await db.rollback()
+                    session_record = await crud.get_session(db, session_record.id)
+                    if (
+                        job.idempotency_key is None
+                        or session_record.submission_key != job.idempotency_key
+                        or session_record.submitted_at is None
+                    ):
+                        raise SubmissionConflict("Session was submitted concurrently")
+                    # An identical submit finished first, keep its result.
+                    feedback = session_record.feedback
+                    overall_score = session_record.overall_score
+                job = await db.get(EvaluationJob, job_id)
+                job.status = "done"
+                job.error = None
+                job.result = {
+                    "session_id": session_record.id,
+                    "candidate_id": session_record.candidate_id,
+                    "feedback": feedback,
+                    "overall_score": overall_score,
+                }
+                await db.commit()
+            self.processed += 1
+        except SubmissionConflict as e:
+            LOGGER.warning("Evaluation job %s lost its submit: %s", job_id, e)
+            await self._fail_job(job_id, e, retry=False)
+        except Exception as e:
+            LOGGER.error("Error processing evaluation job %s: %r", job_id, e)
+            await self._fail_job(job_id, e)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """
+        Renew the lease of a running job every third of lease_seconds.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(
+                        update(EvaluationJob)
+                        .where(
+                            EvaluationJob.id == job_id,
+                            EvaluationJob.status == "running",
+                        )
+                        .values(updated_at=datetime.datetime.utcnow())
+                    )
+                    await db.commit()
+            except Exception as e:
+                LOGGER.warning("Error renewing the lease of job %s: %r", job_id, e)
+
+    async def _fail_job(
+        self, job_id: str, error: Exception, retry: bool = True
+    ) -> None:
+        try:
+            async with self.session_factory() as db:
+                job = await db.get(EvaluationJob, job_id)
+                job.error = repr(error)
+                if not retry or job.attempts >= self.max_attempts:
+                    job.status = "failed"
+                    self.failed += 1
+                else:
+                    # Exponential backoff with jitter before the job is retried.
+                    delay = self.retry_base_seconds * 2 ** (job.attempts - 1)
+                    job.status = "queued"
+                    job.available_at = datetime.datetime.utcnow() + datetime.timedelta(
+                        seconds=random.uniform(delay / 2, delay)
+                    )
+                await db.commit()
+        except Exception as e:
+            LOGGER.error("Error recording failure of job %s: %r", job_id, e)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+_pool: Optional[EvaluationWorkerPool] = None
+
+
+async def start_pool(session_factory) -> Optional[EvaluationWorkerPool]:
+    """
+    Start the in-process worker pool unless the queue is served externally.
+    """
+    global _pool
+    if EVALUATION_QUEUE_MODE != "inprocess" or EVALUATION_WORKERS <= 0:
+        return None
+    _pool = EvaluationWorkerPool(session_factory)
+    await _pool.start()
+    return _pool
+
+
+async def stop_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.stop()
+        _pool = None
+
+
+def notify() -> None:
+    """
+    Wake the in-process workers, if any, after a job has been enqueued.
+    """
+    if _pool is not None:
+        _pool.notify()
+
+
+def get_pool() -> Optional[EvaluationWorkerPool]:
+    return _pool
+
+
+async def run_forever() -> None:
+    from app.database import AsyncSessionLocal
+
+    providers.init_provider()
+    pool = EvaluationWorkerPool(AsyncSessionLocal)
+    await pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    LOGGER.info("Draining evaluation workers")
+    await pool.stop()
+    await providers.close_provider()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_forever())
@@ -0,0 +1,24 @@
+#!/bin/bash
+set -e
+
+# Activate the virtual environment
+source .venv/bin/activate
+
+# Apply the schema once, instead of every worker doing it at boot.
+python -m app.migrations
+export DB_AUTO_CREATE_SCHEMA=false
+
+# One worker per core by default. Every worker has its own database pool, so keep
+# WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the server's max_connections.
+# On SIGTERM workers stop accepting connections and get GRACEFUL_SHUTDOWN_SECONDS
+# to finish in-flight requests. Requests are logged by the app's own access log.
+exec uvicorn app.main:app \
+    --host 0.0.0.0 \
+    --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-$(nproc)}" \
+    --loop uvloop \
+    --http httptools \
+    --proxy-headers \
+    --no-access-log \
+    --timeout-keep-alive "${KEEPALIVE_TIMEOUT_SECONDS:-5}" \
+    --timeout-graceful-shutdown "${GRACEFUL_SHUTDOWN_SECONDS:-30}"
@@ -0,0 +1,7 @@
+#!/bin/bash
+
+# Activate the virtual environment
+source .venv/bin/activate
+
+# Process queued evaluation jobs (used with EVALUATION_QUEUE_MODE=external)
+python -m app.workers.evaluation